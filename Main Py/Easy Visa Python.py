@@ -49,16 +49,23 @@ from sklearn.metrics import accuracy_score, classification_report, confusion_mat
 
 """### Understanding the structure of the data"""
 
-# from google.colab import drive
-# drive.mount('/content/drive')
-from google.colab import drive
-drive.mount('/content/drive')
+# Mount Google Drive only when running on Colab; locally the data path is used as is
+try:
+    from google.colab import drive
+except ImportError:
+    drive = None
+if drive is not None:
+    drive.mount('/content/drive')
 
-from google.colab import drive
-drive.mount('/content/drive')
+from easyvisa.ingest import load_visa_data, memory_usage_mb
+from easyvisa.profiling import profiler, stage
 
+# Set EASYVISA_PROFILE=1 (or call easyvisa.profiling.enable()) to time every stage;
+# the trace is written to visa_profile.json at the end of the run
+
+# Typed load: categories, small ints and boolean Y/N flags, cached as Parquet next to the CSV
 file_path = '/content/EasyVisa.csv'
-data = pd.read_csv(file_path)
+data = load_visa_data(file_path)
 
 """#Data Overview
 
@@ -120,30 +127,25 @@ Education Level Distribution
 
 """
 
-# Group by education level and calculate certification rate
-edu_cert_rate = data.groupby("education_of_employee")["case_status"].value_counts(normalize=True).unstack() * 100
+from easyvisa.eda import CertificationStats
+from easyvisa.report import plot_rates
+
+# All per-feature and pairwise certification counts in one pass over categorical codes;
+# a new monthly batch is added with cert_stats.update(new_batch)
+cert_stats = CertificationStats().update(data)
+
+# Certification rate by education level
+edu_cert_rate = cert_stats.rates("education_of_employee")
 
 # Plot visa approval rates by education level
-plt.figure(figsize=(10, 5))
-edu_cert_rate.plot(kind="bar", stacked=True, colormap="coolwarm", alpha=0.85)
-plt.title("Visa Certification Rate by Education Level")
-plt.xlabel("Education Level")
-plt.ylabel("Percentage (%)")
-plt.legend(["Denied", "Certified"], title="Case Status")
-plt.xticks(rotation=45)
+plot_rates(edu_cert_rate, "Visa Certification Rate by Education Level", "Education Level", colormap="coolwarm", rotation=45, figsize=(10, 5))
 plt.show()
 
 # Group by continent and calculate certification rate
-cont_cert_rate = data.groupby("continent")["case_status"].value_counts(normalize=True).unstack() * 100
+cont_cert_rate = cert_stats.rates("continent")
 
 # Plot visa approval rates by continent
-plt.figure(figsize=(10, 5))
-cont_cert_rate.plot(kind="bar", stacked=True, colormap="viridis", alpha=0.85)
-plt.title("Visa Certification Rate by Continent")
-plt.xlabel("Continent")
-plt.ylabel("Percentage (%)")
-plt.legend(["Denied", "Certified"], title="Case Status")
-plt.xticks(rotation=45)
+plot_rates(cont_cert_rate, "Visa Certification Rate by Continent", "Continent", colormap="viridis", rotation=45, figsize=(10, 5))
 plt.show()
 
 """##Insights from Bivariate Analysis:
@@ -157,16 +159,10 @@ Continent-wise Visa Certification
 """
 
 # Group by job experience and calculate certification rate
-exp_cert_rate = data.groupby("has_job_experience")["case_status"].value_counts(normalize=True).unstack() * 100
+exp_cert_rate = cert_stats.rates("has_job_experience")
 
 # Plot visa approval rates by job experience
-plt.figure(figsize=(6, 4))
-exp_cert_rate.plot(kind="bar", stacked=True, colormap="coolwarm", alpha=0.85)
-plt.title("Visa Certification Rate by Job Experience")
-plt.xlabel("Has Job Experience")
-plt.ylabel("Percentage (%)")
-plt.legend(["Denied", "Certified"], title="Case Status")
-plt.xticks(rotation=0)
+plot_rates(exp_cert_rate, "Visa Certification Rate by Job Experience", "Has Job Experience", colormap="coolwarm", rotation=0, figsize=(6, 4))
 plt.show()
 
 """####Insights on Job Experience and Visa Certification
@@ -175,16 +171,10 @@ plt.show()
 """
 
 # Group by pay unit and calculate certification rate
-wage_cert_rate = data.groupby("unit_of_wage")["case_status"].value_counts(normalize=True).unstack() * 100
+wage_cert_rate = cert_stats.rates("unit_of_wage")
 
 # Plot visa approval rates by pay unit
-plt.figure(figsize=(8, 4))
-wage_cert_rate.plot(kind="bar", stacked=True, colormap="viridis", alpha=0.85)
-plt.title("Visa Certification Rate by Pay Unit")
-plt.xlabel("Pay Unit")
-plt.ylabel("Percentage (%)")
-plt.legend(["Denied", "Certified"], title="Case Status")
-plt.xticks(rotation=0)
+plot_rates(wage_cert_rate, "Visa Certification Rate by Pay Unit", "Pay Unit", colormap="viridis", rotation=0, figsize=(8, 4))
 plt.show()
 
 """####Insights on Pay Unit and Visa Certification
@@ -217,12 +207,12 @@ plt.show()
 sns.set(style="whitegrid")
 
 # Calculate proportion
-visa_counts = data["case_status"].value_counts(normalize=True) * 100
+visa_counts = cert_stats.status_rates()
 print("Visa Approval Rates:\n", visa_counts)
 
 #Are certain U.S. regions more favorable?
 plt.figure(figsize=(12, 6))
-region_vs_visa = data.groupby("region_of_employment")["case_status"].value_counts(normalize=True).unstack()
+region_vs_visa = cert_stats.rates("region_of_employment") / 100
 region_vs_visa.plot(kind="bar", stacked=True, figsize=(12, 6), colormap="viridis")
 plt.title("Visa Approval Rates by U.S. Region")
 plt.ylabel("Proportion of Applications")
@@ -233,7 +223,7 @@ plt.show()
 
 #Does requiring job training impact visa approvals?
 plt.figure(figsize=(6, 4))
-sns.countplot(x=data["requires_job_training"], hue=data["case_status"], palette="Set1")
+cert_stats.counts("requires_job_training").plot(kind="bar", colormap="Set1", ax=plt.gca(), rot=0)
 plt.title("Impact of Job Training Requirement on Visa Status")
 plt.xlabel("Requires Job Training (Y/N)")
 plt.ylabel("Count")
@@ -242,9 +232,9 @@ plt.show()
 
 #Work Experience + No Training Requirement
 plt.figure(figsize=(6, 4))
-sns.barplot(x=data["has_job_experience"], y=data["case_status"], hue=data["requires_job_training"], palette="coolwarm")
+cert_stats.pair_rates("has_job_experience", "requires_job_training").plot(kind="bar", colormap="coolwarm", ax=plt.gca(), rot=0)
 plt.title("Work Experience, Training & Visa Approval")
-plt.ylabel("Denial Rate")
+plt.ylabel("Certification Rate (%)")
 plt.xlabel("Has Job Experience (Y/N)")
 plt.legend(["No Training Required", "Training Required"])
 plt.show()
@@ -262,7 +252,7 @@ plt.show()
 
 # Full-Time vs. Part-Time Positions
 plt.figure(figsize=(6, 4))
-sns.countplot(x=data["full_time_position"], hue=data["case_status"], palette="viridis")
+cert_stats.counts("full_time_position").plot(kind="bar", colormap="viridis", ax=plt.gca(), rot=0)
 plt.title("Impact of Full-Time vs. Part-Time Work on Visa Approval")
 plt.xlabel("Full-Time Position (Y/N)")
 plt.ylabel("Count")
@@ -278,16 +268,15 @@ plt.show()
 
 """# Correlation Check"""
 
-data_encoded = data.copy()
+from easyvisa.store import FeatureStore
 
-# Encoding categorical variables for correlation analysis
-data_encoded["has_job_experience"] = data_encoded["has_job_experience"].map({"Y": 1, "N": 0})
-data_encoded["requires_job_training"] = data_encoded["requires_job_training"].map({"Y": 1, "N": 0})
-data_encoded["full_time_position"] = data_encoded["full_time_position"].map({"Y": 1, "N": 0})
-data_encoded["case_status"] = data_encoded["case_status"].map({"Certified": 1, "Denied": 0})
+# One compact copy of the table (int8 codes, packed flags, float32/int32 numerics,
+# a single 0/1 target); splits below are row positions into it, not frame copies
+store = FeatureStore.from_frame(data)
+print(f"DataFrame: {memory_usage_mb(data):.2f} MB, FeatureStore: {store.memory_usage_mb():.2f} MB")
 
-# Dropped non-numeric columns before correlation analysis
-numeric_data = data_encoded.select_dtypes(include=["number"])
+# Flags and the target as 0/1 numbers for correlation analysis
+numeric_data = store.numeric_frame()
 
 correlation_matrix = numeric_data.corr()
 
@@ -320,25 +309,18 @@ axes[1].set_title("Boxplot of Number of Employees")
 plt.tight_layout()
 plt.show()
 
+# Report mode: the figures above rendered off-screen by parallel workers from sketches and a
+# fixed-size row sample (so the time does not grow with the data), bundled into one HTML file
+from easyvisa.edareport import render_eda_report
 
-# Capping outliers at 95th percentile
-wage_cap = data["prevailing_wage"].quantile(0.95)
-emp_cap = data["no_of_employees"].quantile(0.95)
+render_eda_report(data, "visa_eda.html")
 
-data["prevailing_wage"] = data["prevailing_wage"].clip(upper=wage_cap)
-data["no_of_employees"] = data["no_of_employees"].clip(upper=emp_cap)
 
-# Verify outlier treatment with updated boxplots
-fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-sns.boxplot(data=data, y="prevailing_wage", ax=axes[0], palette="coolwarm")
-axes[0].set_title("Boxplot of Prevailing Wage (After Outlier Treatment)")
-sns.boxplot(data=data, y="no_of_employees", ax=axes[1], palette="viridis")
-axes[1].set_title("Boxplot of Number of Employees (After Outlier Treatment)")
-plt.tight_layout()
-plt.show()
+# The 95th-percentile caps are learned on the training split only (see
+# VisaPreprocessor below); computing them here on the full data would leak the test set.
 
 """####Outlier Treatment :
-- The extreme outliers have been capped at the 95th percentile.
+- The extreme outliers are capped at the 95th percentile of the training split.
 This prevents extreme values from skewing the model.
 
 # Train Test split
@@ -346,66 +328,79 @@ This prevents extreme values from skewing the model.
 
 from sklearn.model_selection import train_test_split
 
-# Define features and target variable
-X = data.drop(columns=["case_id", "case_status"])
-y = data["case_status"]
+# Split data into 80% train and 20% test sets; same rows as
+# train_test_split(X, y, test_size=0.2, random_state=42, stratify=y) on the frame
+train_rows, test_rows = store.split(test_size=0.2, random_state=42)
+
+# Canonical 0/1 target (1 = Certified) shared by every model below
+y_train, y_test = store.y(train_rows), store.y(test_rows)
 
-# Split data into 80% train and 20% test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+# The full DataFrame is no longer needed
+del data
 
 # Confirm the split
-X_train.shape, X_test.shape, y_train.shape, y_test.shape
+train_rows.shape, test_rows.shape, y_train.shape, y_test.shape
 
 """# Decision Tree Model
 
 ###Data Preprocessing
 """
 
-from sklearn.preprocessing import LabelEncoder
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
-# ea copy of X_train and X_test
-X_train_encoded = X_train.copy()
-X_test_encoded = X_test.copy()
+from easyvisa.preprocess import VisaPreprocessor
+
+# One fitted transformer: caps and category codes are learned on the training split only,
+# unseen categories map to a reserved code. For data larger than memory use
+# VisaPreprocessor().fit_chunks(iter_visa_chunks(path)), which caps from streaming KLL sketches.
+preprocessor = VisaPreprocessor(cap_quantile=0.95).fit(store.frame(train_rows))
+X_train_encoded = store.features(train_rows, preprocessor)
+X_test_encoded = store.features(test_rows, preprocessor)
+print("Outlier caps:", preprocessor.caps_)
+
+# Verify outlier treatment with updated boxplots
+fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+sns.boxplot(data=X_train_encoded, y="prevailing_wage", ax=axes[0], palette="coolwarm")
+axes[0].set_title("Boxplot of Prevailing Wage (After Outlier Treatment)")
+sns.boxplot(data=X_train_encoded, y="no_of_employees", ax=axes[1], palette="viridis")
+axes[1].set_title("Boxplot of Number of Employees (After Outlier Treatment)")
+plt.tight_layout()
+plt.show()
+
+# Saved as a single artifact so new applications can be scored without rerunning the notebook
+preprocessor.save("visa_preprocessor.joblib")
+
+from easyvisa.cv import CVFolds
 
-# Identify categorical columns
-categorical_cols = X_train_encoded.select_dtypes(include=["object"]).columns
+# Five stratified folds fixed once and shared by every search and the stacking model below,
+# over one float32 copy of the training matrix (per-fold XGBoost bins are cached too)
+cv_folds = CVFolds(X_train_encoded, y_train, n_splits=5, random_state=42)
+X_train_cv = cv_folds.frame()
 
-label_encoders = {}
-for col in categorical_cols:
-    le = LabelEncoder()
-    X_train_encoded[col] = le.fit_transform(X_train_encoded[col])
-    X_test_encoded[col] = le.transform(X_test_encoded[col])
-    label_encoders[col] = le
+from easyvisa.train import default_model_specs, train_models
+
+# Every model compared below is fitted here at once, one process each over a shared
+# memory-mapped copy of the training matrix, so this takes about as long as the slowest model
+zoo = train_models(default_model_specs(random_state=42), X_train_encoded, y_train)
 
 dt_confusion_matrix = confusion_matrix(y_test, y_pred_dt)
 
 print("\nConfusion Matrix for Basic Decision Tree:\n", dt_confusion_matrix)
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix
-
-def plot_confusion_matrix(y_true, y_pred, title):
-    cm = confusion_matrix(y_true, y_pred)
-    plt.figure(figsize=(6, 4))
-    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=["Denied", "Certified"], yticklabels=["Denied", "Certified"])
-    plt.xlabel("Predicted")
-    plt.ylabel("Actual")
-    plt.title(title)
-    plt.show()
+from easyvisa.report import plot_confusion_matrix
 
 plot_confusion_matrix(y_test, y_pred_dt, "Confusion Matrix: Initial Decision Tree")
+plt.show()
 
 """###Train a Decision Tree Using Entropy"""
 
-# Train Decision Tree Classifier using entropy
-dt_model_entropy = DecisionTreeClassifier(criterion="entropy", random_state=42)
-dt_model_entropy.fit(X_train_encoded, y_train)
+# Decision Tree Classifier using entropy, fitted with the model zoo above
+dt_model_entropy = zoo["Decision Tree"]
 
 # Predictions on Test Data
-y_pred_dt = dt_model_entropy.predict(X_test_encoded)
+with stage("predict", model="dt_model_entropy", rows=len(X_test_encoded)):
+    y_pred_dt = dt_model_entropy.predict(X_test_encoded)
 
 # itsPerformance
 dt_accuracy = accuracy_score(y_test, y_pred_dt)
@@ -432,8 +427,9 @@ param_grid = {
 dt = DecisionTreeClassifier(random_state=42)
 
 # Grid Search Cross-Validation
-grid_search = GridSearchCV(dt, param_grid, cv=5, scoring="accuracy", n_jobs=-1)
-grid_search.fit(X_train_encoded, y_train)
+grid_search = GridSearchCV(dt, param_grid, cv=cv_folds, scoring="accuracy", n_jobs=-1)
+with stage("search", model="grid_search", rows=len(X_train_encoded)):
+    grid_search.fit(X_train_cv, y_train)
 
 #  parameters
 print("Best Hyperparameters:", grid_search.best_params_)
@@ -442,13 +438,15 @@ print("Best Hyperparameters:", grid_search.best_params_)
 best_dt_model = grid_search.best_estimator_
 
 # Predictions on test data (Best Model)
-y_pred_best = best_dt_model.predict(X_test_encoded)
+with stage("predict", model="best_dt_model", rows=len(X_test_encoded)):
+    y_pred_best = best_dt_model.predict(X_test_encoded)
 
 # Evaluate Model Performance (Best Model)
 best_accuracy = accuracy_score(y_test, y_pred_best)
 print(f"Best Model Accuracy: {best_accuracy:.4f}")
 
 plot_confusion_matrix(y_test, y_pred_best, "Confusion Matrix: Best Tuned Model")
+plt.show()
 
 """### Checking this for Overfitting
 
@@ -465,19 +463,21 @@ if train_accuracy > test_accuracy:
 
 """###Pruning the Decision Tree to Reduce Overfitting"""
 
-# Regularized Decision Tree (Pruned)
-clf_pruned = DecisionTreeClassifier(criterion="entropy", random_state=42, max_depth=3, min_samples_leaf=5)
-clf_pruned.fit(X_train_encoded, y_train)
+# Regularized Decision Tree (Pruned): entropy, max_depth=3, min_samples_leaf=5
+clf_pruned = zoo["Pruned Decision Tree"]
 
 # Predictions after pruning
-preds_pruned = clf_pruned.predict(X_test_encoded)
-preds_pruned_train = clf_pruned.predict(X_train_encoded)
+with stage("predict", model="clf_pruned", rows=len(X_test_encoded)):
+    preds_pruned = clf_pruned.predict(X_test_encoded)
+with stage("predict", model="clf_pruned", rows=len(X_train_encoded)):
+    preds_pruned_train = clf_pruned.predict(X_train_encoded)
 
 # Performance Evaluation
 print("Pruned Model Accuracy (Test Data):", accuracy_score(y_test, preds_pruned))
 print("Pruned Model Accuracy (Train Data):", accuracy_score(y_train, preds_pruned_train))
 
 plot_confusion_matrix(y_test, preds_pruned, "Confusion Matrix: Pruned Model")
+plt.show()
 
 """observatins:
 -  Pruning reduces overfitting but might lower accuracy.
@@ -486,32 +486,19 @@ plot_confusion_matrix(y_test, preds_pruned, "Confusion Matrix: Pruned Model")
 ###Visualizing the Pruned Decision Tree
 """
 
-import graphviz
-import pydotplus
-from six import StringIO
-from IPython.display import Image
-from sklearn.tree import export_graphviz
+from easyvisa.report import render_tree
 
 feature_cols = X_train_encoded.columns
 
-dot_data = StringIO()
-export_graphviz(clf_pruned, out_file=dot_data,
-                filled=True, rounded=True,
-                special_characters=True, feature_names=feature_cols, class_names=['Denied', 'Certified'])
-graph = pydotplus.graph_from_dot_data(dot_data.getvalue())
-Image(graph.create_png())
+render_tree(clf_pruned, feature_cols)
 
 """### Calculating Precision & Recall"""
 
 from sklearn.metrics import precision_score, recall_score
 
-# Conveting categorical labels to numeric:
-y_test_numeric = y_test.map({'Certified': 1, 'Denied': 0})
-preds_pruned_numeric = [1 if label == 'Certified' else 0 for label in preds_pruned]
-
-# precisioning and recalling
-precision = precision_score(y_test_numeric, preds_pruned_numeric)
-recall = recall_score(y_test_numeric, preds_pruned_numeric)
+# precisioning and recalling (labels are already 0/1, 1 = Certified)
+precision = precision_score(y_test, preds_pruned)
+recall = recall_score(y_test, preds_pruned)
 
 print(f"Precision: {precision:.4f}")
 print(f"Recall: {recall:.4f}")
@@ -526,13 +513,14 @@ from xgboost import XGBClassifier
 from sklearn.model_selection import GridSearchCV
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
-rf = RandomForestClassifier(n_estimators=100, random_state=42)
-rf.fit(X_train_encoded, y_train)
-y_pred_rf = rf.predict(X_test_encoded)
+rf = zoo["Random Forest"]
+with stage("predict", model="rf", rows=len(X_test_encoded)):
+    y_pred_rf = rf.predict(X_test_encoded)
 
 print("Random Forest Accuracy:", accuracy_score(y_test, y_pred_rf))
 print("Classification Report:\n", classification_report(y_test, y_pred_rf))
 plot_confusion_matrix(y_test, y_pred_rf, "Random Forest Confusion Matrix")
+plt.show()
 
 """### hyperparameter tuning :"""
 
@@ -542,27 +530,35 @@ rf_params = {
     'min_samples_split': [5, 10],
 }
 from sklearn.model_selection import RandomizedSearchCV
-rf_random = RandomizedSearchCV(RandomForestClassifier(random_state=42), rf_params,
-                               cv=3, scoring='accuracy', n_iter=5, n_jobs=-1, random_state=42)
-rf_random.fit(X_train_encoded, y_train)
-rf_grid = GridSearchCV(RandomForestClassifier(random_state=42), rf_params, cv=3, scoring='accuracy', n_jobs=2)
+from easyvisa.tuning import XGBEarlyStoppingSearch, halving_search
+
+# "budget" drops losing configurations early (successive halving / early stopping);
+# "exhaustive" fits every combination to completion;
+# "queue" fits every combination as resumable (config, fold) jobs in visa_search.db --
+# rerunning skips finished fits, and `python -m easyvisa.jobqueue worker visa_search.db`
+# on other hosts sharing the directory adds workers
+TUNING_MODE = "budget"
+
+if TUNING_MODE == "budget":
+    rf_random = halving_search(RandomForestClassifier(random_state=42), rf_params, X_train_cv, y_train, cv=cv_folds)
+    print(rf_random.report_)
+else:
+    rf_random = RandomizedSearchCV(RandomForestClassifier(random_state=42), rf_params,
+                                   cv=cv_folds, scoring='accuracy', n_iter=5, n_jobs=-1, random_state=42)
+    rf_random.fit(X_train_cv, y_train)
 
 """### Boosting - XGBoost Model"""
 
-# Convert labels to numerical values
-y_train_encoded = y_train.map({"Certified": 1, "Denied": 0})
-y_test_encoded = y_test.map({"Certified": 1, "Denied": 0})
-
-# Train XGBoost
-xgb = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-xgb.fit(X_train_encoded, y_train_encoded)
+# XGBoost with default hyperparameters
+xgb = zoo["XGBoost"]
 
 # Predictions
-y_pred_xgb = xgb.predict(X_test_encoded)
+with stage("predict", model="xgb", rows=len(X_test_encoded)):
+    y_pred_xgb = xgb.predict(X_test_encoded)
 
-print("XGBoost Accuracy:", accuracy_score(y_test_encoded, y_pred_xgb))
-print("\nClassification Report:\n", classification_report(y_test_encoded, y_pred_xgb))
-print("\nConfusion Matrix:\n", confusion_matrix(y_test_encoded, y_pred_xgb))
+print("XGBoost Accuracy:", accuracy_score(y_test, y_pred_xgb))
+print("\nClassification Report:\n", classification_report(y_test, y_pred_xgb))
+print("\nConfusion Matrix:\n", confusion_matrix(y_test, y_pred_xgb))
 
 xgb_params = {
     'n_estimators': [100, 200, 300],
@@ -571,21 +567,35 @@ xgb_params = {
 }
 
 
-xgb_grid = GridSearchCV(
-    XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42),
-    xgb_params, cv=3, scoring='accuracy', n_jobs=-1
-)
+if TUNING_MODE == "budget":
+    xgb_grid = XGBEarlyStoppingSearch(xgb_params, early_stopping_rounds=20, folds=cv_folds, eval_metric='logloss')
+elif TUNING_MODE == "queue":
+    from easyvisa.jobqueue import JobQueueSearch
+
+    xgb_grid = JobQueueSearch(
+        XGBClassifier(eval_metric='logloss', random_state=42, n_jobs=1),
+        xgb_params, "visa_search.db", name="xgb_grid", cv=cv_folds, scoring='accuracy'
+    )
+else:
+    xgb_grid = GridSearchCV(
+        XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42),
+        xgb_params, cv=cv_folds, scoring='accuracy', n_jobs=-1
+    )
 
 # Fit the model with encoded y_train
-xgb_grid.fit(X_train_encoded, y_train_encoded)
+with stage("search", model="xgb_grid", rows=len(X_train_encoded)):
+    xgb_grid.fit(X_train_cv, y_train)
+if TUNING_MODE == "budget":
+    print(xgb_grid.report_)
 
 # Predictions on test set
-y_pred_xgb_tuned = xgb_grid.best_estimator_.predict(X_test_encoded)
+with stage("predict", model="xgb_grid.best_estimator_", rows=len(X_test_encoded)):
+    y_pred_xgb_tuned = xgb_grid.best_estimator_.predict(X_test_encoded)
 
 # Evaluatng the model
-xgb_accuracy = accuracy_score(y_test_encoded, y_pred_xgb_tuned)
-xgb_conf_matrix = confusion_matrix(y_test_encoded, y_pred_xgb_tuned)
-xgb_class_report = classification_report(y_test_encoded, y_pred_xgb_tuned)
+xgb_accuracy = accuracy_score(y_test, y_pred_xgb_tuned)
+xgb_conf_matrix = confusion_matrix(y_test, y_pred_xgb_tuned)
+xgb_class_report = classification_report(y_test, y_pred_xgb_tuned)
 
 # Display results
 print(f"XGBoost Tuned Accuracy: {xgb_accuracy:.4f}")
@@ -594,80 +604,218 @@ print("\nConfusion Matrix:\n", xgb_conf_matrix)
 
 """### Boosting - AdaBoost Model"""
 
-adaboost = AdaBoostClassifier(n_estimators=100, random_state=42)
-adaboost.fit(X_train_encoded, y_train)
-y_pred_ada = adaboost.predict(X_test_encoded)
+adaboost = zoo["AdaBoost"]
+with stage("predict", model="adaboost", rows=len(X_test_encoded)):
+    y_pred_ada = adaboost.predict(X_test_encoded)
 
 print("AdaBoost Accuracy:", accuracy_score(y_test, y_pred_ada))
 print("Classification Report:\n", classification_report(y_test, y_pred_ada))
 plot_confusion_matrix(y_test, y_pred_ada, "AdaBoost Confusion Matrix")
+plt.show()
 
 """### Boosting - Gradient Boosting Model"""
 
-gb = GradientBoostingClassifier(n_estimators=100, random_state=42)
-gb.fit(X_train_encoded, y_train)
-y_pred_gb = gb.predict(X_test_encoded)
+gb = zoo["Gradient Boosting"]
+with stage("predict", model="gb", rows=len(X_test_encoded)):
+    y_pred_gb = gb.predict(X_test_encoded)
 
 print("Gradient Boosting Accuracy:", accuracy_score(y_test, y_pred_gb))
 print("Classification Report:\n", classification_report(y_test, y_pred_gb))
 plot_confusion_matrix(y_test, y_pred_gb, "Gradient Boosting Confusion Matrix")
+plt.show()
 
-"""#  Comparing All Models used until now in the above"""
+"""### Stacking - Logistic Regression over the ensembles"""
 
-def evaluate_model(model, X_train, X_test, y_train, y_test):
-    y_train_pred = model.predict(X_train)
-    y_test_pred = model.predict(X_test)
+from easyvisa.stacking import CachedStackingClassifier
 
-    # Print unique values
-    print(f"Unique values in y_test_pred: {set(y_test_pred)}")
+# Out-of-fold probabilities of each base model are cached in .easyvisa_oof, keyed by
+# model parameters and training data, so rerunning this cell (or adding a learner)
+# only fits the folds that are missing. The fitted models above are reused as is;
+# it is fitted after the zoo because it stacks the tuned XGBoost.
+stacking = CachedStackingClassifier(
+    [("rf", rf), ("adaboost", adaboost), ("gb", gb), ("xgb", xgb_grid.best_estimator_)], cv=cv_folds
+)
+with stage("fit", model="stacking", rows=len(X_train_encoded)):
+    stacking.fit(X_train_encoded, y_train)
+print(f"OOF cache: {stacking.cache_hits_} hits, {stacking.cache_misses_} misses")
+y_pred_stack = stacking.predict(X_test_encoded)
+
+print("Stacking Accuracy:", accuracy_score(y_test, y_pred_stack))
+print("Classification Report:\n", classification_report(y_test, y_pred_stack))
+plot_confusion_matrix(y_test, y_pred_stack, "Stacking Confusion Matrix")
+plt.show()
 
-    # Check if predictions are strings or numbers
-    if isinstance(list(y_test_pred)[0], str):
-        label_map = {"Certified": 1, "Denied": 0}
-    else:
-        label_map = {1: 1, 0: 0}
+"""#  Comparing All Models used until now in the above"""
 
-    # Convert predictions to numeric labels
-    y_train_pred_encoded = pd.Series(y_train_pred).map(label_map).fillna(999)
-    y_test_pred_encoded = pd.Series(y_test_pred).map(label_map).fillna(999)
+# The concurrently trained zoo, with XGBoost replaced by its tuned version
+models = {**zoo, "XGBoost": xgb_grid.best_estimator_, "Stacking": stacking}
 
-    # Check for invalid values
-    if 999 in y_train_pred_encoded.values or 999 in y_test_pred_encoded.values:
-        raise ValueError(f"Model {model} produced unexpected labels!")
+# Save the fitted models for batch scoring, e.g.
+#   python -m easyvisa.score applications.csv scores.parquet --model visa_models.joblib \
+#       --model-name XGBoost --preprocessor visa_preprocessor.joblib
+# or for online scoring of single applications, micro-batched behind a local HTTP endpoint:
+#   python -m easyvisa.server serve --model visa_models.joblib --model-name XGBoost \
+#       --preprocessor visa_preprocessor.joblib --port 8080
+import joblib
+joblib.dump(models, "visa_models.joblib")
 
-    return {
-        "Train Accuracy": accuracy_score(y_train, y_train_pred_encoded),
-        "Test Accuracy": accuracy_score(y_test, y_test_pred_encoded),
-        "Precision": precision_score(y_test, y_test_pred_encoded),
-        "Recall": recall_score(y_test, y_test_pred_encoded),
-        "F1 Score": f1_score(y_test, y_test_pred_encoded),
-    }
+# Flattened copies of the tree models for low-latency single-application scoring;
+# check_parity raises if their probabilities drift from the originals
+from easyvisa.inference import check_parity, flatten_model
 
-# Evaluate all models
-results = {name: evaluate_model(model, X_train_encoded, X_test_encoded, y_train_encoded, y_test_encoded)
-           for name, model in models.items()}
+flat_models = {name: flatten_model(model) for name, model in models.items() if name not in ("AdaBoost", "Stacking")}
+for name, flat in flat_models.items():
+    print(name, check_parity(models[name], flat, X_test_encoded))
 
-# Evaluate all models
-results = {name: evaluate_model(model, X_train_encoded, X_test_encoded, y_train_encoded, y_test_encoded)
-           for name, model in models.items()}
+# Evaluate all models: one predict_proba per model and split, every metric
+# (including ROC-AUC / PR-AUC) derived from those cached arrays
+from easyvisa.evaluation import Evaluator
 
-# Convert results into a DataFrame
-comparison_df = pd.DataFrame.from_dict(results, orient="index")
+evaluator = Evaluator({"Train": (X_train_encoded, y_train), "Test": (X_test_encoded, y_test)})
+comparison_df = evaluator.compare(models)
+print(comparison_df.round(4))
 
 # Plot comparison of accuracy, precision, recall, and F1-score
-plt.figure(figsize=(12, 6))
-comparison_df.plot(kind="bar", figsize=(12, 6), colormap="coolwarm")
+from easyvisa.report import plot_model_comparison
 
-plt.title("Model Performance Comparison")
-plt.ylabel("Score")
-plt.xlabel("Model")
-plt.xticks(rotation=45)
-plt.legend(loc="lower right")
-plt.grid(axis="y", linestyle="--", alpha=0.7)
-
-# Show the plot
+plot_model_comparison(comparison_df)
 plt.show()
 
+"""# Decision Threshold Tuning
+
+Every model above labels an application Certified when its probability passes 0.5.
+Wrongly denying a qualified applicant (a false "Denied") is treated here as twice as
+costly as a wrong approval. Each model's cut-off is tuned on out-of-fold probabilities
+of the training split (shared with the stacking cache), so the test set stays untouched.
+"""
+
+from easyvisa.stacking import cached_oof_proba
+from easyvisa.thresholds import ThresholdedClassifier, optimize_threshold
+
+tuned_models = {}
+for name, model in models.items():
+    if name == "Stacking":
+        continue
+    oof_proba = cached_oof_proba(model, X_train_encoded, y_train, cv=cv_folds, name=name)
+    result = optimize_threshold(y_train, oof_proba, fn_cost=2.0, fp_cost=1.0)
+    print(f"{name}: {result}")
+    tuned_models[name] = ThresholdedClassifier(model, result.threshold)
+
+# Same cached probabilities, tuned cut-offs
+tuned_df = evaluator.compare(tuned_models)
+print(tuned_df.round(4))
+
+# The thresholds are saved with the models, so batch scoring (easyvisa.score) and the
+# flattened XGBoost apply them without recomputation
+joblib.dump({**models, **tuned_models}, "visa_models.joblib")
+flatten_model(tuned_models["XGBoost"]).save("visa_xgboost_flat.npz")
+
+"""# Key Factors
+
+Per-application attributions: each feature's push toward (positive) or away from
+(negative) Certified, summing with the bias to the model's score. XGBoost uses its
+native TreeSHAP (log-odds); the Random Forest is attributed along each row's tree paths
+(probability). Batch scoring adds the same columns with `--explain K`.
+"""
+
+from easyvisa.explain import TreeExplainer, global_importance, top_factors
+from easyvisa.report import plot_importance
+
+for name in ["XGBoost", "Random Forest"]:
+    explainer = TreeExplainer(tuned_models[name])
+    contributions = explainer.explain(X_test_encoded)
+    importance = global_importance(contributions)
+    print(f"{name} ({explainer.units}): mean |attribution| per feature")
+    print(importance.round(4))
+    print(top_factors(contributions, k=3).head())
+    plot_importance(importance, f"Key Factors: {name}", units=explainer.units)
+    plt.show()
+
+# Resubmitted applications encode to the same feature vector; a prediction cache in
+# front of the model scores each distinct vector once (batch scoring: --cache-size N)
+from easyvisa.cache import PredictionCache
+
+xgb_cache = PredictionCache(tuned_models["XGBoost"])
+xgb_cache.predict(X_test_encoded)
+xgb_cache.predict(X_test_encoded.sample(frac=1.0, random_state=1))
+print(xgb_cache.stats())
+
+"""# Incremental Updates
+
+New applications arrive monthly. Instead of retraining on the full history, XGBoost keeps
+boosting from its current booster on the new batch and the Random Forest adds warm-start
+trees fitted on it (dropping its oldest trees beyond `max_trees`). The validation gate
+compares each update against a full retrain on the test split; run it periodically and
+ship the update only while it stays within tolerance.
+"""
+
+from sklearn.base import clone
+from easyvisa.incremental import validation_gate
+
+# Simulated refresh: the last 10% of the training rows arrive as the new batch
+n_new = len(train_rows) // 10
+history_rows, new_rows = train_rows[:-n_new], train_rows[-n_new:]
+X_history = store.features(history_rows, preprocessor)
+X_new = store.features(new_rows, preprocessor)
+y_history, y_new = store.y(history_rows), store.y(new_rows)
+
+xgb_history = clone(xgb_grid.best_estimator_).fit(X_history, y_history)
+xgb_updated, xgb_retrained, xgb_gate = validation_gate(
+    xgb_history, X_history, y_history, X_new, y_new, X_test_encoded, y_test, n_rounds=50
+)
+print("XGBoost", xgb_gate)
+
+rf_history = clone(rf).fit(X_history, y_history)
+rf_updated, rf_retrained, rf_gate = validation_gate(
+    rf_history, X_history, y_history, X_new, y_new, X_test_encoded, y_test, n_new_trees=20, max_trees=100
+)
+print("Random Forest", rf_gate)
+
+# In production the preprocessor is refreshed the same way before encoding a batch:
+#   preprocessor.partial_fit(new_batch)  # new categories get new codes, caps merge via KLL sketches
+
+"""# Drift Monitoring
+
+The distribution checks above run once, offline. In production the training mix is kept
+as a fixed-size baseline profile (category counts, quantile-binned histograms and KLL
+sketches of every feature and of the tuned XGBoost's scores). Each scoring window is
+profiled the same way and compared with it from the summaries alone: PSI per column
+(below 0.1 stable, above 0.25 a major shift) and a KS distance for numeric columns.
+"""
+
+from easyvisa.drift import DriftMonitor, DriftProfile
+from easyvisa.score import certified_proba
+
+drift_baseline = DriftProfile.fit(store.frame(train_rows), certified_proba(tuned_models["XGBoost"], X_train_encoded))
+drift_baseline.save("visa_drift_baseline.json")
+
+# The test split stands in for a month of incoming applications; batch scoring does the
+# same with --drift-baseline visa_drift_baseline.json
+drift_monitor = DriftMonitor(drift_baseline)
+drift_monitor.update(store.frame(test_rows), certified_proba(tuned_models["XGBoost"], X_test_encoded))
+print(drift_monitor.report().round(4))
+
+"""# Forest Compression
+
+The Random Forest pickles to tens of megabytes and walks 100 full-depth trees per
+application. Its trees are re-ranked on a held-out fold by how much each lowers the
+log-loss, thresholds are snapped to values the features actually take, and the result is
+stored in a compact format. The report trades accuracy/F1 against size and latency.
+"""
+
+from easyvisa.compress import compression_report, save_compact
+
+X_fold_train, y_fold_train, X_val, y_val = cv_folds.fold(0)
+rf_fold = clone(rf).fit(pd.DataFrame(X_fold_train, columns=X_train_encoded.columns), y_fold_train)
+compression, compressed_forests = compression_report(rf_fold, X_train_encoded, X_val, y_val, X_test_encoded, y_test)
+print(compression.round(4))
+save_compact(compressed_forests["compressed_50"], "visa_rf_compact.npz")
+
+# Per-stage wall/CPU time and memory of this run
+if profiler.enabled:
+    profiler.save("visa_profile.json")
+    print(profiler.summary())
+
 """##Observations from the Model Performance Comparison Graph
 - Overfitting in Decision Trees:
 The Decision Tree model has a very high training accuracy (~100%) but significantly lower test accuracy, indicating overfitting.
@@ -0,0 +1,46 @@
+"""EasyVisa: visa approval prediction for the Office of Foreign Labor Certification.
+
+Importing the package loads nothing but this module. The names below are
+resolved from their submodules on first access, so ``import easyvisa`` stays
+cheap for scoring workers and command-line tools, and plotting or model
+libraries load only when something that needs them is used.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "load_visa_data": "easyvisa.ingest",
+    "iter_visa_chunks": "easyvisa.ingest",
+    "VisaPreprocessor": "easyvisa.preprocess",
+    "FeatureStore": "easyvisa.store",
+    "CVFolds": "easyvisa.cv",
+    "train_models": "easyvisa.train",
+    "default_model_specs": "easyvisa.train",
+    "Evaluator": "easyvisa.evaluation",
+    "optimize_threshold": "easyvisa.thresholds",
+    "ThresholdedClassifier": "easyvisa.thresholds",
+    "load_model": "easyvisa.score",
+    "score_frame": "easyvisa.score",
+    "score_file": "easyvisa.score",
+    "flatten_model": "easyvisa.inference",
+    "FlatTreeEnsemble": "easyvisa.inference",
+    "PredictionCache": "easyvisa.cache",
+    "TreeExplainer": "easyvisa.explain",
+    "CertificationStats": "easyvisa.eda",
+    "EDASummary": "easyvisa.edareport",
+    "render_eda_report": "easyvisa.edareport",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
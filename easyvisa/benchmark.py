@@ -0,0 +1,243 @@
+"""Reproducible cost benchmark for every model in the comparison.
+
+Usage::
+
+    python -m easyvisa.benchmark EasyVisa.csv --sizes 25000 100000 1000000 \\
+        --out bench.json
+    python -m easyvisa.benchmark visa_spec.json --sizes 1000000 10000000
+
+For every (model, dataset size) pair a fresh process builds the dataset
+(rows resampled with a fixed seed when the size exceeds the source file, or
+generated by ``easyvisa.synth`` when the source is a synthetic spec), fits
+the model and records:
+
+- ``fit_seconds``
+- ``throughput_rows_per_s`` of ``predict_proba`` at each batch size
+- ``latency_p50_us`` / ``latency_p99_us`` of single-row ``predict_proba``
+- ``flat_latency_p50_us`` / ``flat_latency_p99_us`` through ``easyvisa.inference`` where supported
+- ``peak_rss_mb`` (and ``data_rss_mb``, the peak before fitting)
+- ``model_bytes``, the pickled model size
+
+Running each pair in its own process keeps peak RSS attributable to one
+model. Results go to a JSON file so runs can be diffed between releases.
+
+``import_times`` records the cold-start cost of the package: for each entry
+point, the median time to import it in a fresh interpreter and which heavy
+libraries (plotting, sklearn, XGBoost) that import pulled in. Run it alone
+with ``python -m easyvisa.benchmark --imports-only``.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from easyvisa.profiling import _rss_peak_mb
+
+DEFAULT_SIZES = [25_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_BATCH_SIZES = [1, 100, 10_000]
+MAX_THROUGHPUT_ROWS = 200_000
+THROUGHPUT_BATCHES = 50
+LATENCY_REPEATS = 200
+IMPORT_TARGETS = ["easyvisa", "easyvisa.score", "easyvisa.inference", "easyvisa.cache", "easyvisa.report"]
+IMPORT_REPEATS = 5
+HEAVY_MODULES = ["matplotlib", "seaborn", "graphviz", "pydotplus", "IPython", "sklearn", "xgboost"]
+
+
+def benchmark_specs(random_state=42):
+    """The notebook's models plus a stacking ensemble over the tree ensembles."""
+    from sklearn.ensemble import StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    from easyvisa.train import default_model_specs
+
+    specs = default_model_specs(random_state)
+    base = [(name.lower().replace(" ", "_"), estimator) for name, estimator in specs
+            if name in ("Random Forest", "AdaBoost", "Gradient Boosting", "XGBoost")]
+    specs.append(("Stacking", StackingClassifier(base, final_estimator=LogisticRegression(), cv=5)))
+    return specs
+
+
+def load_sized_frame(path, size, seed=0):
+    """``size`` rows of the source data, resampled with replacement when it is too small.
+
+    ``path`` may also be a spec written by ``easyvisa.synth``, in which case
+    the rows are synthetic.
+    """
+    from easyvisa.ingest import load_visa_data
+
+    if path.endswith(".json"):
+        from easyvisa.synth import SyntheticVisaGenerator
+
+        return SyntheticVisaGenerator.load(path).generate(size, seed=seed)
+    data = load_visa_data(path)
+    if size == len(data):
+        return data
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(data), size=size, replace=size > len(data))
+    return data.iloc[rows].reset_index(drop=True)
+
+
+def _percentiles_us(seconds):
+    p50, p99 = np.percentile(np.asarray(seconds) * 1e6, [50, 99])
+    return float(p50), float(p99)
+
+
+def run_case(path, name, estimator, size, batch_sizes, seed=0):
+    """Benchmark one model at one dataset size; meant to run in a fresh process."""
+    from easyvisa.preprocess import VisaPreprocessor, encode_target
+
+    data = load_sized_frame(path, size, seed)
+    preprocessor = VisaPreprocessor().fit(data)
+    X = preprocessor.transform(data)
+    y = encode_target(data["case_status"])
+    del data
+    data_rss_mb = _rss_peak_mb()
+
+    start = time.perf_counter()
+    estimator.fit(X, y)
+    result = {
+        "model": name,
+        "rows": size,
+        "fit_seconds": time.perf_counter() - start,
+        "throughput_rows_per_s": {},
+    }
+
+    X_eval = X.iloc[:MAX_THROUGHPUT_ROWS]
+    for batch_size in batch_sizes:
+        n_rows = min(len(X_eval), batch_size * THROUGHPUT_BATCHES)
+        start = time.perf_counter()
+        for offset in range(0, n_rows, batch_size):
+            estimator.predict_proba(X_eval.iloc[offset:offset + batch_size])
+        result["throughput_rows_per_s"][str(batch_size)] = n_rows / (time.perf_counter() - start)
+
+    row = X_eval.iloc[:1]
+    latencies = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        estimator.predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+    result["latency_p50_us"], result["latency_p99_us"] = _percentiles_us(latencies)
+
+    try:
+        from easyvisa.inference import flatten_model
+
+        flat = flatten_model(estimator)
+    except TypeError:
+        flat = None
+    if flat is not None:
+        x = row.to_numpy(dtype=np.float32)[0]
+        latencies = []
+        for _ in range(LATENCY_REPEATS):
+            start = time.perf_counter()
+            flat.predict_one(x)
+            latencies.append(time.perf_counter() - start)
+        result["flat_latency_p50_us"], result["flat_latency_p99_us"] = _percentiles_us(latencies)
+
+    result["model_bytes"] = len(pickle.dumps(estimator))
+    result["data_rss_mb"] = data_rss_mb
+    result["peak_rss_mb"] = _rss_peak_mb()
+    return result
+
+
+def environment():
+    import pandas
+    import sklearn
+
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    try:
+        import xgboost
+
+        info["xgboost"] = xgboost.__version__
+    except ImportError:
+        pass
+    return info
+
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def import_times(modules=IMPORT_TARGETS, repeats=IMPORT_REPEATS):
+    """Median cold import time of each module, each run in a fresh interpreter."""
+    results = []
+    for module in modules:
+        runs = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                 check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(out.splitlines()[-1]))
+        results.append({
+            "module": module,
+            "import_seconds": float(np.median([run["seconds"] for run in runs])),
+            "heavy_modules": runs[-1]["loaded"],
+        })
+    return results
+
+
+def run_benchmark(path, sizes=DEFAULT_SIZES, batch_sizes=DEFAULT_BATCH_SIZES, models=None, seed=0, verbose=True):
+    """Run every (model, size) pair and return the JSON-ready report."""
+    imports = import_times()
+    if verbose:
+        for entry in imports:
+            print(f"import {entry['module']:>20}: {entry['import_seconds'] * 1000:.0f}ms "
+                  f"{entry['heavy_modules'] or ''}")
+    if path is None:
+        return {"environment": environment(), "imports": imports, "results": []}
+    specs = benchmark_specs()
+    if models:
+        specs = [(name, estimator) for name, estimator in specs if name in models]
+    results = []
+    for size in sizes:
+        for name, estimator in specs:
+            # One short-lived process per case so ru_maxrss is this case's peak
+            with ProcessPoolExecutor(1, max_tasks_per_child=1) as pool:
+                result = pool.submit(run_case, path, name, estimator, size, batch_sizes, seed).result()
+            results.append(result)
+            if verbose:
+                print(f"{name:>22} {size:>10,} rows: fit {result['fit_seconds']:.2f}s, "
+                      f"p50 {result['latency_p50_us']:.0f}us, peak {result['peak_rss_mb']:.0f}MB")
+    return {"environment": environment(), "imports": imports, "seed": seed, "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fit time, latency and memory of every model.")
+    parser.add_argument("data", nargs="?", help="EasyVisa CSV to sample rows from, or a synthetic spec (.json)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--models", nargs="+", help="subset of model names to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--imports-only", action="store_true", help="only measure package import times")
+    args = parser.parse_args(argv)
+    if args.data is None and not args.imports_only:
+        parser.error("the data argument is required unless --imports-only is given")
+
+    report = run_benchmark(None if args.imports_only else args.data, args.sizes, args.batch_sizes, args.models, args.seed)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(report['results'])} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Prediction cache in front of model inference.
+
+Most features are low-cardinality codes (continent, education, region, unit
+of wage and the three Y/N flags), and the capped numeric columns repeat for
+resubmitted or near-duplicate applications. Many incoming rows therefore
+share an identical preprocessed feature vector. ``PredictionCache`` keys the
+Certified probability on the bytes of that ``float32`` vector, so repeated
+rows skip the ensemble entirely:
+
+- duplicates inside a batch are evaluated once (``np.unique`` over the row
+  bytes),
+- rows seen in earlier batches are answered from a bounded LRU,
+- only the remaining unique rows reach the model, in one batched call.
+
+The cache remembers the version of the model it was filled by;
+``set_model`` with a different model (or version string) empties it.
+"""
+
+import collections
+import hashlib
+import pickle
+
+import numpy as np
+
+from easyvisa.inference import certified_labels
+from easyvisa.profiling import stage
+from easyvisa.score import certified_proba, decision_threshold
+
+DEFAULT_MAXSIZE = 100_000
+
+
+def model_version(model):
+    """Content hash of a fitted model (its pickled state)."""
+    digest = hashlib.blake2b(digest_size=10)
+    digest.update(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, "iloc") else X[index]
+
+
+class PredictionCache:
+    """Bounded LRU of Certified probabilities keyed on the preprocessed row.
+
+    Wraps ``model`` with the same ``predict_proba`` / ``predict`` interface,
+    so it can stand in for the model in ``score.score_frame``. ``version``
+    defaults to ``model_version(model)``.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, model, maxsize=DEFAULT_MAXSIZE, version=None):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self.model = None
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.set_model(model, version)
+
+    def set_model(self, model, version=None):
+        """Switch to ``model``; cached scores are dropped if its version differs."""
+        version = model_version(model) if version is None else version
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+        self.model = model
+        return self
+
+    @property
+    def threshold(self):
+        return decision_threshold(self.model)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "version": self.version,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def predict_certified_proba(self, X):
+        """Certified probability of every row; only unseen distinct rows reach the model.
+
+        ``hits`` counts rows answered without the model (from the LRU or a
+        duplicate earlier in the batch), ``misses`` the rows it scored.
+        """
+        if np.ndim(X) == 1:
+            X = np.asarray(X)[None, :]
+        matrix = np.ascontiguousarray(X, dtype=np.float32)
+        keys = matrix.view(np.dtype((np.void, matrix.dtype.itemsize * matrix.shape[1]))).ravel()
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        values = np.empty(len(unique), dtype=np.float64)
+        missing = []
+        entries = self._entries
+        for i, key in enumerate(unique):
+            value = entries.get(key.tobytes())
+            if value is None:
+                missing.append(i)
+            else:
+                entries.move_to_end(key.tobytes())
+                values[i] = value
+
+        with stage("cache.predict", rows=len(keys), distinct=len(unique), evaluated=len(missing)):
+            if missing:
+                missing = np.asarray(missing)
+                values[missing] = certified_proba(self.model, _rows(X, first[missing]))
+                for i in missing:
+                    entries[unique[i].tobytes()] = values[i]
+                while len(entries) > self.maxsize:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return values[inverse.ravel()]
+
+    def predict_one(self, x):
+        """Certified probability for a single preprocessed row (e.g. ``transform_record`` output)."""
+        return float(self.predict_certified_proba(np.asarray(x, dtype=np.float32))[0])
+
+    def predict_proba(self, X):
+        proba = self.predict_certified_proba(X)
+        return np.column_stack([1.0 - proba, proba])
+
+    def predict(self, X, threshold=None):
+        """1 for Certified, 0 for Denied, cut at the model's saved threshold unless given."""
+        threshold = self.threshold if threshold is None else threshold
+        return certified_labels(self.predict_certified_proba(X), threshold)
@@ -0,0 +1,334 @@
+"""Compression of flattened tree ensembles.
+
+An unlimited-depth ``RandomForestClassifier`` pickles to tens of megabytes and
+walks every tree on each call. ``compress`` shrinks a ``FlatTreeEnsemble``
+(see ``easyvisa.inference``) in three steps:
+
+1. Tree selection. ``greedy_tree_order`` ranks the trees by greedy forward
+   selection on a validation fold: at each step it adds the tree that lowers
+   the log-loss of the averaged ensemble most. Keeping the first ``n`` trees
+   of that order gives the best ``n``-tree sub-forest found. Boosted
+   ensembles are additive, so for them the order is simply the boosting
+   order and selection truncates rounds.
+2. Threshold quantization. Each split threshold is snapped down to the
+   largest value its feature takes in reference data (the training matrix),
+   from a per-feature codebook of at most ``max_levels`` values. Encoded
+   categoricals and flags take a handful of values, so on reference rows
+   the snapped splits route exactly as before. Splits that then send every
+   reference value the same way are removed, and so are splits whose two
+   leaves end up equal.
+3. Compact storage. ``save_compact`` writes the result with ``uint8``
+   features, per-feature threshold tables indexed by small integer codes,
+   tree-local child indices and ``float32`` leaf values.
+
+``compression_report`` sweeps tree counts and reports accuracy/F1 deltas
+against size and latency, so an operating point can be picked.
+"""
+
+import io
+import json
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.evaluation import binary_metrics
+from easyvisa.inference import _Builder, _tree_depth
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import stage
+
+DEFAULT_MAX_LEVELS = 256
+DEFAULT_TREE_COUNTS = (None, 50, 25, 10)
+LATENCY_REPEATS = 200
+_PROBA_EPSILON = 1e-6
+
+
+def tree_predictions(ensemble, X):
+    """Leaf value of every row in every tree, shape ``(n_rows, n_trees)``."""
+    return ensemble.value[ensemble.apply(X)]
+
+
+def _log_loss(y, proba):
+    proba = np.clip(proba, _PROBA_EPSILON, 1 - _PROBA_EPSILON)
+    return -np.mean(y[:, None] * np.log(proba) + (1 - y[:, None]) * np.log(1 - proba), axis=0)
+
+
+def greedy_tree_order(ensemble, X_val, y_val, max_trees=None):
+    """Trees ordered by greedy forward selection on ``(X_val, y_val)``.
+
+    Returns ``(order, losses)``, where ``losses[i]`` is the validation
+    log-loss of the first ``i + 1`` trees of ``order``.
+    """
+    y = encode_target(y_val).astype(np.float64)
+    leaf_values = tree_predictions(ensemble, X_val)
+    n_trees = ensemble.n_trees
+    max_trees = n_trees if max_trees is None else min(max_trees, n_trees)
+
+    if ensemble.aggregation != "mean":
+        # Boosted trees correct their predecessors; only a prefix is meaningful
+        margins = ensemble.base_score + np.cumsum(leaf_values[:, :max_trees], axis=1)
+        return np.arange(max_trees), _log_loss(y, 1.0 / (1.0 + np.exp(-margins)))
+
+    with stage("compress.select", trees=n_trees, rows=len(y)):
+        order, losses = [], []
+        remaining = np.ones(n_trees, dtype=bool)
+        total = np.zeros(len(y))
+        for step in range(max_trees):
+            candidates = np.flatnonzero(remaining)
+            loss = _log_loss(y, (total[:, None] + leaf_values[:, candidates]) / (step + 1))
+            best = candidates[np.argmin(loss)]
+            order.append(best)
+            losses.append(float(loss.min()))
+            remaining[best] = False
+            total += leaf_values[:, best]
+    return np.asarray(order), np.asarray(losses)
+
+
+def threshold_codebook(X_reference, max_levels=DEFAULT_MAX_LEVELS):
+    """Per-feature sorted values a split threshold may take.
+
+    All distinct values of a feature when there are at most ``max_levels``,
+    otherwise ``max_levels`` of its quantiles (actual data values).
+    """
+    X = np.asarray(X_reference, dtype=np.float32)
+    codebook = []
+    for column in X.T:
+        values = np.unique(column[~np.isnan(column)])
+        if len(values) > max_levels:
+            values = np.unique(np.quantile(column, np.linspace(0, 1, max_levels), method="inverted_cdf"))
+        codebook.append(values.astype(np.float64))
+    return codebook
+
+
+def _tree_slices(ensemble):
+    ends = np.r_[ensemble.roots[1:], ensemble.n_nodes]
+    return [slice(start, end) for start, end in zip(ensemble.roots, ends)]
+
+
+def _compact_tree(ensemble, root, codebook):
+    """Rebuild the tree at ``root`` with snapped thresholds, dropping splits that no longer split.
+
+    Returns tree-local ``(feature, threshold, left, right, value)`` arrays
+    in sklearn's layout (``-1`` children for leaves).
+    """
+    feature, threshold, left, right, value = (ensemble.feature, ensemble.threshold, ensemble.left,
+                                              ensemble.right, ensemble.value)
+    nodes = []  # [feature, threshold, left, right, value] per kept node, in preorder
+
+    def visit(node):
+        if left[node] == node:  # leaves point to themselves
+            nodes.append([0, np.inf, -1, -1, value[node]])
+            return len(nodes) - 1
+        f, t = feature[node], threshold[node]
+        if codebook is not None:
+            levels = codebook[f]
+            position = np.searchsorted(levels, t, side="right")
+            if position == 0:  # every reference value goes right
+                return visit(right[node])
+            if position == len(levels):  # every reference value goes left
+                return visit(left[node])
+            t = levels[position - 1]
+        new = len(nodes)
+        nodes.append([f, t, -1, -1, value[node]])
+        low, high = visit(left[node]), visit(right[node])
+        if nodes[low][2] < 0 and nodes[high][2] < 0 and nodes[low][4] == nodes[high][4]:
+            # Two leaves that agree: the split is redundant, the node becomes their leaf
+            leaf_value = nodes[low][4]
+            del nodes[new + 1:]
+            nodes[new] = [0, np.inf, -1, -1, leaf_value]
+        else:
+            nodes[new][2], nodes[new][3] = low, high
+        return new
+
+    visit(root)
+    feature, threshold, left, right, value = (np.asarray(column) for column in zip(*nodes))
+    return (feature.astype(np.int64), threshold.astype(np.float64), left.astype(np.int64),
+            right.astype(np.int64), value.astype(np.float64))
+
+
+def compress(ensemble, trees=None, codebook=None):
+    """A ``FlatTreeEnsemble`` of the ``trees`` (indices; all by default) with snapped thresholds.
+
+    ``codebook`` comes from ``threshold_codebook``; without one the
+    thresholds are kept and only the tree subset is taken.
+    """
+    trees = range(ensemble.n_trees) if trees is None else trees
+    builder = _Builder()
+    with stage("compress.rebuild", trees=len(trees), quantized=codebook is not None):
+        for tree in trees:
+            feature, threshold, left, right, value = _compact_tree(ensemble, ensemble.roots[tree], codebook)
+            builder.add(feature, threshold, left, right, value, _tree_depth(left, right))
+    compressed = builder.build(ensemble.aggregation, ensemble.base_score, ensemble.feature_names)
+    compressed.decision_threshold = ensemble.decision_threshold
+    return compressed
+
+
+def _float32_floor(values):
+    """Largest float32 at or below each value, so ``x <= t`` is unchanged for float32 ``x``."""
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _smallest_int(max_value, dtypes=(np.int8, np.int16, np.int32, np.int64)):
+    for dtype in dtypes:
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"{max_value} does not fit in {dtypes[-1].__name__}")
+
+
+_UNSIGNED = (np.uint8, np.uint16, np.uint32)
+
+
+def to_compact(ensemble):
+    """The compact arrays of ``ensemble`` (see ``save_compact``)."""
+    slices = _tree_slices(ensemble)
+    is_leaf = ensemble.left == np.arange(ensemble.n_nodes)
+    threshold = np.where(is_leaf, np.nan, _float32_floor(ensemble.threshold).astype(np.float64))
+
+    n_features = int(ensemble.feature.max()) + 1 if ensemble.n_nodes else 0
+    tables, codes = [], np.zeros(ensemble.n_nodes, dtype=np.int64)
+    for f in range(n_features):
+        mask = (ensemble.feature == f) & ~is_leaf
+        table = np.unique(threshold[mask])
+        codes[mask] = np.searchsorted(table, threshold[mask])
+        tables.append(table.astype(np.float32))
+
+    starts = np.repeat(ensemble.roots, [s.stop - s.start for s in slices])
+    left = np.where(is_leaf, -1, ensemble.left - starts)
+    right = np.where(is_leaf, -1, ensemble.right - starts)
+    child_dtype = _smallest_int(max(int(left.max(initial=0)), int(right.max(initial=0))))
+    return {
+        "feature": ensemble.feature.astype(_smallest_int(max(n_features - 1, 0), _UNSIGNED)),
+        "threshold_code": codes.astype(_smallest_int(int(codes.max(initial=0)), _UNSIGNED)),
+        "thresholds": np.concatenate(tables) if tables else np.empty(0, dtype=np.float32),
+        "table_sizes": np.asarray([len(table) for table in tables], dtype=np.int32),
+        "left": left.astype(child_dtype),
+        "right": right.astype(child_dtype),
+        "value": ensemble.value.astype(np.float32),
+        "tree_sizes": np.asarray([s.stop - s.start for s in slices], dtype=np.int32),
+        "meta": np.array(json.dumps({
+            "aggregation": ensemble.aggregation,
+            "base_score": ensemble.base_score,
+            "feature_names": ensemble.feature_names,
+            "decision_threshold": ensemble.decision_threshold,
+        })),
+    }
+
+
+def from_compact(arrays):
+    """Rebuild a ``FlatTreeEnsemble`` from ``to_compact`` arrays."""
+    meta = json.loads(str(arrays["meta"]))
+    offsets = np.r_[0, np.cumsum(arrays["table_sizes"])]
+    feature = arrays["feature"].astype(np.int64)
+    tables = arrays["thresholds"].astype(np.float64)
+    # Leaves carry code 0 of feature 0, which may not exist; the builder ignores their threshold
+    if len(tables):
+        threshold = tables[np.minimum(offsets[feature] + arrays["threshold_code"], len(tables) - 1)]
+    else:
+        threshold = np.full(len(feature), np.inf)
+    left = arrays["left"].astype(np.int64)
+    right = arrays["right"].astype(np.int64)
+    value = arrays["value"].astype(np.float64)
+
+    builder = _Builder()
+    start = 0
+    for size in arrays["tree_sizes"]:
+        end = start + int(size)
+        tree_left, tree_right = left[start:end], right[start:end]
+        builder.add(feature[start:end], threshold[start:end], tree_left, tree_right, value[start:end],
+                    _tree_depth(tree_left, tree_right))
+        start = end
+    ensemble = builder.build(meta["aggregation"], meta["base_score"], meta["feature_names"])
+    ensemble.decision_threshold = float(meta["decision_threshold"])
+    return ensemble
+
+
+def save_compact(ensemble, path):
+    """Write ``ensemble`` in the compact format (compressed ``.npz``)."""
+    np.savez_compressed(path, **to_compact(ensemble))
+    return path
+
+
+def load_compact(path):
+    with np.load(path) as arrays:
+        return from_compact(arrays)
+
+
+def compact_nbytes(ensemble):
+    """Size in bytes of ``ensemble`` in the compact format."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **to_compact(ensemble))
+    return buffer.tell()
+
+
+def _latency_p50_us(predict_one, X):
+    rows = np.asarray(X, dtype=np.float32)[:LATENCY_REPEATS]
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        predict_one(row)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies) * 1e6)
+
+
+def _evaluate(name, n_trees, n_nodes, nbytes, proba, y_eval, threshold, latency_us, batch_seconds):
+    metrics = binary_metrics(y_eval, proba, threshold)
+    return {"model": name, "trees": n_trees, "nodes": n_nodes, "bytes": nbytes,
+            "accuracy": metrics["accuracy"], "f1": metrics["f1"], "roc_auc": metrics["roc_auc"],
+            "latency_p50_us": latency_us, "batch_rows_per_s": len(y_eval) / batch_seconds}
+
+
+def compression_report(model, X_reference, X_val, y_val, X_eval, y_eval, tree_counts=DEFAULT_TREE_COUNTS,
+                       max_levels=DEFAULT_MAX_LEVELS):
+    """Compress ``model`` at several tree counts and measure each operating point.
+
+    Trees are selected on ``(X_val, y_val)``, thresholds snapped to the
+    values of ``X_reference`` and every point is scored on
+    ``(X_eval, y_eval)``. ``tree_counts`` entries of ``None`` keep every
+    tree. Returns ``(report, ensembles)``: a DataFrame with one row per
+    operating point, including the original model and its plain flattened
+    copy, with accuracy/F1 deltas and size/latency ratios against the
+    original; and the compressed ensembles keyed by the report's ``model``
+    column.
+    """
+    from easyvisa.inference import flatten_model
+    from easyvisa.score import certified_proba, decision_threshold
+
+    threshold = decision_threshold(model)
+    y_eval = encode_target(y_eval)
+    X_eval_matrix = np.asarray(X_eval, dtype=np.float32)
+
+    rows = []
+    start = time.perf_counter()
+    proba = certified_proba(model, X_eval)
+    batch_seconds = time.perf_counter() - start
+    single = pd.DataFrame(X_eval_matrix[:1], columns=getattr(X_eval, "columns", None))
+    latency = _latency_p50_us(lambda row: model.predict_proba(single), X_eval_matrix)
+    rows.append(_evaluate("original", getattr(model, "n_estimators", np.nan), np.nan, len(pickle.dumps(model)),
+                          proba, y_eval, threshold, latency, batch_seconds))
+
+    flat = flatten_model(model)
+    order, _ = greedy_tree_order(flat, X_val, y_val)
+    codebook = threshold_codebook(X_reference, max_levels)
+    ensembles = {"flat": flat}
+    for n_trees in tree_counts:
+        trees = order if n_trees is None else order[:n_trees]
+        ensembles[f"compressed_{len(trees)}"] = compress(flat, np.sort(trees), codebook)
+
+    for name, ensemble in ensembles.items():
+        start = time.perf_counter()
+        proba = ensemble.predict_certified_proba(X_eval_matrix)
+        batch_seconds = time.perf_counter() - start
+        rows.append(_evaluate(name, ensemble.n_trees, ensemble.n_nodes, compact_nbytes(ensemble), proba, y_eval,
+                              threshold, _latency_p50_us(ensemble.predict_one, X_eval_matrix), batch_seconds))
+
+    report = pd.DataFrame(rows).set_index("model")
+    original = report.loc["original"]
+    report["accuracy_delta"] = report["accuracy"] - original["accuracy"]
+    report["f1_delta"] = report["f1"] - original["f1"]
+    report["size_ratio"] = report["bytes"] / original["bytes"]
+    report["speedup"] = original["latency_p50_us"] / report["latency_p50_us"]
+    return report, ensembles
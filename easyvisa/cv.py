@@ -0,0 +1,109 @@
+"""Fixed cross-validation folds with cached per-fold data.
+
+The notebook's searches each draw their own splits over the same training
+matrix (``cv=5`` for the decision tree, ``cv=3`` for the forest and
+XGBoost), and every candidate fit converts the DataFrame again. ``CVFolds``
+fixes the stratified fold indices once and holds the training matrix once,
+as a contiguous ``float32`` array (the dtype sklearn's trees convert to
+anyway). It also builds per fold, on first use:
+
+- contiguous train/validation slices,
+- XGBoost ``QuantileDMatrix`` pairs, so the quantile bins of a fold are
+  sketched once and shared by every candidate with the same ``max_bin``.
+
+A ``CVFolds`` is a valid ``cv=`` argument for any sklearn search, so every
+model family is scored on the same folds. The folds equal those of
+``make_folds`` with the same arguments, which ``easyvisa.stacking`` uses too.
+"""
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.inference import certified_labels
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import stage
+
+
+def make_folds(y, cv=5, random_state=42):
+    """Stratified ``(train, validation)`` positions; ``cv`` may already be such a list."""
+    if isinstance(cv, CVFolds):
+        return cv.folds
+    if not isinstance(cv, int):
+        return [(np.asarray(train), np.asarray(val)) for train, val in cv]
+    from sklearn.model_selection import StratifiedKFold
+
+    splitter = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
+    return list(splitter.split(np.zeros((len(y), 1)), y))
+
+
+class CVFolds:
+    """Stratified folds over one training matrix, fixed once and shared by every search."""
+
+    def __init__(self, X, y, n_splits=5, random_state=42, folds=None):
+        self.columns = list(X.columns) if hasattr(X, "columns") else None
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = encode_target(y)
+        self.random_state = random_state
+        self.folds = make_folds(self.y, n_splits if folds is None else folds, random_state)
+        self._arrays = {}
+        self._dmatrices = {}
+
+    @property
+    def n_splits(self):
+        return len(self.folds)
+
+    # sklearn cross-validator protocol, so ``cv=folds`` works in any search
+    def split(self, X=None, y=None, groups=None):
+        yield from self.folds
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return self.n_splits
+
+    def frame(self):
+        """The cached matrix as a DataFrame (no copy), for estimators that want column names."""
+        return pd.DataFrame(self.X, columns=self.columns, copy=False)
+
+    def fold(self, i):
+        """``(X_train, y_train, X_val, y_val)`` of fold ``i`` as contiguous arrays, built once."""
+        if i not in self._arrays:
+            train, val = self.folds[i]
+            self._arrays[i] = (self.X[train], self.y[train], self.X[val], self.y[val])
+        return self._arrays[i]
+
+    def dmatrices(self, i, max_bin=256):
+        """XGBoost ``(train, validation)`` matrices of fold ``i``, binned once per ``max_bin``.
+
+        The validation matrix reuses the training matrix's quantile cuts, as
+        ``XGBClassifier.fit`` does with an ``eval_set``.
+        """
+        key = (i, max_bin)
+        if key not in self._dmatrices:
+            import xgboost as xgb
+
+            X_train, y_train, X_val, y_val = self.fold(i)
+            with stage("cv.dmatrix", fold=i, max_bin=max_bin, rows=len(X_train)):
+                train = xgb.QuantileDMatrix(X_train, y_train, max_bin=max_bin, feature_names=self.columns)
+                val = xgb.QuantileDMatrix(X_val, y_val, ref=train, max_bin=max_bin, feature_names=self.columns)
+            self._dmatrices[key] = (train, val)
+        return self._dmatrices[key]
+
+    def cross_val_xgb(self, params, num_boost_round=100, early_stopping_rounds=None, max_bin=256):
+        """Boost ``params`` on every fold's cached matrices.
+
+        Returns the mean validation accuracy and, per fold, the number of
+        rounds kept (the best iteration + 1 with early stopping).
+        """
+        import xgboost as xgb
+
+        params = {"objective": "binary:logistic", "tree_method": "hist", "max_bin": max_bin,
+                  "seed": self.random_state, **params}
+        scores, rounds = [], []
+        for i in range(self.n_splits):
+            train, val = self.dmatrices(i, max_bin)
+            booster = xgb.train(params, train, num_boost_round, evals=[(val, "validation")],
+                                early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+            n_rounds = booster.best_iteration + 1 if early_stopping_rounds else num_boost_round
+            proba = booster.predict(val, iteration_range=(0, n_rounds))
+            scores.append(float(np.mean(certified_labels(proba) == self.fold(i)[3])))
+            rounds.append(n_rounds)
+        return float(np.mean(scores)), rounds
@@ -0,0 +1,227 @@
+"""Fixed-memory drift monitoring of the scoring stream against a training baseline.
+
+``DriftProfile`` summarizes a stream of applications, and optionally the
+model's Certified probabilities, in mergeable pieces whose size does not
+grow with the stream:
+
+- categorical and Y/N columns: one count vector per column, with a last slot
+  for unknown or missing values,
+- numeric columns and the score: a histogram over bin edges fixed by the
+  baseline's quantiles, plus a ``KLLSketch``.
+
+A baseline profile is fitted once on the training rows and saved as JSON.
+Scoring windows are profiled with ``baseline.empty_like()``, so they share
+its bins. ``compare`` then yields the population stability index (PSI) of
+every column and a KS distance for the numeric ones, in O(bins) from the
+summaries alone. Partial profiles from different workers or days combine
+with ``merge``.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.eda import feature_codes, feature_levels
+from easyvisa.ingest import CATEGORIES, FLAG_COLUMNS, NUMERIC_DTYPES
+from easyvisa.profiling import stage
+from easyvisa.sketch import DEFAULT_K, KLLSketch
+
+DEFAULT_CATEGORICAL = [col for col in CATEGORIES if col != "case_status"] + FLAG_COLUMNS
+DEFAULT_NUMERIC = list(NUMERIC_DTYPES)
+DEFAULT_BINS = 10
+SCORE = "certified_proba"
+
+# Conventional PSI cut-offs: below 0.1 stable, 0.1-0.25 moderate shift, above major shift
+PSI_THRESHOLDS = (0.1, 0.25)
+PSI_EPSILON = 1e-4
+# Points of the baseline distribution (its percentiles) where the KS distance is evaluated
+KS_GRID = np.linspace(0.01, 0.99, 99)
+
+
+def quantile_edges(values, n_bins=DEFAULT_BINS):
+    """Interior bin edges at the quantiles of ``values``, ties merged."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """Population stability index between two count vectors over the same bins."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return float("nan")
+    p = np.maximum(expected / expected.sum(), epsilon)
+    q = np.maximum(actual / actual.sum(), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def sketch_ks(expected, actual, grid=KS_GRID):
+    """KS distance between two ``KLLSketch`` CDFs at the ``grid`` quantiles of ``expected``."""
+    if expected.n == 0 or actual.n == 0:
+        return float("nan")
+    points = expected.quantile(grid)
+    return float(np.max(np.abs(expected.cdf(points) - actual.cdf(points))))
+
+
+def psi_status(value, thresholds=PSI_THRESHOLDS):
+    if np.isnan(value):
+        return "no data"
+    if value < thresholds[0]:
+        return "stable"
+    return "moderate" if value < thresholds[1] else "major"
+
+
+class DriftProfile:
+    """Mergeable count vectors, histograms and quantile sketches of a stream of applications.
+
+    ``edges`` maps every numeric column (and ``"certified_proba"`` to track
+    scores) to its interior bin edges; ``fit`` derives them from baseline
+    data.
+    """
+
+    def __init__(self, edges, categorical=DEFAULT_CATEGORICAL, k=DEFAULT_K):
+        self.edges = {col: np.asarray(col_edges, dtype=np.float64) for col, col_edges in edges.items()}
+        self.categorical = list(categorical)
+        self.k = k
+        self.levels = {col: feature_levels(col) for col in self.categorical}
+        self.n_rows = 0
+        self.counts = {col: np.zeros(len(self.levels[col]) + 1, dtype=np.int64) for col in self.categorical}
+        # Bins below, between and above the edges, then a last slot for NaN
+        self.histograms = {col: np.zeros(len(col_edges) + 2, dtype=np.int64) for col, col_edges in self.edges.items()}
+        self.sketches = {col: KLLSketch(k) for col in self.edges}
+
+    @classmethod
+    def fit(cls, frame, proba=None, n_bins=DEFAULT_BINS, categorical=DEFAULT_CATEGORICAL,
+            numeric=DEFAULT_NUMERIC, k=DEFAULT_K):
+        """Baseline profile of ``frame`` (and the scores ``proba``) with quantile bins."""
+        edges = {col: quantile_edges(frame[col].to_numpy(dtype=np.float64), n_bins) for col in numeric}
+        if proba is not None:
+            edges[SCORE] = quantile_edges(proba, n_bins)
+        return cls(edges, categorical, k).update(frame, proba)
+
+    def empty_like(self):
+        """An empty profile with the same columns and bins, for a new window of the stream."""
+        return type(self)(self.edges, self.categorical, self.k)
+
+    def update(self, frame, proba=None):
+        """Add raw applications ``frame`` and, if tracked, their Certified probabilities."""
+        with stage("drift.update", rows=len(frame)):
+            for col in self.categorical:
+                n_levels = len(self.levels[col])
+                codes = feature_codes(frame, col)
+                codes[codes < 0] = n_levels
+                self.counts[col] += np.bincount(codes, minlength=n_levels + 1)
+            for col, edges in self.edges.items():
+                if col == SCORE:
+                    if proba is None:
+                        continue
+                    values = np.asarray(proba, dtype=np.float64)
+                else:
+                    values = frame[col].to_numpy(dtype=np.float64)
+                bins = np.searchsorted(edges, values, side="right")
+                bins[np.isnan(values)] = len(edges) + 1
+                self.histograms[col] += np.bincount(bins, minlength=len(edges) + 2)
+                self.sketches[col].update(values)
+            self.n_rows += len(frame)
+        return self
+
+    def _check_compatible(self, other):
+        if (other.categorical != self.categorical or other.edges.keys() != self.edges.keys()
+                or any(not np.array_equal(other.edges[col], edges) for col, edges in self.edges.items())):
+            raise ValueError("Drift profiles must share columns and bin edges; build them with empty_like()")
+
+    def merge(self, other):
+        """Fold another profile with the same bins into this one."""
+        self._check_compatible(other)
+        for col in self.categorical:
+            self.counts[col] += other.counts[col]
+        for col in self.edges:
+            self.histograms[col] += other.histograms[col]
+            self.sketches[col].merge(other.sketches[col])
+        self.n_rows += other.n_rows
+        return self
+
+    def compare(self, current, thresholds=PSI_THRESHOLDS):
+        """Drift of ``current`` from this (baseline) profile, one row per column, largest PSI first.
+
+        ``unknown_share`` is the share of ``current`` rows with an unseen
+        category or a missing value.
+        """
+        self._check_compatible(current)
+        rows = []
+        for col in self.categorical:
+            expected, actual = self.counts[col], current.counts[col]
+            rows.append({"feature": col, "kind": "categorical", "psi": psi(expected, actual), "ks": np.nan,
+                         "unknown_share": actual[-1] / max(actual.sum(), 1),
+                         "n_baseline": int(expected.sum()), "n_current": int(actual.sum())})
+        for col in self.edges:
+            expected, actual = self.histograms[col], current.histograms[col]
+            rows.append({"feature": col, "kind": "score" if col == SCORE else "numeric",
+                         "psi": psi(expected, actual), "ks": sketch_ks(self.sketches[col], current.sketches[col]),
+                         "unknown_share": actual[-1] / max(actual.sum(), 1),
+                         "n_baseline": int(expected.sum()), "n_current": int(actual.sum())})
+        report = pd.DataFrame(rows).set_index("feature")
+        report["status"] = [psi_status(value, thresholds) for value in report["psi"]]
+        return report.sort_values("psi", ascending=False)
+
+    def to_dict(self):
+        return {
+            "k": self.k,
+            "categorical": self.categorical,
+            "edges": {col: edges.tolist() for col, edges in self.edges.items()},
+            "n_rows": self.n_rows,
+            "counts": {col: counts.tolist() for col, counts in self.counts.items()},
+            "histograms": {col: counts.tolist() for col, counts in self.histograms.items()},
+            "sketches": {col: sketch.to_dict() for col, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        profile = cls(state["edges"], state["categorical"], state["k"])
+        profile.n_rows = state["n_rows"]
+        for col, counts in state["counts"].items():
+            profile.counts[col] = np.asarray(counts, dtype=np.int64)
+        for col, counts in state["histograms"].items():
+            profile.histograms[col] = np.asarray(counts, dtype=np.int64)
+        for col, sketch in state["sketches"].items():
+            profile.sketches[col] = KLLSketch.from_dict(sketch)
+        return profile
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class DriftMonitor:
+    """Profiles the scoring stream in windows and compares each window with a baseline."""
+
+    def __init__(self, baseline, thresholds=PSI_THRESHOLDS):
+        self.baseline = baseline
+        self.thresholds = thresholds
+        self.current = baseline.empty_like()
+
+    def update(self, frame, proba=None):
+        self.current.update(frame, proba)
+        return self
+
+    def report(self):
+        return self.baseline.compare(self.current, self.thresholds)
+
+    def drifted(self):
+        """Columns whose PSI reached the major-shift threshold in the current window."""
+        report = self.report()
+        return list(report.index[report["psi"] >= self.thresholds[1]])
+
+    def rotate(self):
+        """Report on the current window and start a new one; returns ``(report, window_profile)``."""
+        report, window = self.report(), self.current
+        self.current = self.baseline.empty_like()
+        return report, window
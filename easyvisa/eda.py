@@ -0,0 +1,183 @@
+"""Single-pass certification-rate aggregation for EDA and dashboards.
+
+The notebook computes each breakdown with its own ``groupby`` over the full
+frame. ``CertificationStats`` turns every column into integer codes once per
+batch and accumulates Certified/Denied counts for each feature, and for
+selected feature pairs, with ``np.bincount``. Counts are plain integer
+arrays, so a new monthly batch is folded in with ``update`` and partial
+results from different workers combine with ``merge``.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.ingest import CATEGORIES, FLAG_COLUMNS, flag_codes
+from easyvisa.profiling import stage
+
+DEFAULT_FEATURES = [
+    "education_of_employee",
+    "continent",
+    "has_job_experience",
+    "requires_job_training",
+    "full_time_position",
+    "unit_of_wage",
+    "region_of_employment",
+    "company_size",
+]
+
+DEFAULT_PAIRS = [
+    ("has_job_experience", "requires_job_training"),
+    ("education_of_employee", "unit_of_wage"),
+    ("continent", "education_of_employee"),
+]
+
+# Numeric columns are bucketed into fixed bins so batches stay mergeable
+COMPANY_SIZE_BINS = [-np.inf, 50, 100, 500, 1_000, 5_000, 10_000, 50_000, np.inf]
+NUMERIC_FEATURES = {"company_size": ("no_of_employees", COMPANY_SIZE_BINS)}
+
+STATUS = ["Certified", "Denied"]
+
+
+def _bin_labels(edges):
+    labels = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        if np.isinf(low):
+            labels.append(f"< {high:,.0f}")
+        elif np.isinf(high):
+            labels.append(f">= {low:,.0f}")
+        else:
+            labels.append(f"{low:,.0f}-{high:,.0f}")
+    return labels
+
+
+def feature_levels(feature):
+    if feature in CATEGORIES:
+        return list(CATEGORIES[feature])
+    if feature in FLAG_COLUMNS:
+        return ["N", "Y"]
+    if feature in NUMERIC_FEATURES:
+        return _bin_labels(NUMERIC_FEATURES[feature][1])
+    raise KeyError(f"Unknown EDA feature {feature!r}")
+
+
+def feature_codes(frame, feature):
+    """Integer codes of ``feature`` for every row; -1 marks missing or unknown values."""
+    if feature in NUMERIC_FEATURES:
+        column, edges = NUMERIC_FEATURES[feature]
+        codes = np.searchsorted(edges, frame[column].to_numpy(), side="right").astype(np.int64) - 1
+        codes[codes >= len(edges) - 1] = -1  # NaN sorts past the last edge
+        return codes
+    values = frame[feature]
+    if feature in FLAG_COLUMNS:
+        return flag_codes(values).astype(np.int64)
+    dtype = pd.CategoricalDtype(CATEGORIES[feature])
+    if values.dtype != dtype:
+        values = values.astype(dtype)
+    return values.cat.codes.to_numpy().astype(np.int64)
+
+
+class CertificationStats:
+    """Mergeable Certified/Denied counts per feature and per feature pair."""
+
+    def __init__(self, features=DEFAULT_FEATURES, pairs=DEFAULT_PAIRS):
+        self.features = list(features)
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.levels = {feature: feature_levels(feature) for feature in self._all_features()}
+        self.n_rows = 0
+        self.feature_counts = {feature: np.zeros((len(self.levels[feature]), 2), dtype=np.int64)
+                               for feature in self.features}
+        self.pair_counts = {pair: np.zeros((len(self.levels[pair[0]]), len(self.levels[pair[1]]), 2), dtype=np.int64)
+                            for pair in self.pairs}
+
+    def _all_features(self):
+        return list(dict.fromkeys(self.features + [feature for pair in self.pairs for feature in pair]))
+
+    def update(self, frame):
+        """Add the rows of ``frame`` (which must include ``case_status``)."""
+        with stage("eda.update", rows=len(frame)):
+            return self._update(frame)
+
+    def _update(self, frame):
+        status = feature_codes(frame, "case_status")
+        codes = {feature: feature_codes(frame, feature) for feature in self._all_features()}
+
+        for feature in self.features:
+            n = len(self.levels[feature])
+            valid = (codes[feature] >= 0) & (status >= 0)
+            flat = codes[feature][valid] * 2 + status[valid]
+            self.feature_counts[feature] += np.bincount(flat, minlength=n * 2).reshape(n, 2)
+
+        for first, second in self.pairs:
+            n1, n2 = len(self.levels[first]), len(self.levels[second])
+            valid = (codes[first] >= 0) & (codes[second] >= 0) & (status >= 0)
+            flat = (codes[first][valid] * n2 + codes[second][valid]) * 2 + status[valid]
+            self.pair_counts[(first, second)] += np.bincount(flat, minlength=n1 * n2 * 2).reshape(n1, n2, 2)
+
+        self.n_rows += len(frame)
+        return self
+
+    def merge(self, other):
+        """Fold the counts of another ``CertificationStats`` into this one."""
+        if other.features != self.features or other.pairs != self.pairs:
+            raise ValueError("Cannot merge CertificationStats with different features or pairs")
+        for feature in self.features:
+            self.feature_counts[feature] += other.feature_counts[feature]
+        for pair in self.pairs:
+            self.pair_counts[pair] += other.pair_counts[pair]
+        self.n_rows += other.n_rows
+        return self
+
+    def counts(self, feature):
+        """Certified/Denied counts per level of ``feature``."""
+        return pd.DataFrame(self.feature_counts[feature], index=pd.Index(self.levels[feature], name=feature),
+                            columns=pd.Index(STATUS, name="case_status"))
+
+    def rates(self, feature):
+        """Percentage of each status per level, like ``value_counts(normalize=True).unstack() * 100``."""
+        counts = self.counts(feature)
+        counts = counts[counts.sum(axis=1) > 0]
+        return counts.div(counts.sum(axis=1), axis=0) * 100
+
+    def pair_rates(self, first, second):
+        """Certification rate (%) for every combination of two features."""
+        counts = self.pair_counts[(first, second)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = counts[..., 0] / counts.sum(axis=-1) * 100
+        return pd.DataFrame(rate, index=pd.Index(self.levels[first], name=first),
+                            columns=pd.Index(self.levels[second], name=second))
+
+    def status_rates(self):
+        """Overall percentage of each status."""
+        totals = next(iter(self.feature_counts.values())).sum(axis=0)
+        return pd.Series(totals / totals.sum() * 100, index=STATUS, name="case_status")
+
+    def to_dict(self):
+        return {
+            "features": self.features,
+            "pairs": [list(pair) for pair in self.pairs],
+            "n_rows": self.n_rows,
+            "feature_counts": {feature: counts.tolist() for feature, counts in self.feature_counts.items()},
+            "pair_counts": {"|".join(pair): counts.tolist() for pair, counts in self.pair_counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        stats = cls(state["features"], state["pairs"])
+        stats.n_rows = state["n_rows"]
+        for feature, counts in state["feature_counts"].items():
+            stats.feature_counts[feature] = np.asarray(counts, dtype=np.int64)
+        for key, counts in state["pair_counts"].items():
+            stats.pair_counts[tuple(key.split("|"))] = np.asarray(counts, dtype=np.int64)
+        return stats
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
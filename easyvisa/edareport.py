@@ -0,0 +1,426 @@
+"""Headless, parallel EDA report rendered from fixed-size summaries.
+
+The notebook draws its EDA figures one after another with ``plt.show()``.
+Its boxplots, histogram and KDE go over every row, and nothing is saved.
+This module renders the same figures off-screen, in worker processes, into
+PNG or SVG files and one self-contained HTML page.
+
+The data is read once into an ``EDASummary``, whose size does not depend on
+the number of rows:
+
+- ``CertificationStats`` counts for the bar and rate charts,
+- a ``KLLSketch`` of each numeric column per education level and case
+  status; box statistics come from the sketches' quartiles and exact
+  min/max and are drawn with ``Axes.bxp``,
+- a uniform bottom-k sample of rows (each row gets a random key and the
+  ``sample_size`` smallest keys are kept), used for the histogram, the KDE
+  and the outlier points of the boxes,
+- streaming means and co-moments of the numeric columns for the
+  correlation matrix.
+
+Rendering therefore takes the same time for a thousand rows or a hundred
+million. Summaries of chunks or partitions combine with ``merge``; partial
+summaries built apart should come from ``EDASummary.spawn`` so their
+sketches and sample keys draw independent random numbers. The CLI builds
+the summary of a large CSV chunk by chunk::
+
+    python -m easyvisa.edareport EasyVisa.csv --out visa_eda.html --format svg
+"""
+
+import argparse
+import base64
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.eda import STATUS, CertificationStats, feature_codes, feature_levels
+from easyvisa.ingest import COLUMNS, DEFAULT_CHUNKSIZE, FLAG_COLUMNS, NUMERIC_DTYPES, iter_visa_chunks
+from easyvisa.profiling import stage
+from easyvisa.sketch import DEFAULT_K, KLLSketch, normalized_rank_error
+
+DEFAULT_SAMPLE_SIZE = 20_000
+BOX_COLUMNS = ["prevailing_wage", "no_of_employees"]
+GROUP = "education_of_employee"
+# Matplotlib's default whisker reach, in IQRs beyond the quartiles
+WHISKER = 1.5
+CORRELATION_COLUMNS = [col for col in COLUMNS if col in FLAG_COLUMNS or col in NUMERIC_DTYPES] + ["case_status"]
+FORMATS = ("png", "svg")
+
+
+def box_stats(sketch, sample=None, label=None, hue=None, whis=WHISKER):
+    """``Axes.bxp`` statistics of a ``KLLSketch``; outliers are the points of ``sample`` beyond the whiskers.
+
+    Whiskers end at the fences ``q1 - whis * IQR`` and ``q3 + whis * IQR``,
+    or at the exact min/max when those lie inside them.
+    """
+    q1, med, q3 = sketch.quantile([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    whislo, whishi = max(sketch.min, q1 - whis * iqr), min(sketch.max, q3 + whis * iqr)
+    fliers = np.empty(0) if sample is None else sample[(sample < whislo) | (sample > whishi)]
+    stats = {"label": label, "med": med, "q1": q1, "q3": q3, "whislo": whislo, "whishi": whishi, "fliers": fliers}
+    if hue is not None:
+        stats["hue"] = hue
+    return stats
+
+
+def _with_nan(codes):
+    return np.where(codes >= 0, codes, np.nan)
+
+
+class EDASummary:
+    """Mergeable, fixed-size summary of the applications behind every EDA figure.
+
+    ``seed`` (an int, ``None`` or a ``np.random.SeedSequence``) is split into
+    one independent stream per sketch and one for the sample keys.
+    """
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE, k=DEFAULT_K, seed=None):
+        self.sample_size = sample_size
+        self.k = k
+        self.stats = CertificationStats()
+        self.groups = feature_levels(GROUP)
+        self._seeds = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        # One sketch per (column, education level, case status)
+        keys = [(col, group, status)
+                for col in BOX_COLUMNS for group in range(len(self.groups)) for status in range(len(STATUS))]
+        *sketch_seeds, sample_seed = self._seeds.spawn(len(keys) + 1)
+        self.sketches = {key: KLLSketch(k, seed) for key, seed in zip(keys, sketch_seeds)}
+        self._rng = np.random.default_rng(sample_seed)
+        self.sample_keys = np.empty(0)
+        self.sample = {col: np.empty(0) for col in BOX_COLUMNS + [GROUP, "case_status"]}
+        self.n_complete = 0
+        self.means = np.zeros(len(CORRELATION_COLUMNS))
+        self.comoments = np.zeros((len(CORRELATION_COLUMNS), len(CORRELATION_COLUMNS)))
+
+    @property
+    def n_rows(self):
+        return self.stats.n_rows
+
+    def spawn(self, n):
+        """``n`` empty summaries with the same settings and independent seeds, to fill apart and ``merge``."""
+        return [EDASummary(self.sample_size, self.k, seed) for seed in self._seeds.spawn(n)]
+
+    def update(self, frame):
+        """Add the rows of ``frame`` (raw applications, including ``case_status``)."""
+        with stage("eda_summary.update", rows=len(frame)):
+            self.stats.update(frame)
+            status = feature_codes(frame, "case_status")
+            group = feature_codes(frame, GROUP)
+            values = {col: frame[col].to_numpy(dtype=np.float64) for col in BOX_COLUMNS}
+
+            # Sort once by (group, status) and feed each sketch its contiguous slice
+            valid = np.flatnonzero((group >= 0) & (status >= 0))
+            cell = group[valid] * len(STATUS) + status[valid]
+            order = valid[np.argsort(cell, kind="stable")]
+            bounds = np.cumsum(np.bincount(cell, minlength=len(self.groups) * len(STATUS)))
+            for col in BOX_COLUMNS:
+                for index, (start, stop) in enumerate(zip(np.r_[0, bounds[:-1]], bounds)):
+                    if stop > start:
+                        self.sketches[(col, *divmod(index, len(STATUS)))].update(values[col][order[start:stop]])
+
+            keys = self._rng.random(len(frame))
+            if len(self.sample_keys) >= self.sample_size:
+                # Rows keyed above the current sample can never enter it
+                candidates = np.flatnonzero(keys < self.sample_keys.max())
+            else:
+                candidates = np.arange(len(frame))
+            columns = dict(values, **{GROUP: group, "case_status": status})
+            self._add_sample(keys[candidates], {col: columns[col][candidates] for col in self.sample})
+
+            self._add_moments(*self._moments(frame, status))
+        return self
+
+    def _add_sample(self, keys, columns):
+        keys = np.concatenate([self.sample_keys, keys])
+        columns = {col: np.concatenate([self.sample[col], values]) for col, values in columns.items()}
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size - 1)[: self.sample_size]
+            keys, columns = keys[keep], {col: values[keep] for col, values in columns.items()}
+        self.sample_keys, self.sample = keys, columns
+
+    @staticmethod
+    def _moments(frame, status):
+        matrix = np.column_stack([
+            np.where(status >= 0, 1 - status, np.nan) if col == "case_status"  # 1 = Certified
+            else _with_nan(feature_codes(frame, col)) if col in FLAG_COLUMNS
+            else frame[col].to_numpy(dtype=np.float64)
+            for col in CORRELATION_COLUMNS
+        ]).astype(np.float64)
+        matrix = matrix[~np.isnan(matrix).any(axis=1)]
+        if not len(matrix):
+            return 0, np.zeros(matrix.shape[1]), np.zeros((matrix.shape[1],) * 2)
+        means = matrix.mean(axis=0)
+        centered = matrix - means
+        return len(matrix), means, centered.T @ centered
+
+    def _add_moments(self, n, means, comoments):
+        # Chan et al.'s pairwise update keeps the co-moments exact without large raw sums
+        if n == 0:
+            return
+        total = self.n_complete + n
+        delta = means - self.means
+        self.comoments += comoments + np.outer(delta, delta) * self.n_complete * n / total
+        self.means += delta * n / total
+        self.n_complete = total
+
+    def merge(self, other):
+        """Fold another summary into this one."""
+        if other.sample_size != self.sample_size:
+            raise ValueError("Cannot merge EDA summaries with different sample sizes")
+        self.stats.merge(other.stats)
+        for key, sketch in self.sketches.items():
+            sketch.merge(other.sketches[key])
+        self._add_sample(other.sample_keys, other.sample)
+        self._add_moments(other.n_complete, other.means, other.comoments)
+        return self
+
+    def sketch(self, column, group=None, status=None):
+        """Sketch of ``column`` over one education level and/or case status (codes), merged over the rest."""
+        merged = KLLSketch(self.k, self._seeds.spawn(1)[0])
+        for (col, g, s), sketch in self.sketches.items():
+            if col == column and group in (None, g) and status in (None, s):
+                merged.merge(sketch)
+        return merged
+
+    def sample_values(self, column, group=None, status=None):
+        mask = np.ones(len(self.sample_keys), dtype=bool)
+        if group is not None:
+            mask &= self.sample[GROUP] == group
+        if status is not None:
+            mask &= self.sample["case_status"] == status
+        values = self.sample[column][mask]
+        return values[~np.isnan(values)]
+
+    def box_stats(self, column, by=()):
+        """One box per combination of ``by`` (``"education_of_employee"`` and/or ``"case_status"``)."""
+        groups = range(len(self.groups)) if GROUP in by else [None]
+        statuses = range(len(STATUS)) if "case_status" in by else [None]
+        boxes = []
+        for group in groups:
+            for status in statuses:
+                sketch = self.sketch(column, group, status)
+                if sketch.n == 0:
+                    continue
+                label = self.groups[group] if group is not None else STATUS[status] if status is not None else column
+                hue = STATUS[status] if group is not None and status is not None else None
+                boxes.append(box_stats(sketch, self.sample_values(column, group, status), label, hue))
+        return boxes
+
+    def correlation(self):
+        """Pearson correlations of flags (0/1), numeric columns and Certified (1) as a DataFrame."""
+        scale = np.sqrt(np.diag(self.comoments))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = self.comoments / np.outer(scale, scale)
+        return pd.DataFrame(correlation, index=CORRELATION_COLUMNS, columns=CORRELATION_COLUMNS)
+
+    @classmethod
+    def from_csv(cls, path, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+        summary = cls(**kwargs)
+        for chunk in iter_visa_chunks(path, chunksize):
+            summary.update(chunk)
+        return summary
+
+
+def _rate_figure(stats, feature, title, xlabel, colormap, rotation, figsize):
+    return (f"rates_{feature}", title, figsize,
+            [("plot_rates", {"rates": stats.rates(feature), "title": title, "xlabel": xlabel,
+                             "colormap": colormap, "rotation": rotation})])
+
+
+def _count_figure(stats, feature, title, xlabel, colormap):
+    return (f"counts_{feature}", title, (6, 4),
+            [("plot_bars", {"counts": stats.counts(feature), "title": title, "xlabel": xlabel,
+                            "colormap": colormap})])
+
+
+def figure_specs(summary):
+    """``(name, title, figsize, panels)`` of every EDA figure; panels are ``(report function, kwargs)``.
+
+    The kwargs hold only aggregates and the bounded sample, so specs are
+    cheap to send to worker processes.
+    """
+    stats = summary.stats
+    education = stats.counts(GROUP)
+    status_counts, education_counts = education.sum(axis=0), education.sum(axis=1).sort_values()
+    wage_95 = summary.sketch("prevailing_wage").quantile(0.95)
+    return [
+        ("status_counts", "Distribution of Visa Case Status", (6, 4),
+         [("plot_bars", {"counts": status_counts, "title": "Distribution of Visa Case Status",
+                         "xlabel": "Case Status", "colormap": "coolwarm"})]),
+        ("education_counts", "Distribution of Education Levels", (10, 4),
+         [("plot_bars", {"counts": education_counts, "title": "Distribution of Education Levels",
+                         "xlabel": "Education Level", "horizontal": True})]),
+        _rate_figure(stats, GROUP, "Visa Certification Rate by Education Level", "Education Level",
+                     "coolwarm", 45, (10, 5)),
+        _rate_figure(stats, "continent", "Visa Certification Rate by Continent", "Continent", "viridis", 45, (10, 5)),
+        _rate_figure(stats, "has_job_experience", "Visa Certification Rate by Job Experience", "Has Job Experience",
+                     "coolwarm", 0, (6, 4)),
+        _rate_figure(stats, "unit_of_wage", "Visa Certification Rate by Pay Unit", "Pay Unit", "viridis", 0, (8, 4)),
+        _rate_figure(stats, "region_of_employment", "Visa Approval Rates by U.S. Region", "Region of Employment",
+                     "viridis", 45, (12, 6)),
+        _rate_figure(stats, "company_size", "Visa Certification Rate by Company Size", "Employees",
+                     "coolwarm", 45, (10, 5)),
+        ("wage_by_status", "Prevailing Wage vs Visa Status", (8, 5),
+         [("plot_boxes", {"stats": summary.box_stats("prevailing_wage", ("case_status",)),
+                          "title": "Prevailing Wage vs Visa Status", "xlabel": "Case Status",
+                          "ylabel": "Prevailing Wage", "ylim": (0, wage_95)})]),
+        ("wage_by_status_log", "Prevailing Wage Distribution by Visa Status", (10, 5),
+         [("plot_boxes", {"stats": summary.box_stats("prevailing_wage", ("case_status",)),
+                          "title": "Prevailing Wage Distribution by Visa Status", "xlabel": "Visa Status",
+                          "ylabel": "Prevailing Wage (Log Scale)", "log": True, "colormap": "Set2"})]),
+        _count_figure(stats, "requires_job_training", "Impact of Job Training Requirement on Visa Status",
+                      "Requires Job Training (Y/N)", "Set1"),
+        ("rates_experience_training", "Work Experience, Training & Visa Approval", (6, 4),
+         [("plot_bars", {"counts": stats.pair_rates("has_job_experience", "requires_job_training"),
+                         "title": "Work Experience, Training & Visa Approval", "xlabel": "Has Job Experience (Y/N)",
+                         "ylabel": "Certification Rate (%)", "colormap": "coolwarm"})]),
+        ("wage_by_education", "Salary & Education Influence on Visa Approval", (10, 5),
+         [("plot_boxes", {"stats": summary.box_stats("prevailing_wage", (GROUP, "case_status")),
+                          "title": "Salary & Education Influence on Visa Approval", "xlabel": "Education Level",
+                          "ylabel": "Prevailing Wage (Log Scale)", "log": True, "showfliers": False})]),
+        _count_figure(stats, "full_time_position", "Impact of Full-Time vs. Part-Time Work on Visa Approval",
+                      "Full-Time Position (Y/N)", "viridis"),
+        ("company_size_box", "Boxplot of Company Size (No. of Employees)", (8, 5),
+         [("plot_boxes", {"stats": summary.box_stats("no_of_employees"), "vert": False, "colormap": "Greens",
+                          "title": "Boxplot of Company Size (No. of Employees)", "ylabel": "Number of Employees"})]),
+        ("correlation", "Correlation Matrix of Features", (10, 6),
+         [("plot_correlation", {"correlation": summary.correlation()})]),
+        ("wage_distribution", "Distribution of Prevailing Wage", (8, 5),
+         [("plot_distribution", {"sample": summary.sample_values("prevailing_wage"),
+                                 "total": summary.sketch("prevailing_wage").n,
+                                 "title": "Distribution of Prevailing Wage", "xlabel": "Prevailing Wage"})]),
+        ("outliers", "Outlier Detection", (12, 5),
+         [("plot_boxes", {"stats": summary.box_stats("prevailing_wage"), "title": "Boxplot of Prevailing Wage"}),
+          ("plot_boxes", {"stats": summary.box_stats("no_of_employees"), "colormap": "viridis",
+                          "title": "Boxplot of Number of Employees"})]),
+    ]
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import seaborn as sns
+
+    sns.set_theme(style="whitegrid")
+
+
+def render_figure(spec, out_dir, fmt="png", dpi=100):
+    """Draw one spec off-screen into ``out_dir``; returns ``(path, seconds)``."""
+    from matplotlib.figure import Figure
+
+    from easyvisa import report
+
+    start = time.perf_counter()
+    name, _, figsize, panels = spec
+    figure = Figure(figsize=figsize)
+    axes = figure.subplots(1, len(panels), squeeze=False)[0]
+    for ax, (plot, kwargs) in zip(axes, panels):
+        getattr(report, plot)(ax=ax, **kwargs)
+    figure.tight_layout()
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    figure.savefig(path, format=fmt, dpi=dpi)
+    return path, time.perf_counter() - start
+
+
+def render_figures(specs, out_dir, fmt="png", n_jobs=None, dpi=100):
+    """Render every spec in worker processes; returns ``[(name, title, path, seconds)]`` in spec order."""
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+    os.makedirs(out_dir, exist_ok=True)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(specs))
+    with stage("eda_report.render", figures=len(specs), workers=n_jobs), \
+            ProcessPoolExecutor(n_jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(render_figure, spec, out_dir, fmt, dpi) for spec in specs]
+        return [(spec[0], spec[1], *future.result()) for spec, future in zip(specs, futures)]
+
+
+def _embed(path, fmt):
+    if fmt == "svg":
+        with open(path, encoding="utf-8") as f:
+            svg = f.read()
+        return svg[svg.index("<svg"):]
+    with open(path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("ascii")
+    return f'<img src="data:image/png;base64,{encoded}" />'
+
+
+def write_html(figures, path, summary, title="EasyVisa Exploratory Data Analysis", fmt="png"):
+    """One self-contained HTML page with every rendered figure embedded."""
+    status = summary.stats.status_rates()
+    overview = pd.DataFrame({
+        "value": [f"{summary.n_rows:,}", f"{len(summary.sample_keys):,}",
+                  f"{normalized_rank_error(summary.k):.2%}"] + [f"{rate:.1f}%" for rate in status],
+    }, index=["Applications", "Sampled rows (histogram, KDE, outlier points)", "Quantile rank error (99%)"]
+       + [f"{name} share" for name in status.index])
+    timings = pd.DataFrame([(name, seconds) for name, _, _, seconds in figures], columns=["figure", "render_s"])
+    sections = "\n".join(f'<section id="{html.escape(name)}"><h2>{html.escape(figure_title)}</h2>\n'
+                         f'{_embed(figure_path, fmt)}</section>'
+                         for name, figure_title, figure_path, _ in figures)
+    page = f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8" />
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 1100px; color: #222; }}
+section {{ margin-bottom: 2.5em; }}
+img, svg {{ max-width: 100%; height: auto; }}
+table {{ border-collapse: collapse; }}
+td, th {{ padding: 0.2em 0.8em; border-bottom: 1px solid #ddd; text-align: left; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+{overview.to_html(header=False)}
+{sections}
+<h2>Render times</h2>
+{timings.to_html(index=False, float_format="{:.3f}".format)}
+</body>
+</html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+    return path
+
+
+def render_eda_report(data, path="visa_eda.html", fmt="png", figures_dir=None, n_jobs=None,
+                      sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Summarize ``data`` (a DataFrame or an ``EDASummary``), render every figure and write the HTML report.
+
+    Figures are also kept as files in ``figures_dir`` (next to the report by
+    default). Returns the report path.
+    """
+    summary = data if isinstance(data, EDASummary) else EDASummary(sample_size, seed=seed).update(data)
+    figures_dir = figures_dir or os.path.splitext(path)[0] + "_figures"
+    with stage("eda_report", rows=summary.n_rows):
+        figures = render_figures(figure_specs(summary), figures_dir, fmt, n_jobs)
+        return write_html(figures, path, summary, fmt=fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the EDA figures of an EasyVisa CSV into one HTML report.")
+    parser.add_argument("data")
+    parser.add_argument("--out", default="visa_eda.html")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--figures-dir", help="where the figure files go (default: <out>_figures)")
+    parser.add_argument("--jobs", type=int, help="rendering processes (default: all CPUs)")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="rows kept for the histogram, KDE and outlier points")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = EDASummary.from_csv(args.data, args.chunksize, sample_size=args.sample_size, seed=args.seed)
+    summarized = time.perf_counter()
+    render_eda_report(summary, args.out, args.format, args.figures_dir, args.jobs)
+    print(f"Summarized {summary.n_rows:,} rows in {summarized - start:.1f}s, "
+          f"rendered {args.out} in {time.perf_counter() - summarized:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Single-pass evaluation of fitted models.
+
+``Evaluator`` asks each model for its Certified probabilities once per split
+and caches them. Every metric then comes from NumPy on those arrays:
+
+- accuracy, precision, recall and F1 from one ``np.bincount`` confusion matrix,
+- ROC-AUC and PR-AUC (average precision) from one descending sort.
+
+The results match sklearn's ``accuracy_score``, ``precision_score``,
+``recall_score``, ``f1_score`` (with ``zero_division=0``), ``roc_auc_score``
+and ``average_precision_score``. Labels are the canonical 0/1 target
+(1 = Certified); predictions use ``inference.certified_labels``, the same
+``>= threshold`` rule the scorer and every ``predict`` apply.
+"""
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.inference import certified_labels
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import stage
+from easyvisa.score import certified_proba, decision_threshold
+
+
+def confusion_counts(y_true, y_pred):
+    """``[[tn, fp], [fn, tp]]`` for 0/1 arrays, in one ``bincount``."""
+    return np.bincount(2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64),
+                       minlength=4).reshape(2, 2)
+
+
+def _ratio(num, den):
+    return float(num / den) if den else 0.0
+
+
+def threshold_metrics(counts):
+    """Accuracy, precision, recall and F1 from a 2x2 confusion matrix."""
+    (tn, fp), (fn, tp) = counts
+    return {
+        "accuracy": _ratio(tp + tn, tn + fp + fn + tp),
+        "precision": _ratio(tp, tp + fp),
+        "recall": _ratio(tp, tp + fn),
+        "f1": _ratio(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def ranking_curve(y_true, scores):
+    """Cumulative true and false positives at each distinct score, highest first.
+
+    Returns ``(tps, fps, thresholds)``; predicting Certified for every row
+    scoring ``>= thresholds[i]`` gives ``tps[i]`` true and ``fps[i]`` false
+    positives.
+    """
+    y_true = np.asarray(y_true)
+    scores = np.asarray(scores)
+    order = np.argsort(scores, kind="mergesort")[::-1]
+    scores = scores[order]
+    # Last position of each run of tied scores
+    ends = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tps = np.cumsum(y_true[order], dtype=np.int64)[ends]
+    fps = ends + 1 - tps
+    return tps, fps, scores[ends]
+
+
+def ranking_metrics(y_true, scores):
+    """ROC-AUC and average precision, from one sort of ``scores``."""
+    tps, fps, _ = ranking_curve(y_true, scores)
+    positives, negatives = tps[-1], fps[-1]
+    if positives == 0 or negatives == 0:
+        return {"roc_auc": float("nan"), "pr_auc": float("nan")}
+    tpr = np.r_[0, tps] / positives
+    fpr = np.r_[0, fps] / negatives
+    precision = tps / (tps + fps)
+    return {
+        "roc_auc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2),
+        "pr_auc": float(np.sum(np.diff(tpr) * precision)),
+    }
+
+
+def binary_metrics(y_true, proba, threshold=0.5):
+    """All threshold and ranking metrics for one array of Certified probabilities.
+
+    A row is predicted Certified when its probability is ``>= threshold``,
+    as in ``score.score_frame`` and the ``predict`` methods.
+    """
+    y_true = encode_target(y_true)
+    metrics = threshold_metrics(confusion_counts(y_true, certified_labels(proba, threshold)))
+    metrics.update(ranking_metrics(y_true, proba))
+    return metrics
+
+
+class Evaluator:
+    """Caches each model's probabilities per split and derives every metric from them.
+
+    ``splits`` maps a split name to ``(X, y)``, e.g.
+    ``{"Train": (X_train, y_train), "Test": (X_test, y_test)}``. The last
+    split is the one the full metric set is reported for.
+
+    Cached probabilities belong to the model object they came from: passing a
+    different model under a known name recomputes them. A model refitted in
+    place is the same object, so call ``forget`` after refitting it.
+    """
+
+    def __init__(self, splits, threshold=0.5):
+        self.splits = {name: (X, encode_target(y)) for name, (X, y) in splits.items()}
+        self.threshold = threshold
+        self._proba = {}
+
+    def proba(self, name, model, split):
+        """Certified probabilities of ``model`` on ``split``, computed once per model object."""
+        key = (name, split)
+        # The entry holds the model itself, so its identity cannot be reused by another object
+        cached = self._proba.get(key)
+        if cached is None or cached[0] is not model:
+            X, _ = self.splits[split]
+            with stage("predict", model=name, split=split, rows=len(X)):
+                self._proba[key] = (model, certified_proba(model, X))
+        return self._proba[key][1]
+
+    def forget(self, name):
+        """Drop cached probabilities of ``name``, e.g. after refitting it."""
+        for key in [key for key in self._proba if key[0] == name]:
+            del self._proba[key]
+
+    def evaluate(self, name, model, threshold=None):
+        """Accuracy on every split plus precision, recall, F1, ROC-AUC and PR-AUC on the last.
+
+        ``threshold`` defaults to the one saved with ``model`` (see
+        ``thresholds.ThresholdedClassifier``), then to the evaluator's.
+        """
+        if threshold is None:
+            threshold = decision_threshold(model, self.threshold)
+        row = {}
+        for split, (_, y) in self.splits.items():
+            proba = self.proba(name, model, split)
+            metrics = threshold_metrics(confusion_counts(y, certified_labels(proba, threshold)))
+            row[f"{split} Accuracy"] = metrics["accuracy"]
+        metrics.update(ranking_metrics(y, proba))
+        row.update({
+            "Precision": metrics["precision"],
+            "Recall": metrics["recall"],
+            "F1 Score": metrics["f1"],
+            "ROC AUC": metrics["roc_auc"],
+            "PR AUC": metrics["pr_auc"],
+        })
+        return row
+
+    def compare(self, models, threshold=None):
+        """One row of metrics per entry of a ``{name: fitted model}`` dict."""
+        with stage("evaluate", models=len(models)):
+            rows = {name: self.evaluate(name, model, threshold) for name, model in models.items()}
+        return pd.DataFrame.from_dict(rows, orient="index")
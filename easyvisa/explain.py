@@ -0,0 +1,148 @@
+"""Batched per-application feature attributions for the tree models.
+
+``TreeExplainer`` splits every application's score into one contribution per
+feature plus a bias, so that ``bias + contributions.sum()`` reproduces the
+model's output:
+
+- XGBoost uses the booster's native TreeSHAP (``pred_contribs=True``),
+  multi-threaded inside XGBoost, in log-odds. ``approximate=True`` switches
+  to its path approximation (``approx_contribs``), an order of magnitude
+  faster, for nightly batches.
+- Decision trees, random forests and gradient boosting are walked on their
+  ``inference.FlatTreeEnsemble`` arrays. Every split a row passes through
+  credits its feature with the change in node value (Saabas path
+  attribution), one vectorized step per tree level. Units are the Certified
+  probability for trees and forests and log-odds for gradient boosting.
+
+``explain`` runs over chunks in a process pool. ``global_importance`` and
+``top_factors`` turn the attributions into the "key factors" tables of the
+report and the batch scores.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.profiling import stage
+from easyvisa.score import positive_class_index
+
+DEFAULT_CHUNKSIZE = 50_000
+
+_worker_state = {}
+
+
+class TreeExplainer:
+    """Additive feature attributions for a fitted tree model."""
+
+    def __init__(self, model, approximate=False):
+        from easyvisa.inference import flatten_model
+        from easyvisa.thresholds import ThresholdedClassifier
+
+        if isinstance(model, ThresholdedClassifier):
+            model = model.estimator
+        self.model = model
+        self.approximate = approximate
+        self.native = hasattr(model, "get_booster")
+        if self.native:
+            self.ensemble = None
+            self.feature_names = list(model.get_booster().feature_names or [])
+            self.units = "log-odds"
+        else:
+            self.ensemble = flatten_model(model)
+            self.feature_names = list(self.ensemble.feature_names or [])
+            self.units = "probability" if self.ensemble.aggregation == "mean" else "log-odds"
+        if not self.feature_names:
+            self.feature_names = [f"f{i}" for i in range(getattr(model, "n_features_in_", 0))]
+
+    def contributions(self, X):
+        """``(n_rows, n_features + 1)`` attributions; the last column is the bias."""
+        if self.native:
+            return self._xgboost_contributions(X)
+        return self._path_contributions(X)
+
+    def _xgboost_contributions(self, X):
+        import xgboost as xgb
+
+        booster = self.model.get_booster()
+        kwargs = {}
+        best_iteration = getattr(self.model, "best_iteration", None)
+        if best_iteration is not None:
+            kwargs["iteration_range"] = (0, best_iteration + 1)
+        contribs = booster.predict(xgb.DMatrix(X), pred_contribs=True, approx_contribs=self.approximate, **kwargs)
+        # Contributions are toward classes_[1]; flip them if that is not Certified
+        return contribs if positive_class_index(self.model) == 1 else -contribs
+
+    def _path_contributions(self, X):
+        ensemble = self.ensemble
+        X = ensemble._as_matrix(X)
+        n_rows, n_features = X.shape
+        nodes = np.repeat(ensemble.roots[None, :], n_rows, axis=0)
+        rows = np.arange(n_rows)[:, None]
+        # Row r, feature f accumulates at r * (n_features + 1) + f; the last slot is the bias
+        offsets = rows * (n_features + 1)
+        flat = np.zeros(n_rows * (n_features + 1))
+        for _ in range(ensemble.max_depth):
+            feature = ensemble.feature[nodes]
+            go_right = X[rows, feature] > ensemble.threshold[nodes]
+            children = ensemble.children[2 * nodes + go_right]
+            # Leaves point to themselves, so rows that already stopped add zero
+            flat += np.bincount((offsets + feature).ravel(),
+                                weights=(ensemble.value[children] - ensemble.value[nodes]).ravel(),
+                                minlength=len(flat))
+            nodes = children
+        contribs = flat.reshape(n_rows, n_features + 1)
+        contribs[:, -1] = ensemble.value[ensemble.roots].sum()
+        if ensemble.aggregation == "mean":
+            contribs /= ensemble.n_trees
+        contribs[:, -1] += ensemble.base_score
+        return contribs
+
+    def explain(self, X, chunksize=DEFAULT_CHUNKSIZE, n_jobs=None):
+        """Attributions for every row of ``X`` as a DataFrame (features plus ``bias``).
+
+        Path attributions run chunk by chunk in ``n_jobs`` processes (all
+        cores by default); XGBoost already uses every core per chunk.
+        """
+        chunks = [X[start:start + chunksize] for start in range(0, len(X), chunksize)]
+        n_jobs = 1 if self.native else min(n_jobs or os.cpu_count() or 1, len(chunks))
+        with stage("explain", model=type(self.model).__name__, rows=len(X), workers=n_jobs):
+            if n_jobs <= 1:
+                parts = [self.contributions(chunk) for chunk in chunks]
+            else:
+                with ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(self,)) as pool:
+                    parts = list(pool.map(_explain_chunk, chunks))
+        index = X.index if hasattr(X, "index") else None
+        return pd.DataFrame(np.concatenate(parts), columns=self.feature_names + ["bias"], index=index)
+
+
+def _init_worker(explainer):
+    _worker_state["explainer"] = explainer
+
+
+def _explain_chunk(chunk):
+    return _worker_state["explainer"].contributions(chunk)
+
+
+def global_importance(contributions):
+    """Mean absolute attribution per feature, largest first."""
+    return contributions.drop(columns="bias").abs().mean().sort_values(ascending=False)
+
+
+def top_factors(contributions, k=3):
+    """The ``k`` features with the largest absolute attribution for each row.
+
+    Columns ``factor_1 .. factor_k`` hold feature names and
+    ``factor_1_value ..`` their signed attributions (positive pushes toward
+    Certified).
+    """
+    values = contributions.drop(columns="bias")
+    names = np.asarray(values.columns, dtype=object)
+    values = values.to_numpy()
+    top = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :k]
+    result = {}
+    for i in range(top.shape[1]):
+        result[f"factor_{i + 1}"] = names[top[:, i]]
+        result[f"factor_{i + 1}_value"] = values[np.arange(len(values)), top[:, i]]
+    return pd.DataFrame(result, index=contributions.index)
@@ -0,0 +1,301 @@
+"""Flattened tree-ensemble inference for low-latency scoring.
+
+``flatten_model`` exports a fitted ``DecisionTreeClassifier``,
+``RandomForestClassifier``, ``GradientBoostingClassifier`` or ``XGBClassifier``
+into one set of flat NumPy node arrays (feature, threshold, left, right,
+value) shared by all trees. ``FlatTreeEnsemble`` then walks every tree at
+once, one vectorized step per tree level, so scoring a single application
+costs a few dozen small array operations instead of a DataFrame round trip
+through sklearn or XGBoost. Pair it with
+``VisaPreprocessor.transform_record`` to go from a raw application to a
+probability without pandas.
+
+Leaves point to themselves and carry an infinite threshold, so rows that
+reach a leaf early simply stay there for the remaining steps. Inputs must be
+preprocessed and complete; missing values are not routed the way XGBoost
+routes them.
+"""
+
+import json
+
+import numpy as np
+
+
+def _positive_class_index(model):
+    # Imported on use: loading and scoring a flat ensemble needs only NumPy,
+    # while easyvisa.score pulls in pandas
+    from easyvisa.score import positive_class_index
+
+    return positive_class_index(model)
+
+
+def certified_labels(proba, threshold=0.5):
+    """0/1 labels (1 = Certified): Certified when the probability is ``>= threshold``.
+
+    The one cut-off rule shared by scoring, every ``predict`` and the metrics.
+    """
+    return (np.asarray(proba) >= threshold).astype(np.int8)
+
+
+def _logit(p):
+    return float(np.log(p / (1.0 - p)))
+
+
+class FlatTreeEnsemble:
+    """Tree ensemble stored as flat node arrays.
+
+    ``aggregation`` is ``"mean"`` when the Certified probability is the
+    average of the trees' leaf values (decision trees, random forests) and
+    ``"logistic"`` when it is the sigmoid of ``base_score`` plus their sum
+    (gradient boosting, XGBoost). Every node is routed left when
+    ``x[feature] <= threshold``. ``decision_threshold`` is the Certified
+    probability cut-off ``predict`` uses.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 aggregation, base_score=0.0, feature_names=None, decision_threshold=0.5):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.aggregation = aggregation
+        self.base_score = float(base_score)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.decision_threshold = float(decision_threshold)
+        # Interleaved (left, right) pairs: the child of node n is children[2 * n + went_right]
+        self.children = np.column_stack([self.left, self.right]).ravel()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _as_matrix(self, X):
+        # sklearn compares float32 features against float64 thresholds;
+        # casting the same way keeps ties on the same side of every split
+        if hasattr(X, "columns") and self.feature_names is not None:
+            X = X[self.feature_names].to_numpy()
+        return np.atleast_2d(np.asarray(X, dtype=np.float32))
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape ``(n_rows, n_trees)``."""
+        X = self._as_matrix(X)
+        nodes = np.repeat(self.roots[None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return nodes
+
+    def _aggregate(self, leaf_values):
+        if self.aggregation == "mean":
+            return self.base_score + leaf_values.mean(axis=-1)
+        return 1.0 / (1.0 + np.exp(-(self.base_score + leaf_values.sum(axis=-1))))
+
+    def predict_certified_proba(self, X):
+        """Certified probability for every row of ``X``."""
+        return self._aggregate(self.value[self.apply(X)])
+
+    def predict_one(self, x):
+        """Certified probability for a single preprocessed row."""
+        x = np.asarray(x, dtype=np.float32)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = self.children[2 * nodes + (x[self.feature[nodes]] > self.threshold[nodes])]
+        return float(self._aggregate(self.value[nodes]))
+
+    def predict_proba(self, X):
+        proba = self.predict_certified_proba(X)
+        return np.column_stack([1.0 - proba, proba])
+
+    def predict(self, X, threshold=None):
+        """1 for Certified, 0 for Denied, cut at ``decision_threshold`` unless ``threshold`` is given."""
+        threshold = self.decision_threshold if threshold is None else threshold
+        return certified_labels(self.predict_certified_proba(X), threshold)
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            value=self.value,
+            roots=self.roots,
+            meta=np.array(json.dumps({
+                "max_depth": self.max_depth,
+                "aggregation": self.aggregation,
+                "base_score": self.base_score,
+                "feature_names": self.feature_names,
+                "decision_threshold": self.decision_threshold,
+            })),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            meta = json.loads(str(arrays["meta"]))
+            return cls(
+                arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+                arrays["value"], arrays["roots"], **meta,
+            )
+
+
+class _Builder:
+    """Concatenates per-tree node arrays, offsetting child indices."""
+
+    def __init__(self):
+        self.parts = []
+        self.roots = []
+        self.n_nodes = 0
+        self.max_depth = 0
+
+    def add(self, feature, threshold, left, right, value, depth):
+        leaf = left < 0
+        ids = np.arange(len(feature)) + self.n_nodes
+        self.parts.append((
+            np.where(leaf, 0, feature),
+            np.where(leaf, np.inf, threshold),
+            np.where(leaf, ids, left + self.n_nodes),
+            np.where(leaf, ids, right + self.n_nodes),
+            value,
+        ))
+        self.roots.append(self.n_nodes)
+        self.n_nodes += len(feature)
+        self.max_depth = max(self.max_depth, depth)
+
+    def build(self, aggregation, base_score=0.0, feature_names=None):
+        feature, threshold, left, right, value = (np.concatenate(arrays) for arrays in zip(*self.parts))
+        return FlatTreeEnsemble(feature, threshold, left, right, value, self.roots, self.max_depth,
+                                aggregation, base_score, feature_names)
+
+
+def _feature_names(model):
+    names = getattr(model, "feature_names_in_", None)
+    return None if names is None else [str(name) for name in names]
+
+
+def _add_sklearn_tree(builder, tree, value):
+    builder.add(tree.feature, tree.threshold, tree.children_left, tree.children_right, value, tree.max_depth)
+
+
+def _class_proba(tree, positive):
+    counts = tree.value[:, 0, :]
+    return counts[:, positive] / counts.sum(axis=1)
+
+
+def flatten_decision_tree(model):
+    builder = _Builder()
+    _add_sklearn_tree(builder, model.tree_, _class_proba(model.tree_, _positive_class_index(model)))
+    return builder.build("mean", feature_names=_feature_names(model))
+
+
+def flatten_random_forest(model):
+    positive = _positive_class_index(model)
+    builder = _Builder()
+    for estimator in model.estimators_:
+        _add_sklearn_tree(builder, estimator.tree_, _class_proba(estimator.tree_, positive))
+    return builder.build("mean", feature_names=_feature_names(model))
+
+
+def flatten_gradient_boosting(model):
+    if model.estimators_.shape[1] != 1:
+        raise ValueError("Only binary GradientBoostingClassifier models can be flattened")
+    # Raw scores are log-odds of classes_[1]; flip them if that is not Certified
+    sign = 1.0 if _positive_class_index(model) == 1 else -1.0
+    if model.init_ == "zero":
+        base_score = 0.0
+    else:
+        prior = model.init_.predict_proba(np.zeros((1, model.n_features_in_)))[0, 1]
+        base_score = _logit(prior)
+    builder = _Builder()
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        _add_sklearn_tree(builder, tree, sign * model.learning_rate * tree.value[:, 0, 0])
+    return builder.build("logistic", sign * base_score, feature_names=_feature_names(model))
+
+
+def flatten_xgboost(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    if learner["objective"]["name"] != "binary:logistic":
+        raise ValueError(f"Unsupported XGBoost objective {learner['objective']['name']!r}")
+    base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+    trees = learner["gradient_booster"]["model"]["trees"]
+    try:
+        trees = trees[: model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    builder = _Builder()
+    for tree in trees:
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        right = np.asarray(tree["right_children"], dtype=np.int64)
+        split = np.asarray(tree["split_conditions"], dtype=np.float32)
+        # XGBoost routes left on x < split (in float32); the next float32 below
+        # the split turns that into the x <= threshold rule used here
+        threshold = np.nextafter(split, np.float32(-np.inf)).astype(np.float64)
+        value = np.where(left < 0, split, 0.0)
+        builder.add(np.asarray(tree["split_indices"]), threshold, left, right, value, _tree_depth(left, right))
+
+    sign = 1.0 if _positive_class_index(model) == 1 else -1.0
+    ensemble = builder.build("logistic", sign * _logit(base_score), feature_names=learner.get("feature_names") or None)
+    ensemble.value *= sign
+    return ensemble
+
+
+def _tree_depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):
+        if left[node] >= 0:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+
+def flatten_model(model):
+    """Export any supported fitted tree model to a ``FlatTreeEnsemble``.
+
+    A ``thresholds.ThresholdedClassifier`` is unwrapped and its cut-off kept
+    as the ensemble's ``decision_threshold``.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    from easyvisa.thresholds import ThresholdedClassifier
+
+    if isinstance(model, ThresholdedClassifier):
+        ensemble = flatten_model(model.estimator)
+        ensemble.decision_threshold = float(model.threshold)
+        return ensemble
+    if isinstance(model, DecisionTreeClassifier):
+        return flatten_decision_tree(model)
+    if isinstance(model, RandomForestClassifier):
+        return flatten_random_forest(model)
+    if isinstance(model, GradientBoostingClassifier):
+        return flatten_gradient_boosting(model)
+    if hasattr(model, "get_booster"):
+        return flatten_xgboost(model)
+    raise TypeError(f"Cannot flatten a {type(model).__name__}")
+
+
+def check_parity(model, ensemble, X, atol=1e-6):
+    """Compare ``ensemble`` against the model it was exported from on ``X``.
+
+    Returns the largest probability difference and the share of identical
+    labels; raises ``AssertionError`` if the probabilities differ by more
+    than ``atol``.
+    """
+    expected = model.predict_proba(X)[:, _positive_class_index(model)]
+    actual = ensemble.predict_certified_proba(X)
+    max_abs_diff = float(np.max(np.abs(expected - actual)))
+    label_agreement = float(np.mean(certified_labels(expected) == certified_labels(actual)))
+    if max_abs_diff > atol:
+        raise AssertionError(f"Flattened {type(model).__name__} differs by {max_abs_diff:.3g} (atol={atol})")
+    return {"max_abs_diff": max_abs_diff, "label_agreement": label_agreement}
@@ -0,0 +1,248 @@
+"""Typed, chunked ingestion of EasyVisa.csv with a Parquet cache.
+
+The CSV is parsed against an explicit schema (category dtypes, small integer
+widths, boolean Y/N flags) one chunk at a time, and every chunk is appended to
+a Parquet file next to the source. Later runs memory-map that file instead of
+re-parsing the CSV, as long as the CSV has not changed since.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.profiling import stage
+
+# Known levels of every categorical column, in the order used for their codes
+CATEGORIES = {
+    "continent": ["Africa", "Asia", "Europe", "North America", "Oceania", "South America"],
+    "education_of_employee": ["Bachelor's", "Doctorate", "High School", "Master's"],
+    "region_of_employment": ["Island", "Midwest", "Northeast", "South", "West"],
+    "unit_of_wage": ["Hour", "Month", "Week", "Year"],
+    "case_status": ["Certified", "Denied"],
+}
+
+# Y/N columns, stored as booleans (nullable ``boolean`` when a value is missing)
+FLAG_COLUMNS = ["has_job_experience", "requires_job_training", "full_time_position"]
+
+NUMERIC_DTYPES = {
+    "no_of_employees": "int32",
+    "yr_of_estab": "int16",
+    "prevailing_wage": "float64",
+}
+
+COLUMNS = [
+    "case_id",
+    "continent",
+    "education_of_employee",
+    "has_job_experience",
+    "requires_job_training",
+    "no_of_employees",
+    "yr_of_estab",
+    "region_of_employment",
+    "prevailing_wage",
+    "unit_of_wage",
+    "full_time_position",
+    "case_status",
+]
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Accepted spellings of a Y/N flag; np.bool_ and 0.0/1.0 hash equal to these keys
+_FLAG_VALUES = {"Y": 1, "N": 0, True: 1, False: 0}
+
+_CACHE_KEY = b"easyvisa.source"
+
+
+def csv_dtypes():
+    """Schema dtype of every column of the raw file."""
+    dtypes = {"case_id": "string"}
+    dtypes.update({col: pd.CategoricalDtype(levels) for col, levels in CATEGORIES.items()})
+    dtypes.update({col: pd.CategoricalDtype(["N", "Y"]) for col in FLAG_COLUMNS})
+    dtypes.update(NUMERIC_DTYPES)
+    return dtypes
+
+
+def flag_code(value, missing=-1):
+    """0/1 code of one Y/N flag value (bool, ``np.bool_``, ``"Y"``/``"N"`` or 0/1); ``missing`` for None/NaN."""
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return missing
+    try:
+        return _FLAG_VALUES[value]
+    except (KeyError, TypeError):
+        raise ValueError(f"Unrecognised Y/N flag value {value!r}") from None
+
+
+def flag_codes(values, missing=-1):
+    """``int8`` 0/1 codes of a Y/N flag column; missing values get ``missing``.
+
+    Accepts numpy or nullable booleans, ``"Y"``/``"N"`` (plain or
+    categorical), 0/1 and object columns mixing them. Anything else raises
+    ``ValueError`` rather than silently reading as "N".
+    """
+    if not isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        values = np.asarray(values, dtype=object)
+    if values.dtype == bool:
+        return np.asarray(values).view(np.int8)
+    codes, uniques = pd.factorize(values)
+    # Look up each distinct value once; the trailing entry catches the -1 factorize gives missing values
+    lut = np.array([flag_code(value, missing) for value in uniques] + [missing], dtype=np.int8)
+    return lut[codes]
+
+
+def flag_column(values):
+    """A Y/N flag as booleans; a nullable ``boolean`` array if any value is missing."""
+    codes = flag_codes(values)
+    missing = codes < 0
+    if missing.any():
+        return pd.arrays.BooleanArray(codes == 1, missing)
+    return codes == 1
+
+
+def category_column(values, col):
+    """``values`` with the schema's categorical dtype for ``col``.
+
+    Missing values stay missing; a level outside ``CATEGORIES[col]`` raises
+    ``ValueError`` instead of silently becoming NaN.
+    """
+    column = values.astype(pd.CategoricalDtype(CATEGORIES[col]))
+    unknown = column.isna() & values.notna()
+    if unknown.any():
+        levels = sorted(map(str, pd.unique(values[unknown])))
+        raise ValueError(f"Unrecognised {col} values {levels}; expected one of {CATEGORIES[col]}")
+    return column
+
+
+def _apply_schema(frame):
+    for col, dtype in csv_dtypes().items():
+        if col not in frame.columns or frame[col].dtype == (bool if col in FLAG_COLUMNS else dtype):
+            continue
+        if col in FLAG_COLUMNS:
+            frame[col] = flag_column(frame[col])
+        elif col in CATEGORIES:
+            frame[col] = category_column(frame[col], col)
+        else:
+            frame[col] = frame[col].astype(dtype)
+    return frame
+
+
+def coerce_frame(frame):
+    """Apply the EasyVisa schema to a frame that was read without it.
+
+    Missing values stay missing. Categorical levels outside ``CATEGORIES``
+    and flags other than Y/N, booleans or 0/1 raise ``ValueError``.
+    """
+    return _apply_schema(frame.copy())
+
+
+def iter_visa_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    """Yield typed DataFrames of at most ``chunksize`` rows from a CSV file.
+
+    Values are checked as in ``coerce_frame``: an unknown category or flag
+    raises ``ValueError``.
+    """
+    dtypes = csv_dtypes()
+    if columns is not None:
+        dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+    # read_csv turns values outside a CategoricalDtype's levels into NaN without a word,
+    # so categoricals and flags are read as strings and validated by _apply_schema
+    dtypes.update({col: "string" for col in dtypes if col in CATEGORIES or col in FLAG_COLUMNS})
+    reader = pd.read_csv(path, dtype=dtypes, usecols=columns, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield _apply_schema(chunk)
+
+
+def default_cache_path(csv_path):
+    root, _ = os.path.splitext(csv_path)
+    return root + ".parquet"
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cache_is_fresh(csv_path, cache_path):
+    """True if ``cache_path`` was built from the current contents of ``csv_path``."""
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(cache_path):
+        return False
+    metadata = pq.read_schema(cache_path).metadata or {}
+    stamp = metadata.get(_CACHE_KEY)
+    if stamp is None:
+        return False
+    cached = json.loads(stamp)
+    current = _source_stamp(csv_path)
+    return cached["size"] == current["size"] and cached["mtime_ns"] == current["mtime_ns"]
+
+
+def build_cache(csv_path, cache_path=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Parse ``csv_path`` chunk by chunk into a Parquet cache and return its path.
+
+    Only one chunk is held in memory at a time; each becomes a row group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cache_path = cache_path or default_cache_path(csv_path)
+    tmp_path = cache_path + ".tmp"
+    stamp = json.dumps(_source_stamp(csv_path)).encode()
+    writer = None
+    rows = 0
+    try:
+        with stage("ingest.build_cache", source=csv_path) as st:
+            for chunk in iter_visa_chunks(csv_path, chunksize=chunksize):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema.with_metadata({**(table.schema.metadata or {}), _CACHE_KEY: stamp})
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                writer.write_table(table.cast(writer.schema))
+                rows += len(chunk)
+            st.set(rows=rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"{csv_path} contains no rows")
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def read_cache(cache_path, columns=None):
+    """Memory-map a Parquet cache written by ``build_cache`` into a DataFrame."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(cache_path, columns=columns, memory_map=True)
+    frame = table.to_pandas()
+    # Arrow hands back flags with nulls as object columns of True/False/None
+    for col in FLAG_COLUMNS:
+        if col in frame.columns and frame[col].dtype != bool:
+            frame[col] = flag_column(frame[col])
+    return frame
+
+
+def load_visa_data(csv_path, cache_path=None, chunksize=DEFAULT_CHUNKSIZE, use_cache=True, columns=None):
+    """Load EasyVisa data with the explicit schema.
+
+    The Parquet cache is (re)built whenever it is missing or older than the CSV.
+    With ``use_cache=False`` the CSV is parsed directly, still chunk by chunk.
+    """
+    with stage("ingest", source=csv_path) as st:
+        if not use_cache:
+            frame = pd.concat(iter_visa_chunks(csv_path, chunksize=chunksize, columns=columns), ignore_index=True)
+        else:
+            cache_path = cache_path or default_cache_path(csv_path)
+            if not cache_is_fresh(csv_path, cache_path):
+                build_cache(csv_path, cache_path, chunksize=chunksize)
+            frame = read_cache(cache_path, columns=columns)
+        st.set(rows=len(frame))
+    return frame
+
+
+def memory_usage_mb(frame):
+    """Deep memory footprint of ``frame`` in megabytes."""
+    return frame.memory_usage(deep=True).sum() / 2**20
+
@@ -0,0 +1,418 @@
+"""Resumable grid search over a SQLite job queue.
+
+``JobQueueSearch`` splits a grid search into one job per (configuration,
+fold) and records each job in a SQLite file. Any number of worker processes
+claim pending jobs from that file, fit, and write back the fold score. They
+can run on one host or on several hosts that share a filesystem with
+working file locks. Because every finished fit is stored on its own:
+
+- a search that is killed at candidate 25 of 27 loses at most the fits that
+  were running; calling ``fit`` again (or starting workers) resumes it,
+- a job claimed by a worker that died is handed out again: at once when
+  the worker ran on the claiming host (its pid is gone), otherwise once
+  its lease expires,
+- more workers, anywhere, simply drain the queue faster.
+
+The training matrix, target, folds and estimator are written once next to
+the database, and workers memory-map them. A later submit under the same
+search name must carry the same data, folds, estimator and grid.
+
+Usage::
+
+    search = JobQueueSearch(XGBClassifier(), param_grid, "visa_search.db", name="xgb_grid", cv=cv_folds)
+    search.fit(X_train, y_train, n_workers=8)
+
+    # extra workers on other hosts that mount the same directory
+    python -m easyvisa.jobqueue worker visa_search.db
+    python -m easyvisa.jobqueue status visa_search.db
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from easyvisa.cv import make_folds
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import stage
+from easyvisa.tuning import _iter_grid
+
+DEFAULT_LEASE_SECONDS = 3600
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    name TEXT PRIMARY KEY,
+    data_dir TEXT NOT NULL,
+    scoring TEXT NOT NULL,
+    columns TEXT,
+    created REAL NOT NULL,
+    fingerprint TEXT,
+    estimator TEXT,
+    grid TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    search TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fold INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    host TEXT,
+    pid INTEGER,
+    started REAL,
+    finished REAL,
+    score REAL,
+    fit_seconds REAL,
+    error TEXT,
+    UNIQUE (search, params, fold)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (search, status);
+"""
+# Columns added after the first schema; databases that predate them gain them on connect
+_ADDED_COLUMNS = {
+    "searches": {"fingerprint": "TEXT", "estimator": "TEXT", "grid": "TEXT"},
+    "jobs": {"host": "TEXT", "pid": "INTEGER"},
+}
+
+_SPEC_LABELS = {"fingerprint": "data or folds"}
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+    for table, columns in _ADDED_COLUMNS.items():
+        present = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, kind in columns.items():
+            if column not in present:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+    return conn
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _data_dir(db_path, name):
+    return os.path.join(os.path.splitext(os.path.abspath(db_path))[0] + "_data", name)
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) would signal the process on Windows; rely on the lease there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _release_dead(conn, search, lease_seconds, now):
+    """Hand back running jobs whose worker is gone; runs inside ``claim_job``'s transaction.
+
+    A lease held on this host by a pid that no longer exists (or by this very
+    process, which runs one job at a time and is claiming another) is
+    released at once. Leases that ran out on their last attempt are failed,
+    since ``claim_job`` would never hand them out again.
+    """
+    host, own_pid = socket.gethostname(), os.getpid()
+    rows = conn.execute(
+        "SELECT id, pid FROM jobs WHERE (?1 IS NULL OR search = ?1) AND status = 'running' AND host = ?2",
+        (search, host),
+    ).fetchall()
+    dead = [row["id"] for row in rows if row["pid"] == own_pid or not _pid_alive(row["pid"])]
+    conn.executemany(
+        "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+        "error = 'worker ' || host || ':' || pid || ' died' WHERE id = ?",
+        [(MAX_ATTEMPTS, job_id) for job_id in dead],
+    )
+    conn.execute(
+        "UPDATE jobs SET status = 'failed', error = 'lease of worker ' || COALESCE(worker, '?') || ' expired' "
+        "WHERE (?1 IS NULL OR search = ?1) AND status = 'running' AND attempts >= ?2 AND started < ?3",
+        (search, MAX_ATTEMPTS, now - lease_seconds),
+    )
+
+
+def claim_job(conn, search=None, worker=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Atomically take one pending (or abandoned) job and mark it running; ``None`` when drained."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _release_dead(conn, search, lease_seconds, now)
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE (?1 IS NULL OR search = ?1) AND attempts < ?2 AND "
+            "(status = 'pending' OR (status = 'running' AND started < ?3)) ORDER BY id LIMIT 1",
+            (search, MAX_ATTEMPTS, now - lease_seconds),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, host = ?, pid = ?, started = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker, socket.gethostname(), os.getpid(), now, row["id"]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def _load_search(conn, name):
+    import joblib
+
+    from easyvisa.train import open_shared_matrix
+
+    spec = conn.execute("SELECT * FROM searches WHERE name = ?", (name,)).fetchone()
+    columns = json.loads(spec["columns"]) if spec["columns"] else None
+    data_dir = spec["data_dir"]
+    with np.load(os.path.join(data_dir, "folds.npz")) as arrays:
+        folds = [(arrays[f"train{i}"], arrays[f"val{i}"]) for i in range(len(arrays.files) // 2)]
+    return {
+        "estimator": joblib.load(os.path.join(data_dir, "estimator.joblib")),
+        "X": open_shared_matrix(os.path.join(data_dir, "X.npy"), columns),
+        "y": np.load(os.path.join(data_dir, "y.npy"), mmap_mode="c"),
+        "folds": folds,
+        "scoring": spec["scoring"],
+    }
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, "iloc") else X[index]
+
+
+def run_job(search, params, fold):
+    """Fit one configuration on one fold and return its validation score."""
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+
+    train, val = search["folds"][fold]
+    model = clone(search["estimator"]).set_params(**params)
+    model.fit(_rows(search["X"], train), search["y"][train])
+    return float(get_scorer(search["scoring"])(model, _rows(search["X"], val), search["y"][val]))
+
+
+def run_worker(db_path, search=None, worker=None, lease_seconds=DEFAULT_LEASE_SECONDS, max_jobs=None):
+    """Claim and run jobs until the queue is drained; returns the number of jobs run."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect(db_path)
+    loaded = {}
+    done = 0
+    try:
+        while max_jobs is None or done < max_jobs:
+            job = claim_job(conn, search, worker, lease_seconds)
+            if job is None:
+                break
+            name = job["search"]
+            if name not in loaded:
+                loaded[name] = _load_search(conn, name)
+            params = json.loads(job["params"])
+            start = time.perf_counter()
+            try:
+                with stage("fit", search=name, fold=job["fold"], **params):
+                    score = run_job(loaded[name], params, job["fold"])
+            except Exception as exc:
+                status = "pending" if job["attempts"] + 1 < MAX_ATTEMPTS else "failed"
+                conn.execute("UPDATE jobs SET status = ?, error = ? WHERE id = ?",
+                             (status, f"{type(exc).__name__}: {exc}", job["id"]))
+                continue
+            conn.execute(
+                "UPDATE jobs SET status = 'done', score = ?, fit_seconds = ?, finished = ?, error = NULL "
+                "WHERE id = ?",
+                (score, time.perf_counter() - start, time.time(), job["id"]),
+            )
+            done += 1
+    finally:
+        conn.close()
+    return done
+
+
+def queue_status(db_path, search=None):
+    """Job counts by status for each search in ``db_path``."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT search, status, COUNT(*) AS n FROM jobs WHERE (?1 IS NULL OR search = ?1) "
+            "GROUP BY search, status ORDER BY search, status",
+            (search,),
+        ).fetchall()
+    finally:
+        conn.close()
+    status = {}
+    for row in rows:
+        status.setdefault(row["search"], {})[row["status"]] = row["n"]
+    return status
+
+
+class JobQueueSearch:
+    """Grid search whose (configuration, fold) fits are jobs in a SQLite queue.
+
+    Exposes ``best_params_``, ``best_score_``, ``best_estimator_`` and
+    ``cv_results_`` like the other searches. ``cv`` may be a fold count or a
+    shared ``cv.CVFolds``. Submitting the same ``name`` again only adds
+    jobs that are not in the queue yet, so finished fits are never repeated.
+    A search records the fingerprint of its data and folds, its estimator
+    and its grid; resubmitting the name with any of them changed raises
+    ``ValueError`` rather than mixing stale scores into the results, so
+    refreshed data needs a new ``name``.
+    """
+
+    def __init__(self, estimator, param_grid, db_path, name="search", cv=5, scoring="accuracy",
+                 random_state=42, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.db_path = db_path
+        self.name = name
+        self.cv = cv
+        self.scoring = scoring
+        self.random_state = random_state
+        self.lease_seconds = lease_seconds
+
+    def submit(self, X, y):
+        """Write the search's data once and enqueue every missing (configuration, fold) job."""
+        import joblib
+
+        from easyvisa.stacking import data_fingerprint, model_key
+        from easyvisa.train import share_matrix
+
+        y = encode_target(y)
+        folds = make_folds(y, self.cv, self.random_state)
+        spec = {
+            "scoring": self.scoring,
+            "fingerprint": data_fingerprint(X, y, folds),
+            "estimator": model_key(self.estimator),
+            "grid": _params_key(self.param_grid),
+        }
+        conn = connect(self.db_path)
+        try:
+            existing = conn.execute("SELECT * FROM searches WHERE name = ?", (self.name,)).fetchone()
+            if existing is not None:
+                changed = [_SPEC_LABELS.get(key, key) for key, value in spec.items() if existing[key] != value]
+                if changed:
+                    raise ValueError(f"Search {self.name!r} in {self.db_path} was submitted with a different "
+                                     f"{', '.join(changed)}; use a new name for this search")
+            else:
+                data_dir = _data_dir(self.db_path, self.name)
+                os.makedirs(data_dir, exist_ok=True)
+                share_matrix(X, data_dir)
+                np.save(os.path.join(data_dir, "y.npy"), y)
+                np.savez(os.path.join(data_dir, "folds.npz"),
+                         **{f"{part}{i}": index for i, fold in enumerate(folds)
+                            for part, index in zip(("train", "val"), fold)})
+                joblib.dump(self.estimator, os.path.join(data_dir, "estimator.joblib"))
+                columns = json.dumps(list(X.columns)) if hasattr(X, "columns") else None
+                conn.execute(
+                    "INSERT INTO searches (name, data_dir, scoring, columns, created, fingerprint, estimator, grid) "
+                    "VALUES (:name, :data_dir, :scoring, :columns, :created, :fingerprint, :estimator, :grid)",
+                    {"name": self.name, "data_dir": data_dir, "columns": columns, "created": time.time(), **spec},
+                )
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (search, params, fold) VALUES (?, ?, ?)",
+                [(self.name, _params_key(params), fold)
+                 for params in _iter_grid(self.param_grid) for fold in range(len(folds))],
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return self
+
+    def run(self, n_workers=None):
+        """Drain this search's queue with ``n_workers`` local worker processes."""
+        n_workers = n_workers or os.cpu_count() or 1
+        with stage("search", method="job queue", search=self.name, workers=n_workers):
+            if n_workers == 1:
+                run_worker(self.db_path, self.name, lease_seconds=self.lease_seconds)
+            else:
+                with ProcessPoolExecutor(n_workers) as pool:
+                    futures = [pool.submit(run_worker, self.db_path, self.name, None, self.lease_seconds)
+                               for _ in range(n_workers)]
+                    for future in futures:
+                        future.result()
+        return self
+
+    def results(self):
+        """Mean fold score per configuration, over configurations with every fold done."""
+        conn = connect(self.db_path)
+        try:
+            n_folds = conn.execute("SELECT MAX(fold) + 1 FROM jobs WHERE search = ?", (self.name,)).fetchone()[0]
+            rows = conn.execute(
+                "SELECT params, AVG(score) AS score, SUM(fit_seconds) AS fit_seconds, COUNT(*) AS folds "
+                "FROM jobs WHERE search = ? AND status = 'done' GROUP BY params",
+                (self.name,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{**json.loads(row["params"]), "score": row["score"], "fit_seconds": row["fit_seconds"]}
+                for row in rows if row["folds"] == n_folds]
+
+    def _unfinished(self):
+        counts = queue_status(self.db_path, self.name).get(self.name, {})
+        return {status: n for status, n in counts.items() if status != "done"}
+
+    def fit(self, X, y, n_workers=None):
+        """Submit, drain with local workers (resuming any earlier run), then refit the best.
+
+        Jobs still leased by live workers elsewhere are waited for; should
+        such a worker die, this process picks its jobs up again.
+        """
+        from sklearn.base import clone
+
+        self.submit(X, y).run(n_workers)
+        pending = self._unfinished()
+        while pending.get("running") or pending.get("pending"):
+            time.sleep(POLL_SECONDS)
+            run_worker(self.db_path, self.name, lease_seconds=self.lease_seconds)
+            pending = self._unfinished()
+        self.cv_results_ = self.results()
+        if pending:
+            raise RuntimeError(f"Search {self.name!r} has unfinished jobs {pending}; see `jobqueue status`")
+        best = max(self.cv_results_, key=lambda result: result["score"])
+        self.best_params_ = {key: best[key] for key in self.param_grid}
+        self.best_score_ = best["score"]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        with stage("fit", model=type(self.estimator).__name__, rows=len(X), **self.best_params_):
+            self.best_estimator_.fit(X, encode_target(y))
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Work on or inspect a SQLite hyperparameter job queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="claim and run jobs until the queue is drained")
+    worker.add_argument("db")
+    worker.add_argument("--search", help="only run jobs of this search")
+    worker.add_argument("--processes", type=int, default=1, help="worker processes on this host")
+    worker.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="seconds after which a running job is presumed dead and handed out again")
+    status = commands.add_parser("status", help="job counts by status")
+    status.add_argument("db")
+    status.add_argument("--search")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        if args.processes == 1:
+            done = run_worker(args.db, args.search, lease_seconds=args.lease)
+        else:
+            with ProcessPoolExecutor(args.processes) as pool:
+                futures = [pool.submit(run_worker, args.db, args.search, None, args.lease)
+                           for _ in range(args.processes)]
+                done = sum(future.result() for future in futures)
+        print(f"Ran {done} jobs")
+    else:
+        for name, counts in queue_status(args.db, args.search).items():
+            print(name, " ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Fitted preprocessing for EasyVisa features.
+
+``VisaPreprocessor`` replaces the notebook's full-data quantile clipping and
+per-column ``LabelEncoder`` loop with one transformer that is fitted on the
+training split only and saved as a single artifact.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from easyvisa.ingest import FLAG_COLUMNS, flag_code, flag_codes
+from easyvisa.profiling import stage
+
+# Columns that never feed the models
+ID_COLUMNS = ["case_id", "case_status"]
+
+# Code given to a category that was not seen during fit
+UNKNOWN_CODE = -1
+
+
+def code_dtype(n_categories):
+    """Smallest signed integer dtype holding codes ``0..n_categories - 1`` and ``UNKNOWN_CODE``.
+
+    ``int8`` for the handful of levels EasyVisa has; ``partial_fit`` can keep
+    adding categories, and the codes widen instead of wrapping around.
+    """
+    return np.min_scalar_type(-max(n_categories, 1))
+
+
+def encode_target(y):
+    """Canonical 0/1 target (1 = Certified) as an int8 array.
+
+    Takes 0/1 (or booleans) or ``"Certified"``/``"Denied"``; any other value,
+    missing ones included, raises ``ValueError`` instead of reading as Denied.
+    """
+    values = np.asarray(y)
+    if values.dtype.kind in "biuf":
+        valid = (values == 0) | (values == 1)
+        certified = values == 1
+    else:
+        certified = values == "Certified"
+        valid = certified | (values == "Denied")
+    if not valid.all():
+        unknown = sorted(map(str, pd.unique(values[~valid])))
+        raise ValueError(f"Unrecognised case_status values {unknown}; expected Certified/Denied or 1/0")
+    return certified.astype(np.int8)
+
+
+class VisaPreprocessor(TransformerMixin, BaseEstimator):
+    """Cap long-tailed numerics and encode categoricals with learned lookup tables.
+
+    Categories are coded in sorted order, as ``LabelEncoder`` did, so models
+    trained on the old encoding see the same codes. Unseen categories map to
+    ``UNKNOWN_CODE`` instead of raising.
+    """
+
+    def __init__(self, cap_quantile=0.95, cap_columns=("prevailing_wage", "no_of_employees")):
+        self.cap_quantile = cap_quantile
+        self.cap_columns = cap_columns
+
+    def fit(self, X, y=None, sketches=None):
+        """Learn caps and category codes from ``X``.
+
+        ``sketches`` maps cap columns to ``KLLSketch`` objects; when given,
+        caps are read from them instead of sorting the columns of ``X``.
+        """
+        from easyvisa.sketch import KLLSketch
+
+        with stage("encode.fit", rows=len(X)):
+            self._set_columns(X.columns)
+            self._set_categories({col: pd.unique(X[col].dropna()) for col in self._categorical_columns(X)})
+            if sketches is None:
+                self.caps_ = {col: float(X[col].quantile(self.cap_quantile))
+                              for col in self.cap_columns if col in X.columns}
+                # Kept so partial_fit can merge later batches into the caps
+                sketches = {col: KLLSketch().update(X[col].to_numpy()) for col in self.caps_}
+            else:
+                self.set_caps_from_sketches(sketches)
+            self.sketches_ = sketches
+        return self
+
+    def partial_fit(self, X, y=None):
+        """Fold a new batch into a fitted preprocessor.
+
+        Categories first seen in ``X`` get the next free codes, so codes that
+        fitted models already rely on never move. Caps are re-read from the
+        quantile sketches after adding ``X``, so they track the whole history
+        within the sketch's rank error.
+        """
+        if not hasattr(self, "categories_"):
+            return self.fit(X, y)
+        with stage("encode.partial_fit", rows=len(X)):
+            for col, categories in self.categories_.items():
+                known = set(categories)
+                categories.extend(sorted(set(pd.unique(X[col].dropna())) - known))
+                self.category_index_[col] = {category: code for code, category in enumerate(categories)}
+            # Preprocessors saved before sketches were kept have fixed caps
+            sketches = getattr(self, "sketches_", None)
+            if sketches:
+                for col, sketch in sketches.items():
+                    sketch.update(X[col].to_numpy())
+                self.set_caps_from_sketches(sketches)
+        return self
+
+    def fit_chunks(self, chunks, k=None):
+        """Fit out of core from an iterable of frames, e.g. ``ingest.iter_visa_chunks``.
+
+        Categories are the union over all chunks and caps come from streaming
+        quantile sketches, so no column is ever held in memory in full.
+        """
+        from easyvisa.sketch import DEFAULT_K, KLLSketch
+
+        levels = {}
+        sketches = {}
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                self._set_columns(chunk.columns)
+                levels = {col: set() for col in self._categorical_columns(chunk)}
+                sketches = {col: KLLSketch(k or DEFAULT_K) for col in self.cap_columns if col in chunk.columns}
+            for col, seen in levels.items():
+                seen.update(pd.unique(chunk[col].dropna()))
+            for col, sketch in sketches.items():
+                sketch.update(chunk[col].to_numpy())
+        self._set_categories(levels)
+        self.set_caps_from_sketches(sketches)
+        self.sketches_ = sketches
+        return self
+
+    def set_caps_from_sketches(self, sketches):
+        self.caps_ = {col: sketches[col].quantile(self.cap_quantile) for col in self.cap_columns if col in sketches}
+        return self
+
+    def _set_columns(self, columns):
+        self.feature_names_ = [col for col in columns if col not in ID_COLUMNS]
+        self.flag_columns_ = [col for col in self.feature_names_ if col in FLAG_COLUMNS]
+
+    def _categorical_columns(self, X):
+        columns = []
+        for col in self.feature_names_:
+            if col in self.flag_columns_:
+                continue
+            dtype = X[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype) or dtype == object or pd.api.types.is_string_dtype(dtype):
+                columns.append(col)
+        return columns
+
+    def _set_categories(self, levels):
+        self.categories_ = {col: sorted(values) for col, values in levels.items()}
+        self.category_index_ = {
+            col: {category: code for code, category in enumerate(categories)}
+            for col, categories in self.categories_.items()
+        }
+
+    def _codes(self, col, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Translate the input's own codes through a small table; the
+            # trailing entry catches the -1 code pandas uses for missing values
+            index = self.category_index_[col]
+            lut = np.array([index.get(c, UNKNOWN_CODE) for c in values.cat.categories] + [UNKNOWN_CODE],
+                           dtype=code_dtype(len(index)))
+            return lut[values.cat.codes.to_numpy()]
+        categories = self.categories_[col]
+        return pd.Categorical(values, categories=categories).codes.astype(code_dtype(len(categories)))
+
+    def transform(self, X):
+        with stage("encode.transform", rows=len(X)):
+            return self._transform(X)
+
+    def _transform(self, X):
+        columns = {}
+        for col in self.feature_names_:
+            values = X[col]
+            if col in self.categories_:
+                columns[col] = self._codes(col, values)
+            elif col in self.flag_columns_:
+                columns[col] = flag_codes(values, UNKNOWN_CODE)
+            else:
+                values = values.to_numpy()
+                if col in self.caps_:
+                    values = np.minimum(values, self.caps_[col])
+                columns[col] = values
+        return pd.DataFrame(columns, index=X.index)
+
+    def transform_record(self, record):
+        """Encode one application (a mapping of column to raw value) as a float32 row.
+
+        Plain dict lookups only, for single-application scoring where building
+        a DataFrame would cost more than the model itself.
+        """
+        row = np.empty(len(self.feature_names_), dtype=np.float32)
+        for i, col in enumerate(self.feature_names_):
+            value = record[col]
+            if col in self.category_index_:
+                row[i] = self.category_index_[col].get(value, UNKNOWN_CODE)
+            elif col in self.flag_columns_:
+                row[i] = flag_code(value, UNKNOWN_CODE)
+            elif col in self.caps_:
+                row[i] = min(value, self.caps_[col])
+            else:
+                row[i] = value
+        return row
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_, dtype=object)
+
+    def save(self, path):
+        import joblib
+
+        joblib.dump(self, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        import joblib
+
+        preprocessor = joblib.load(path)
+        if not isinstance(preprocessor, cls):
+            raise TypeError(f"{path} does not contain a {cls.__name__}")
+        return preprocessor
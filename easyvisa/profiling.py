@@ -0,0 +1,227 @@
+"""Lightweight per-stage instrumentation for the EasyVisa pipeline.
+
+Stages are marked with a context manager::
+
+    from easyvisa.profiling import stage
+
+    with stage("fit", model="Random Forest", rows=len(X_train)) as st:
+        rf.fit(X_train, y_train)
+        st.set(n_estimators=rf.n_estimators)
+
+Profiling is off unless ``EASYVISA_PROFILE=1`` is set or ``enable()`` is
+called. While off, ``stage`` returns one shared no-op object, so the cost of
+an instrumented call is a function call and an attribute lookup.
+
+When on, every stage records wall time, CPU time and memory:
+
+- ``rss_delta_mb``: resident memory at the end of the stage minus at its
+  start (Linux, from ``/proc/self/statm``),
+- ``rss_peak_increase_mb``: how far the stage raised the process's RSS
+  high-water mark; 0 unless the stage itself reached a new peak,
+- ``process_rss_peak_mb``: that high-water mark over the process lifetime
+  so far, not the peak of the stage (both Unix only, from ``resource``),
+- with ``trace_memory=True``, ``traced_peak_mb``, the peak of traced
+  Python/NumPy allocations inside the stage (``tracemalloc``, noticeably
+  slower).
+
+``save`` writes the records plus a Chrome trace (``chrome://tracing``,
+Perfetto) to one JSON file that can be diffed between runs.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2**20 if hasattr(os, "sysconf") else 0.0
+# ru_maxrss is in bytes on macOS and kilobytes elsewhere
+_MAXRSS_MB = 1 / 2**20 if sys.platform == "darwin" else 1 / 1024
+
+
+def _rss_mb():
+    """Current resident set size, or None where ``/proc`` is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _rss_peak_mb():
+    """Process RSS high-water mark, or None where ``resource`` is unavailable."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_MB
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name, attrs):
+        self.profiler = profiler
+        self.record = {"name": name, **attrs}
+
+    def set(self, **attrs):
+        self.record.update(attrs)
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.record["depth"] = len(profiler._stack)
+        profiler._stack.append(self)
+        self._child_peak = 0
+        if profiler.trace_memory:
+            self._traced_start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        self._rss = _rss_mb()
+        self._rss_peak = _rss_peak_mb()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        profiler = self.profiler
+        profiler._stack.pop()
+        record = self.record
+        record["start_s"] = self._wall - profiler.origin
+        record["wall_s"] = wall
+        record["cpu_s"] = cpu
+        rss, rss_peak = _rss_mb(), _rss_peak_mb()
+        if rss is not None and self._rss is not None:
+            record["rss_delta_mb"] = rss - self._rss
+        if rss_peak is not None:
+            record["rss_peak_increase_mb"] = rss_peak - self._rss_peak
+            record["process_rss_peak_mb"] = rss_peak
+        if profiler.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            # reset_peak() in a nested stage hides earlier peaks from its parent,
+            # so children report theirs upwards
+            peak = max(peak, self._child_peak)
+            record["traced_peak_mb"] = (peak - self._traced_start) / 2**20
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent._child_peak = max(parent._child_peak, peak)
+        if exc[0] is not None:
+            record["error"] = exc[0].__name__
+        profiler.records.append(record)
+        return False
+
+
+class Profiler:
+    """Collects stage records; disabled profilers hand out no-op stages."""
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.records = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage(self, name, **attrs):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, attrs)
+
+    def add(self, name, wall_s, **attrs):
+        """Record a stage measured elsewhere, e.g. a fit that ran in a worker process."""
+        if self.enabled:
+            self.records.append({"name": name, "depth": len(self._stack), "wall_s": wall_s, **attrs})
+
+    def reset(self):
+        self.records = []
+        self.origin = time.perf_counter()
+
+    def summary(self):
+        """Total wall and CPU seconds and call count per stage name, slowest first."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["name"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            total["calls"] += 1
+            total["wall_s"] += record["wall_s"]
+            total["cpu_s"] += record.get("cpu_s", 0.0)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["wall_s"]))
+
+    def chrome_trace(self):
+        events = []
+        for record in self.records:
+            if "start_s" not in record:
+                continue
+            args = {k: v for k, v in record.items() if k not in ("name", "start_s", "wall_s", "depth")}
+            events.append({
+                "name": record["name"], "ph": "X", "pid": os.getpid(), "tid": record["depth"],
+                "ts": record["start_s"] * 1e6, "dur": record["wall_s"] * 1e6, "args": args,
+            })
+        return events
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"stages": self.records, "summary": self.summary(), "traceEvents": self.chrome_trace()},
+                      f, indent=1, default=str)
+        return path
+
+
+profiler = Profiler(enabled=os.environ.get("EASYVISA_PROFILE") == "1")
+
+
+def stage(name, **attrs):
+    """Context manager timing ``name`` on the global profiler."""
+    return profiler.stage(name, **attrs)
+
+
+def enable(trace_memory=False):
+    profiler.enabled = True
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    profiler.trace_memory = trace_memory
+    return profiler
+
+
+def disable():
+    profiler.enabled = False
+    if profiler.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    profiler.trace_memory = False
+    return profiler
+
+
+def profiled(name=None):
+    """Decorator running the wrapped function inside a stage."""
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+"""Plots of the EasyVisa report.
+
+matplotlib, seaborn and graphviz are imported inside the functions, so
+scoring workers and CLIs that import the package never load them. Every plot
+draws on ``ax`` when given (a new figure otherwise) and returns the axes.
+"""
+
+import numpy as np
+
+from easyvisa.evaluation import confusion_counts
+
+LABELS = ["Denied", "Certified"]
+
+
+def _axes(ax, figsize):
+    if ax is not None:
+        return ax
+    import matplotlib.pyplot as plt
+
+    return plt.figure(figsize=figsize).gca()
+
+
+def plot_rates(rates, title, xlabel, colormap="coolwarm", rotation=45, ax=None, figsize=(10, 5)):
+    """Stacked status percentages per level, e.g. ``CertificationStats.rates``; the legend follows its columns."""
+    ax = _axes(ax, figsize)
+    rates.plot(kind="bar", stacked=True, colormap=colormap, alpha=0.85, ax=ax, rot=rotation)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Percentage (%)")
+    ax.legend(title="Case Status")
+    return ax
+
+
+def plot_bars(counts, title, xlabel, ylabel="Count", colormap="viridis", rotation=0, horizontal=False,
+              ax=None, figsize=(6, 4)):
+    """Bars of pre-counted values, e.g. ``CertificationStats.counts``; one group per row of a DataFrame."""
+    ax = _axes(ax, figsize)
+    counts.plot(kind="barh" if horizontal else "bar", colormap=colormap, ax=ax, rot=rotation,
+                legend=getattr(counts, "ndim", 1) > 1)
+    ax.set_title(title)
+    ax.set_xlabel(ylabel if horizontal else xlabel)
+    ax.set_ylabel(xlabel if horizontal else ylabel)
+    return ax
+
+
+def plot_boxes(stats, title, xlabel=None, ylabel=None, log=False, ylim=None, showfliers=True, vert=True,
+               colormap="coolwarm", ax=None, figsize=(8, 5)):
+    """Boxplots drawn from precomputed statistics with ``Axes.bxp``, so no raw rows are needed.
+
+    ``stats`` holds one ``bxp`` dict per box (``med``, ``q1``, ``q3``,
+    ``whislo``, ``whishi``, ``fliers``, ``label``). Boxes that also carry a
+    ``hue`` are drawn side by side within their ``label`` and colored by hue.
+    """
+    import matplotlib
+    from matplotlib.patches import Patch
+
+    ax = _axes(ax, figsize)
+    groups = list(dict.fromkeys(box["label"] for box in stats))
+    hues = list(dict.fromkeys(box.get("hue") for box in stats))
+    width = 0.8 / len(hues)
+    positions = [groups.index(box["label"]) + (hues.index(box.get("hue")) - (len(hues) - 1) / 2) * width
+                 for box in stats]
+    colors = matplotlib.colormaps[colormap](np.linspace(0.15, 0.85, len(hues)))
+    artists = ax.bxp(stats, positions=positions, widths=width * 0.8, showfliers=showfliers, vert=vert,
+                     patch_artist=True, manage_ticks=False)
+    for box, patch in zip(stats, artists["boxes"]):
+        patch.set_facecolor(colors[hues.index(box.get("hue"))])
+    set_ticks = ax.set_xticks if vert else ax.set_yticks
+    set_ticks(range(len(groups)), groups, rotation=45 if vert and len(groups) > 3 else 0)
+    (ax.set_xlim if vert else ax.set_ylim)(-0.5, len(groups) - 0.5)
+    if len(hues) > 1:
+        ax.legend([Patch(facecolor=color) for color in colors], hues)
+    if log:
+        (ax.set_yscale if vert else ax.set_xscale)("log")
+    if ylim is not None:
+        (ax.set_ylim if vert else ax.set_xlim)(ylim)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel if vert else ylabel)
+    ax.set_ylabel(ylabel if vert else xlabel)
+    return ax
+
+
+def plot_distribution(sample, total, title, xlabel, bins=50, kde=True, color="blue", ax=None, figsize=(8, 5)):
+    """Histogram and KDE of a uniform ``sample`` of a column with ``total`` rows, counts scaled to ``total``."""
+    ax = _axes(ax, figsize)
+    sample = np.asarray(sample, dtype=np.float64)
+    sample = sample[~np.isnan(sample)]
+    counts, edges = np.histogram(sample, bins=bins)
+    scale = total / max(len(sample), 1)
+    ax.bar(edges[:-1], counts * scale, width=np.diff(edges), align="edge", color=color, alpha=0.4,
+           edgecolor="white")
+    if kde and len(sample) > 1 and np.ptp(sample) > 0:
+        from scipy.stats import gaussian_kde
+
+        grid = np.linspace(edges[0], edges[-1], 256)
+        # Density times bin width times rows puts the curve on the histogram's count scale
+        ax.plot(grid, gaussian_kde(sample)(grid) * np.diff(edges).mean() * total, color=color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Count")
+    return ax
+
+
+def plot_correlation(correlation, title="Correlation Matrix of Features", ax=None, figsize=(10, 6)):
+    """Annotated heatmap of a correlation matrix."""
+    import seaborn as sns
+
+    ax = _axes(ax, figsize)
+    sns.heatmap(correlation, annot=True, cmap="coolwarm", fmt=".2f", linewidths=0.5, ax=ax)
+    ax.set_title(title)
+    return ax
+
+
+def plot_confusion_matrix(y_true, y_pred, title, ax=None, figsize=(6, 4)):
+    """Annotated confusion matrix of 0/1 labels (1 = Certified)."""
+    import seaborn as sns
+
+    ax = _axes(ax, figsize)
+    sns.heatmap(confusion_counts(y_true, y_pred), annot=True, fmt="d", cmap="Blues",
+                xticklabels=LABELS, yticklabels=LABELS, ax=ax)
+    ax.set_xlabel("Predicted")
+    ax.set_ylabel("Actual")
+    ax.set_title(title)
+    return ax
+
+
+def plot_model_comparison(comparison, title="Model Performance Comparison", ax=None, figsize=(12, 6)):
+    """Grouped bars of an ``Evaluator.compare`` table, one group per model."""
+    ax = _axes(ax, figsize)
+    comparison.plot(kind="bar", colormap="coolwarm", ax=ax, rot=45)
+    ax.set_title(title)
+    ax.set_ylabel("Score")
+    ax.set_xlabel("Model")
+    ax.legend(loc="lower right")
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    return ax
+
+
+def plot_importance(importance, title="Key Factors", units=None, ax=None, figsize=(8, 5)):
+    """Horizontal bars of ``explain.global_importance``, largest on top."""
+    ax = _axes(ax, figsize)
+    importance = importance.sort_values()
+    ax.barh(np.asarray(importance.index, dtype=str), importance.to_numpy())
+    ax.set_title(title)
+    ax.set_xlabel("Mean |attribution|" + (f" ({units})" if units else ""))
+    return ax
+
+
+def render_tree(model, feature_names, path=None, fmt="png"):
+    """A fitted decision tree as a ``graphviz.Source`` (shown inline in notebooks).
+
+    With ``path`` the rendered file is also written and its name returned.
+    """
+    import graphviz
+    from sklearn.tree import export_graphviz
+
+    dot = export_graphviz(model, out_file=None, filled=True, rounded=True, special_characters=True,
+                          feature_names=list(feature_names), class_names=LABELS)
+    source = graphviz.Source(dot)
+    if path is not None:
+        return source.render(path, format=fmt, cleanup=True)
+    return source
@@ -0,0 +1,263 @@
+"""Chunked, multi-process batch scoring of application files.
+
+Usage::
+
+    python -m easyvisa.score applications.csv scores.parquet \\
+        --model visa_model.joblib --preprocessor visa_preprocessor.joblib \\
+        --chunksize 100000 --workers 8
+
+The input (CSV or Parquet) is streamed in fixed-size chunks. Each chunk is
+preprocessed and scored in a worker process that loaded the artifacts once,
+and results are appended to the output in input order. At most
+``2 * workers`` chunks are in flight, so memory stays bounded whatever the
+file size.
+"""
+
+import argparse
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.inference import certified_labels
+from easyvisa.ingest import DEFAULT_CHUNKSIZE, coerce_frame, iter_visa_chunks
+from easyvisa.profiling import stage
+
+LABELS = np.array(["Denied", "Certified"], dtype=object)
+
+# Artifacts loaded once per worker process by _init_worker
+_worker_state = {}
+
+
+def positive_class_index(model):
+    """Column of ``predict_proba`` holding the Certified probability."""
+    classes = list(getattr(model, "classes_", [0, 1]))
+    for label in ("Certified", 1):
+        if label in classes:
+            return classes.index(label)
+    raise ValueError(f"Cannot find the Certified class among {classes}")
+
+
+def certified_proba(model, X):
+    return model.predict_proba(X)[:, positive_class_index(model)]
+
+
+def decision_threshold(model, default=0.5):
+    """Cut-off saved with ``model`` by ``thresholds.ThresholdedClassifier``, else ``default``."""
+    from easyvisa.cache import PredictionCache
+    from easyvisa.thresholds import ThresholdedClassifier
+
+    if isinstance(model, PredictionCache):
+        model = model.model
+    return model.threshold if isinstance(model, ThresholdedClassifier) else default
+
+
+def load_model(path, name=None):
+    """Load a fitted model, or pick ``name`` out of a saved ``models`` dict."""
+    import joblib
+
+    model = joblib.load(path)
+    if isinstance(model, dict):
+        if name is None:
+            raise ValueError(f"{path} holds several models {sorted(model)}; pass a model name")
+        model = model[name]
+    return model
+
+
+def score_frame(frame, preprocessor, model, threshold=None, explainer=None, top_k=3):
+    """Certified probability and label for every application in ``frame``.
+
+    ``threshold`` defaults to the one saved with the model (0.5 if none).
+    With an ``explain.TreeExplainer`` the ``top_k`` features that drove each
+    score are appended as ``factor_*`` columns.
+    """
+    if threshold is None:
+        threshold = decision_threshold(model)
+    X = preprocessor.transform(frame)
+    proba = certified_proba(model, X)
+    scores = pd.DataFrame(
+        {"certified_proba": proba, "case_status_pred": LABELS[certified_labels(proba, threshold)]},
+        index=frame.index,
+    )
+    if explainer is not None:
+        from easyvisa.explain import top_factors
+
+        contributions = pd.DataFrame(explainer.contributions(X), columns=explainer.feature_names + ["bias"],
+                                     index=frame.index)
+        scores = pd.concat([scores, top_factors(contributions, top_k)], axis=1)
+    if "case_id" in frame.columns:
+        scores.insert(0, "case_id", frame["case_id"].to_numpy())
+    return scores
+
+
+def iter_input_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield typed chunks of a CSV or Parquet file of applications."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield coerce_frame(batch.to_pandas())
+    else:
+        yield from iter_visa_chunks(path, chunksize=chunksize)
+
+
+class _ScoreWriter:
+    """Appends score chunks to a Parquet or CSV file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self.rows = 0
+
+    def write(self, scores):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            scores.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(scores)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _init_worker(model_path, preprocessor_path, model_name, threshold, explain=0, cache_size=0):
+    from easyvisa.preprocess import VisaPreprocessor
+
+    model = load_model(model_path, model_name)
+    _worker_state["model"] = model
+    _worker_state["preprocessor"] = VisaPreprocessor.load(preprocessor_path)
+    _worker_state["threshold"] = threshold
+    _worker_state["explain"] = explain
+    _worker_state["explainer"] = None
+    if explain:
+        from easyvisa.explain import TreeExplainer
+
+        _worker_state["explainer"] = TreeExplainer(model, approximate=True)
+    if cache_size:
+        from easyvisa.cache import PredictionCache
+
+        _worker_state["model"] = PredictionCache(model, maxsize=cache_size)
+
+
+def _score_chunk(chunk):
+    return score_frame(chunk, _worker_state["preprocessor"], _worker_state["model"], _worker_state["threshold"],
+                       _worker_state["explainer"], _worker_state["explain"])
+
+
+def score_file(
+    input_path,
+    output_path,
+    model_path,
+    preprocessor_path,
+    model_name=None,
+    threshold=None,
+    chunksize=DEFAULT_CHUNKSIZE,
+    workers=None,
+    explain=0,
+    cache_size=0,
+    monitor=None,
+):
+    """Score ``input_path`` into ``output_path`` and return the number of rows written.
+
+    ``explain=k`` adds the ``k`` strongest feature attributions of every
+    application (see ``easyvisa.explain``). ``cache_size=n`` puts an
+    ``n``-entry ``cache.PredictionCache`` in front of the model in every
+    worker, so repeated feature vectors are scored once. A
+    ``drift.DriftMonitor`` passed as ``monitor`` is updated with every chunk
+    and its scores.
+    """
+    workers = workers or os.cpu_count() or 1
+    initargs = (model_path, preprocessor_path, model_name, threshold, explain, cache_size)
+    writer = _ScoreWriter(output_path)
+    try:
+        with stage("score", source=input_path, workers=workers) as st:
+            _score_into(writer, input_path, chunksize, workers, initargs, monitor)
+            st.set(rows=writer.rows)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def _write(writer, chunk, scores, monitor):
+    writer.write(scores)
+    if monitor is not None:
+        monitor.update(chunk, scores["certified_proba"].to_numpy())
+
+
+def _score_into(writer, input_path, chunksize, workers, initargs, monitor=None):
+    if workers == 1:
+        _init_worker(*initargs)
+        for chunk in iter_input_chunks(input_path, chunksize):
+            _write(writer, chunk, _score_chunk(chunk), monitor)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = collections.deque()
+        for chunk in iter_input_chunks(input_path, chunksize):
+            pending.append((chunk, pool.submit(_score_chunk, chunk)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                _write(writer, chunk, future.result(), monitor)
+        while pending:
+            chunk, future = pending.popleft()
+            _write(writer, chunk, future.result(), monitor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file of visa applications in chunks.")
+    parser.add_argument("input", help="CSV or Parquet file of applications")
+    parser.add_argument("output", help="destination .parquet or .csv file")
+    parser.add_argument("--model", required=True, help="joblib file with a fitted model or a dict of models")
+    parser.add_argument("--model-name", help="key to use when --model holds a dict of models")
+    parser.add_argument("--preprocessor", required=True, help="joblib file with a fitted VisaPreprocessor")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Certified probability cut-off (default: the one saved with the model, else 0.5)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--explain", type=int, default=0, metavar="K",
+                        help="add the K features that contributed most to each score")
+    parser.add_argument("--cache-size", type=int, default=0, metavar="N",
+                        help="cache the scores of up to N distinct feature vectors per worker (default: off)")
+    parser.add_argument("--drift-baseline", help="JSON drift.DriftProfile of the training data to compare the input with")
+    parser.add_argument("--drift-out", help="save the input's drift profile here (needs --drift-baseline)")
+    args = parser.parse_args(argv)
+
+    monitor = None
+    if args.drift_baseline:
+        from easyvisa.drift import DriftMonitor, DriftProfile
+
+        monitor = DriftMonitor(DriftProfile.load(args.drift_baseline))
+
+    rows = score_file(
+        args.input,
+        args.output,
+        args.model,
+        args.preprocessor,
+        model_name=args.model_name,
+        threshold=args.threshold,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        explain=args.explain,
+        cache_size=args.cache_size,
+        monitor=monitor,
+    )
+    print(f"Scored {rows} applications into {args.output}")
+    if monitor is not None:
+        print(monitor.report().round(4).to_string())
+        if args.drift_out:
+            monitor.current.save(args.drift_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Asyncio scoring server that coalesces single applications into micro-batches.
+
+Scoring one application at a time spends most of each call on per-call
+overhead; scoring 64 at once costs little more than scoring one. The server
+accepts single applications over HTTP and queues them. ``MicroBatcher``
+cuts the queue into batches of at most ``max_batch_size`` rows, waiting at
+most ``max_wait_ms`` for a batch to fill. Each batch is scored with one
+vectorized call in a thread or process pool. While every worker is busy,
+requests keep queueing, so batches grow with load: throughput scales with
+concurrent clients while each request waits for at most one batch ahead of
+it.
+
+Only the standard library is used for HTTP (``asyncio.start_server``,
+HTTP/1.1 with keep-alive); nothing but the model artifacts is needed.
+Endpoints:
+
+- ``POST /score``: one application (JSON object) or a list of them,
+- ``GET /metrics``: queue depth, batch-size histogram, latency percentiles,
+- ``GET /health``.
+
+Usage::
+
+    python -m easyvisa.server serve --model visa_models.joblib --model-name XGBoost \\
+        --preprocessor visa_preprocessor.joblib --port 8080
+    curl -s localhost:8080/score -d @application.json
+    python -m easyvisa.server bench applications.csv --port 8080 --concurrency 1 8 64
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from easyvisa.profiling import stage
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+LATENCY_WINDOW = 10_000
+LABELS = ["Denied", "Certified"]
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error"}
+
+# Predictor loaded once per worker process by _init_worker
+_worker_state = {}
+
+
+class Predictor:
+    """Certified probability of a float32 matrix of preprocessed rows.
+
+    Tree models are flattened (``inference.flatten_model``) when possible, so
+    a batch is scored with NumPy only; anything else goes through the
+    model's ``predict_proba`` on a DataFrame with the training column names.
+    """
+
+    def __init__(self, model, feature_names, flat=True):
+        from easyvisa.score import decision_threshold
+
+        self.feature_names = list(feature_names)
+        self.threshold = decision_threshold(model)
+        self.ensemble = None
+        self.model = model
+        if flat:
+            from easyvisa.inference import flatten_model
+
+            try:
+                self.ensemble = flatten_model(model)
+                self.model = None
+            except TypeError:
+                pass
+
+    def __call__(self, matrix):
+        if self.ensemble is not None:
+            return self.ensemble.predict_certified_proba(matrix)
+        import pandas as pd
+
+        from easyvisa.score import certified_proba
+
+        return certified_proba(self.model, pd.DataFrame(matrix, columns=self.feature_names))
+
+
+def _init_worker(predictor):
+    _worker_state["predictor"] = predictor
+
+
+def _predict_batch(matrix):
+    return _worker_state["predictor"](matrix)
+
+
+class MicroBatcher:
+    """Collects submitted rows into batches and scores each batch in ``executor``.
+
+    At most ``max_in_flight`` batches are scored at once; a new batch is
+    only started when a slot is free, so rows that arrive meanwhile join it.
+    """
+
+    def __init__(self, predict, executor, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_in_flight=1):
+        self.predict = predict
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_in_flight = max_in_flight
+        self.queue = asyncio.Queue()
+        self.batch_sizes = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.in_flight = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, row):
+        """Certified probability of one preprocessed row."""
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        proba = await future
+        self.latencies.append(time.perf_counter() - start)
+        self.requests += 1
+        return proba
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            batch = await self._collect()
+            asyncio.get_running_loop().create_task(self._score(batch))
+
+    async def _score(self, batch):
+        self.in_flight += 1
+        try:
+            matrix = np.stack([row for row, _ in batch])
+            with stage("server.batch", rows=len(batch)):
+                proba = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict, matrix)
+            for (_, future), p in zip(batch, proba):
+                if not future.done():
+                    future.set_result(float(p))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self.batch_sizes[len(batch)] += 1
+            self.in_flight -= 1
+            self._slots.release()
+
+    def metrics(self):
+        n_batches = sum(self.batch_sizes.values())
+        rows = sum(size * count for size, count in self.batch_sizes.items())
+        latencies = np.fromiter(self.latencies, dtype=np.float64) * 1000
+        percentiles = {}
+        if len(latencies):
+            for q in (50, 90, 99):
+                percentiles[f"p{q}"] = float(np.percentile(latencies, q))
+            percentiles["max"] = float(latencies.max())
+        return {
+            "requests": self.requests,
+            "batches": n_batches,
+            "mean_batch_size": rows / n_batches if n_batches else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "in_flight_batches": self.in_flight,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "latency_ms": percentiles,
+        }
+
+
+class ScoringService:
+    """HTTP front end: preprocesses each application and scores it through a ``MicroBatcher``.
+
+    ``executor`` is ``"thread"`` (the default; NumPy and XGBoost release the
+    GIL while scoring) or ``"process"``, with ``workers`` of either.
+    """
+
+    def __init__(self, model, preprocessor, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, workers=1, executor="thread", flat=True, name=None):
+        self.preprocessor = preprocessor
+        self.predictor = Predictor(model, preprocessor.feature_names_, flat=flat)
+        self.name = name or type(model).__name__
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.workers = workers
+        self.executor_kind = executor
+        self.batcher = None
+        self._executor = None
+
+    def _make_executor(self):
+        if self.executor_kind == "process":
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.predictor,))
+            return _predict_batch
+        self._executor = ThreadPoolExecutor(self.workers)
+        return self.predictor
+
+    async def score_one(self, record):
+        row = self.preprocessor.transform_record(record)
+        try:
+            proba = await self.batcher.submit(row)
+        except Exception as exc:
+            # The model failed, not the request: keep it out of the 400 handling in _route
+            raise RuntimeError(f"{self.name} failed to score: {type(exc).__name__}: {exc}") from exc
+        result = {"certified_proba": proba, "case_status_pred": LABELS[proba >= self.predictor.threshold]}
+        if "case_id" in record:
+            result = {"case_id": record["case_id"], **result}
+        return result
+
+    async def _route(self, method, path, body):
+        if path == "/score":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                payload = json.loads(body)
+                if isinstance(payload, list):
+                    return 200, list(await asyncio.gather(*(self.score_one(record) for record in payload)))
+                return 200, await self.score_one(payload)
+            except KeyError as exc:
+                return 400, {"error": f"missing field {exc}"}
+            except (ValueError, TypeError, AttributeError) as exc:
+                return 400, {"error": str(exc)}
+        if path == "/metrics":
+            return 200, self.batcher.metrics()
+        if path == "/health":
+            return 200, {"status": "ok", "model": self.name}
+        return 404, {"error": f"unknown path {path}"}
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self._route(method, path.split("?")[0], body)
+                except Exception as exc:
+                    # e.g. a broken worker pool: answer this request and keep the connection
+                    status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                data = json.dumps(payload).encode()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                head = f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                head += f"Content-Length: {len(data)}\r\n"
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode() + b"\r\n" + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down with the connection still open; ending the
+            # handler normally keeps asyncio from logging the cancellation
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        """Serve until cancelled; ``ready`` (an ``asyncio.Event``) is set once listening."""
+        predict = self._make_executor()
+        self.batcher = MicroBatcher(predict, self._executor, self.max_batch_size, self.max_wait_ms,
+                                    max_in_flight=self.workers).start()
+        server = await asyncio.start_server(self._handle, host, port)
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _post(reader, writer, body):
+    writer.write(b"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return await reader.readexactly(length)
+
+
+async def load_test(records, host=DEFAULT_HOST, port=DEFAULT_PORT, concurrency=8, n_requests=2000):
+    """Send ``n_requests`` single-application requests from ``concurrency`` keep-alive clients.
+
+    Returns throughput and client-side latency percentiles in milliseconds.
+    """
+    bodies = [json.dumps(record).encode() for record in records]
+    latencies = []
+    counter = iter(range(n_requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                start = time.perf_counter()
+                await _post(reader, writer, bodies[i % len(bodies)])
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def _records(path, n):
+    from easyvisa.score import iter_input_chunks
+
+    frame = next(iter_input_chunks(path, chunksize=n))
+    frame = frame.drop(columns=["case_status"], errors="ignore")
+    return json.loads(frame.astype(object).to_json(orient="records"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP scoring server for visa applications.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="score applications over HTTP")
+    serve.add_argument("--model", required=True, help="joblib file with a fitted model or a dict of models")
+    serve.add_argument("--model-name", help="key to use when --model holds a dict of models")
+    serve.add_argument("--preprocessor", required=True, help="joblib file with a fitted VisaPreprocessor")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    serve.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    serve.add_argument("--workers", type=int, default=1, help="batches scored concurrently")
+    serve.add_argument("--executor", choices=["thread", "process"], default="thread")
+    serve.add_argument("--no-flat", action="store_true", help="score with the model itself, not its flattened trees")
+    bench = commands.add_parser("bench", help="load-test a running server")
+    bench.add_argument("data", help="CSV or Parquet file of applications to send")
+    bench.add_argument("--host", default=DEFAULT_HOST)
+    bench.add_argument("--port", type=int, default=DEFAULT_PORT)
+    bench.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    bench.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from easyvisa.preprocess import VisaPreprocessor
+        from easyvisa.score import load_model
+
+        service = ScoringService(
+            load_model(args.model, args.model_name),
+            VisaPreprocessor.load(args.preprocessor),
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            workers=args.workers,
+            executor=args.executor,
+            flat=not args.no_flat,
+            name=args.model_name,
+        )
+        print(f"Serving {service.name} on http://{args.host}:{args.port}")
+        try:
+            asyncio.run(service.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        records = _records(args.data, 1000)
+        for concurrency in args.concurrency:
+            result = asyncio.run(load_test(records, args.host, args.port, concurrency, args.requests))
+            print(f"{concurrency:>4} clients: {result['throughput_rps']:.0f} req/s, "
+                  f"p50 {result['latency_p50_ms']:.2f}ms, p99 {result['latency_p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Streaming, mergeable quantile sketches for out-of-core outlier capping.
+
+``KLLSketch`` implements the KLL sketch (Karnin, Lang and Liberty, 2016).
+Values are added in NumPy chunks; whenever a level outgrows its capacity it
+is sorted and every other item (from a random offset) is promoted to the
+next level with twice the weight. Memory stays ``O(k)`` whatever the stream
+length, and sketches built on different partitions or workers merge into
+the sketch of their union.
+
+Error bound: with probability about 99% the rank of any returned quantile is
+within ``normalized_rank_error(k)`` of the requested one, i.e. about 1.3% of
+``n`` at the default ``k=200`` and 0.3% at ``k=1000``. The formula is the
+empirical fit published with Apache DataSketches' KLL implementation.
+"""
+
+import numpy as np
+
+DEFAULT_K = 200
+
+
+def normalized_rank_error(k=DEFAULT_K):
+    """Single-quantile rank error (as a fraction of n) at 99% confidence."""
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """Approximate quantiles of a stream of floats in ``O(k)`` memory."""
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the promoted pairs stay exact
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[: len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add a chunk of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one; the result summarizes both streams."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Approximate ``q``-quantile(s); ``q`` may be a scalar or an array."""
+        if self.n == 0:
+            raise ValueError("quantile of an empty sketch")
+        items, cumulative = self._weighted()
+        q = np.asarray(q, dtype=np.float64)
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        result = items[np.minimum(index, len(items) - 1)]
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return float(result) if result.ndim == 0 else result
+
+    def cdf(self, values):
+        """Approximate fraction of the stream ``<=`` each of ``values``."""
+        items, cumulative = self._weighted()
+        index = np.searchsorted(items, np.asarray(values, dtype=np.float64), side="right")
+        return np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0) / cumulative[-1]
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def num_retained(self):
+        return sum(len(level) for level in self.levels)
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "min": self.min, "max": self.max,
+                "levels": [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, state, seed=None):
+        sketch = cls(state["k"], seed=seed)
+        sketch.n, sketch.min, sketch.max = state["n"], state["min"], state["max"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in state["levels"]]
+        return sketch
+
+
+def build_sketches(chunks, columns, k=DEFAULT_K, seed=None):
+    """One ``KLLSketch`` per column, built chunk by chunk from an iterable of frames."""
+    sketches = {col: KLLSketch(k, seed=seed) for col in columns}
+    for chunk in chunks:
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col].to_numpy())
+    return sketches
+
+
+def merge_sketches(partials):
+    """Merge per-partition ``{column: KLLSketch}`` dicts into one."""
+    partials = list(partials)
+    merged = partials[0]
+    for partial in partials[1:]:
+        for col, sketch in partial.items():
+            merged[col].merge(sketch)
+    return merged
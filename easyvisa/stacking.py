@@ -0,0 +1,228 @@
+"""Stacking over cached out-of-fold predictions.
+
+sklearn's ``StackingClassifier`` refits every base model ``k + 1`` times on
+each ``fit``. ``CachedStackingClassifier`` computes each base model's
+out-of-fold Certified probabilities once and stores them in an ``OOFCache``
+on disk. The cache key is a canonical serialization of the model's class,
+parameters (nested estimators included) and library version, plus a
+fingerprint of the training data and folds. The meta-learner then trains on
+the cached columns.
+
+Adding or swapping a base learner costs only that learner's folds; refitting
+with the same learners and data costs only the meta-learner. Base models
+that are already fitted (the notebook's ``rf``, ``gb``, ...) are reused for
+prediction rather than refitted on the full training set.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.exceptions import NotFittedError
+from sklearn.utils.validation import check_is_fitted
+
+from easyvisa.cv import make_folds
+from easyvisa.inference import certified_labels
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import stage
+from easyvisa.score import certified_proba
+
+DEFAULT_CACHE_DIR = ".easyvisa_oof"
+
+
+def _qualname(obj):
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def _library_version(cls):
+    return str(getattr(sys.modules.get(cls.__module__.split(".")[0]), "__version__", ""))
+
+
+def _canonical(value):
+    """JSON-ready form of a parameter value that does not depend on ``repr``."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return repr(value)  # keeps nan/inf and the exact value
+    if isinstance(value, np.generic):
+        return _canonical(value.item())
+    if hasattr(value, "get_params") and not isinstance(value, type):
+        return {"estimator": _qualname(type(value)), "version": _library_version(type(value)),
+                "params": {key: _canonical(param) for key, param in sorted(value.get_params(deep=False).items())}}
+    if isinstance(value, dict):
+        return {"dict": [[_canonical(key), _canonical(item)] for key, item in sorted(value.items(), key=repr)]}
+    if isinstance(value, (list, tuple)):
+        return {type(value).__name__: [_canonical(item) for item in value]}
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return {"ndarray": [value.dtype.str, list(value.shape),
+                            hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()]}
+    if isinstance(value, type) or (callable(value) and hasattr(value, "__qualname__")):
+        return {"callable": _qualname(value)}
+    # Anything else (random states, object arrays, ...) by the hash of its pickle
+    return {"pickle": _qualname(type(value)), "sha": hashlib.blake2b(pickle.dumps(value), digest_size=16).hexdigest()}
+
+
+def model_key(estimator):
+    """Stable hash of an estimator's class, library version and (nested) parameters.
+
+    Parameters are serialized canonically (see ``_canonical``): nested
+    estimators recurse into their own parameters and arrays are hashed by
+    dtype, shape and bytes, so the key neither collides on truncated reprs
+    nor misses when a library changes how it prints a value. A new version
+    of the estimator's library gives a new key.
+    """
+    text = json.dumps(_canonical(estimator), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode(), digest_size=10).hexdigest()
+
+
+def data_fingerprint(X, y, folds):
+    """Hash of the feature matrix, column names, target and fold assignment."""
+    digest = hashlib.blake2b(digest_size=10)
+    digest.update(repr(list(getattr(X, "columns", []))).encode())
+    digest.update(np.ascontiguousarray(X, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(y, dtype=np.int8).tobytes())
+    for _, val in folds:
+        digest.update(np.ascontiguousarray(val, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+class OOFCache:
+    """Out-of-fold probability vectors stored as ``.npy`` files in ``directory``."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key, fingerprint):
+        return os.path.join(self.directory, f"{key}-{fingerprint}.npy")
+
+    def get(self, key, fingerprint):
+        path = self.path(key, fingerprint)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.load(path)
+
+    def put(self, key, fingerprint, oof):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key, fingerprint)
+        # Write then rename so an interrupted run never leaves a truncated entry
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, oof)
+        os.replace(tmp_path, path)
+        return path
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def _rows(X, index):
+    return X.iloc[index] if hasattr(X, "iloc") else X[index]
+
+
+def out_of_fold_proba(estimator, X, y, folds, name=None):
+    """Certified probability of every row from a clone fitted without that row's fold."""
+    oof = np.empty(len(y), dtype=np.float64)
+    for i, (train, val) in enumerate(folds):
+        model = clone(estimator)
+        with stage("fit", model=name or type(estimator).__name__, fold=i, rows=len(train)):
+            model.fit(_rows(X, train), y[train])
+        oof[val] = certified_proba(model, _rows(X, val))
+    return oof
+
+
+def _cached_oof(cache, estimator, X, y, folds, fingerprint, name=None):
+    key = model_key(estimator)
+    oof = cache.get(key, fingerprint)
+    if oof is None:
+        oof = out_of_fold_proba(estimator, X, y, folds, name)
+        cache.put(key, fingerprint, oof)
+    return oof
+
+
+def cached_oof_proba(estimator, X, y, cv=5, random_state=42, cache_dir=DEFAULT_CACHE_DIR, name=None):
+    """Out-of-fold Certified probabilities of ``estimator``, from the cache when possible.
+
+    Uses the same folds and cache as ``CachedStackingClassifier``, so models
+    already stacked with the same settings cost nothing here.
+    """
+    y = encode_target(y)
+    folds = make_folds(y, cv, random_state)
+    return _cached_oof(OOFCache(cache_dir), estimator, X, y, folds, data_fingerprint(X, y, folds), name)
+
+
+def _is_fitted(estimator):
+    try:
+        check_is_fitted(estimator)
+    except NotFittedError:
+        return False
+    return True
+
+
+class CachedStackingClassifier(ClassifierMixin, BaseEstimator):
+    """Stacking classifier whose base-model out-of-fold predictions are cached on disk.
+
+    ``estimators`` is a list of ``(name, estimator)``. With
+    ``reuse_fitted=True`` an already fitted estimator is assumed to have been
+    trained on the ``X`` passed to ``fit`` and is used as is; otherwise a
+    clone is fitted on all of ``X``. Labels are the canonical 0/1 target.
+    """
+
+    def __init__(self, estimators, final_estimator=None, cv=5, cache_dir=DEFAULT_CACHE_DIR,
+                 random_state=42, reuse_fitted=True):
+        self.estimators = estimators
+        self.final_estimator = final_estimator
+        self.cv = cv
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+        self.reuse_fitted = reuse_fitted
+
+    def fit(self, X, y):
+        y = encode_target(y)
+        folds = make_folds(y, self.cv, self.random_state)
+        fingerprint = data_fingerprint(X, y, folds)
+        cache = OOFCache(self.cache_dir)
+
+        columns = []
+        self.estimators_ = []
+        with stage("stacking.fit", rows=len(y), models=len(self.estimators)):
+            for name, estimator in self.estimators:
+                columns.append(_cached_oof(cache, estimator, X, y, folds, fingerprint, name))
+
+                if not (self.reuse_fitted and _is_fitted(estimator)):
+                    estimator = clone(estimator)
+                    with stage("fit", model=name, rows=len(y)):
+                        estimator.fit(X, y)
+                self.estimators_.append((name, estimator))
+
+            if self.final_estimator is None:
+                from sklearn.linear_model import LogisticRegression
+
+                self.final_estimator_ = LogisticRegression()
+            else:
+                self.final_estimator_ = clone(self.final_estimator)
+            self.final_estimator_.fit(np.column_stack(columns), y)
+
+        self.classes_ = np.array([0, 1])
+        self.cache_hits_, self.cache_misses_ = cache.hits, cache.misses
+        return self
+
+    def transform(self, X):
+        """Base-model Certified probabilities, one column per estimator."""
+        return np.column_stack([certified_proba(estimator, X) for _, estimator in self.estimators_])
+
+    def predict_proba(self, X):
+        return self.final_estimator_.predict_proba(self.transform(X))
+
+    def predict(self, X, threshold=0.5):
+        """Certified (1) when the stacked probability is at least ``threshold``, else Denied (0)."""
+        return self.classes_[certified_labels(self.predict_proba(X)[:, 1], threshold)]
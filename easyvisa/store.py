@@ -0,0 +1,257 @@
+"""Compact in-memory store of the EasyVisa table.
+
+The notebook keeps ``data``, a full ``data_encoded`` copy for the correlation
+matrix, ``X``, the train/test frames, their encoded copies and three
+versions of the target. ``FeatureStore`` holds the table once:
+
+- categoricals as ``int8`` codes in ``ingest.CATEGORIES`` order (missing is -1),
+- Y/N flags packed eight to a byte with ``np.packbits``, plus a packed
+  mask of missing values for flags that have any,
+- numerics downcast (``float32`` wage, ``int32`` employees, ``int16`` year),
+- one canonical 0/1 target (1 = Certified, as ``encode_target``),
+- ``case_id`` as fixed-width bytes.
+
+Splits and folds are arrays of row positions. Nothing is copied until a
+consumer asks for the rows it needs with ``frame``, ``features`` or ``y``.
+Contiguous ranges (a ``slice``) and ``rows=None`` come back as views.
+"""
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.ingest import CATEGORIES, COLUMNS, FLAG_COLUMNS, flag_codes
+from easyvisa.preprocess import UNKNOWN_CODE, code_dtype, encode_target
+
+FEATURE_CATEGORICALS = [col for col in COLUMNS if col in CATEGORIES and col != "case_status"]
+
+STORE_DTYPES = {
+    "no_of_employees": np.int32,
+    "yr_of_estab": np.int16,
+    "prevailing_wage": np.float32,
+}
+
+
+def _category_codes(values, categories):
+    if isinstance(values.dtype, pd.CategoricalDtype) and list(values.cat.categories) == categories:
+        return values.cat.codes.to_numpy().astype(np.int8)
+    return pd.Categorical(values, categories=categories).codes.astype(np.int8)
+
+
+def _read_bits(packed, n_rows, rows=None):
+    if rows is None:
+        return np.unpackbits(packed, count=n_rows).view(bool)
+    if isinstance(rows, slice):
+        rows = np.arange(n_rows)[rows]
+    rows = np.asarray(rows)
+    return ((packed[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1).view(bool)
+
+
+class FeatureStore:
+    """One compact copy of the table; splits are row-position arrays into it."""
+
+    def __init__(self, codes, flags, numerics, target, case_id=None, n_rows=None, flag_missing=None):
+        self.codes = codes
+        self.flags = flags
+        # Packed missing-value masks, only for flags with missing values
+        self.flag_missing = flag_missing or {}
+        self.numerics = numerics
+        self.target = target
+        self.case_id = case_id
+        self.n_rows = len(target) if n_rows is None else n_rows
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build from a frame with the ingest schema (e.g. ``load_visa_data``)."""
+        flag_values = {col: flag_codes(frame[col]) for col in FLAG_COLUMNS}
+        return cls(
+            codes={col: _category_codes(frame[col], CATEGORIES[col]) for col in FEATURE_CATEGORICALS},
+            flags={col: np.packbits(codes == 1) for col, codes in flag_values.items()},
+            numerics={col: frame[col].to_numpy().astype(dtype) for col, dtype in STORE_DTYPES.items()},
+            target=encode_target(frame["case_status"]),
+            case_id=np.asarray(frame["case_id"].astype(str), dtype="S") if "case_id" in frame.columns else None,
+            n_rows=len(frame),
+            flag_missing={col: np.packbits(codes < 0) for col, codes in flag_values.items() if (codes < 0).any()},
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build from an iterable of typed frames, e.g. ``ingest.iter_visa_chunks``.
+
+        Only one raw chunk is held at a time, so the peak is the compact store
+        plus a chunk rather than the full DataFrame.
+        """
+        parts = [cls.from_frame(chunk) for chunk in chunks]
+        if not parts:
+            raise ValueError("no chunks to build a FeatureStore from")
+        n_rows = sum(part.n_rows for part in parts)
+        flags, flag_missing = {}, {}
+        for col in FLAG_COLUMNS:
+            bits = np.concatenate([np.unpackbits(part.flags[col], count=part.n_rows) for part in parts])
+            flags[col] = np.packbits(bits)
+            if any(col in part.flag_missing for part in parts):
+                flag_missing[col] = np.packbits(np.concatenate([
+                    _read_bits(part.flag_missing[col], part.n_rows) if col in part.flag_missing
+                    else np.zeros(part.n_rows, dtype=bool) for part in parts]))
+        case_ids = [part.case_id for part in parts]
+        return cls(
+            codes={col: np.concatenate([part.codes[col] for part in parts]) for col in FEATURE_CATEGORICALS},
+            flags=flags,
+            numerics={col: np.concatenate([part.numerics[col] for part in parts]) for col in STORE_DTYPES},
+            target=np.concatenate([part.target for part in parts]),
+            case_id=None if any(ids is None for ids in case_ids) else np.concatenate(case_ids),
+            n_rows=n_rows,
+            flag_missing=flag_missing,
+        )
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def nbytes(self):
+        arrays = [*self.codes.values(), *self.flags.values(), *self.flag_missing.values(), *self.numerics.values(),
+                  self.target]
+        if self.case_id is not None:
+            arrays.append(self.case_id)
+        return sum(array.nbytes for array in arrays)
+
+    def memory_usage_mb(self):
+        """Footprint in megabytes, comparable to ``ingest.memory_usage_mb``."""
+        return self.nbytes / 2**20
+
+    def flag(self, col, rows=None):
+        """Boolean values of flag ``col``; bits are read only for ``rows``. Missing values read as False."""
+        return _read_bits(self.flags[col], self.n_rows, rows)
+
+    def flag_missing_mask(self, col, rows=None):
+        """True where flag ``col`` is missing, or None if it has no missing values."""
+        if col not in self.flag_missing:
+            return None
+        return _read_bits(self.flag_missing[col], self.n_rows, rows)
+
+    def flag_codes(self, col, rows=None):
+        """``int8`` codes of flag ``col``: 1/0, and ``UNKNOWN_CODE`` where missing."""
+        codes = self.flag(col, rows).view(np.int8)
+        missing = self.flag_missing_mask(col, rows)
+        if missing is not None:
+            codes = np.where(missing, np.int8(UNKNOWN_CODE), codes)
+        return codes
+
+    def column(self, col, rows=None):
+        """Raw stored values of ``col`` (codes, booleans or numbers) for ``rows``."""
+        if col in FLAG_COLUMNS:
+            return self.flag(col, rows)
+        if col == "case_status":
+            values = self.target
+        elif col == "case_id":
+            values = self.case_id
+        else:
+            values = self.codes[col] if col in self.codes else self.numerics[col]
+        return values if rows is None else values[rows]
+
+    def y(self, rows=None):
+        """Canonical 0/1 target (1 = Certified) for ``rows``."""
+        return self.column("case_status", rows)
+
+    def frame(self, rows=None, columns=None):
+        """Rows as a frame with the ingest schema (categoricals, booleans, numbers).
+
+        ``case_status`` comes back as the ``Certified``/``Denied`` categorical
+        so the result can feed anything that takes ``load_visa_data`` output.
+        """
+        columns = [col for col in COLUMNS if col != "case_id" or self.case_id is not None] if columns is None else columns
+        result = {}
+        for col in columns:
+            values = self.column(col, rows)
+            if col == "case_status":
+                values = pd.Categorical.from_codes(1 - values, dtype=pd.CategoricalDtype(CATEGORIES[col]))
+            elif col in self.codes:
+                values = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(CATEGORIES[col]))
+            elif col == "case_id":
+                values = pd.array(values.astype(str), dtype="string")
+            elif col in self.flag_missing:
+                values = pd.arrays.BooleanArray(values, self.flag_missing_mask(col, rows))
+            result[col] = values
+        return pd.DataFrame(result, copy=False)
+
+    def numeric_frame(self, rows=None):
+        """Flags, numerics and the 0/1 target as numbers, e.g. for a correlation matrix.
+
+        Flags with missing values come back as floats with NaN where missing.
+        """
+        columns = [col for col in COLUMNS if col in FLAG_COLUMNS or col in STORE_DTYPES]
+        result = {}
+        for col in columns:
+            values = self.column(col, rows)
+            if col in FLAG_COLUMNS:
+                missing = self.flag_missing_mask(col, rows)
+                values = values.astype(np.int8) if missing is None else np.where(missing, np.nan, values)
+            result[col] = values
+        result["case_status"] = self.y(rows)
+        return pd.DataFrame(result, copy=False)
+
+    def features(self, rows=None, preprocessor=None):
+        """Model inputs for ``rows``.
+
+        With a fitted ``VisaPreprocessor`` its feature order, category codes
+        and caps are applied straight to the stored arrays, so the result
+        matches ``preprocessor.transform`` without an intermediate frame.
+        Without one, the stored codes and values are returned as they are.
+        """
+        names = [col for col in COLUMNS if col not in ("case_id", "case_status")]
+        if preprocessor is not None:
+            names = preprocessor.feature_names_
+        result = {}
+        for col in names:
+            values = self.column(col, rows)
+            if col in FLAG_COLUMNS:
+                values = self.flag_codes(col, rows)
+            elif preprocessor is not None and col in preprocessor.category_index_:
+                index = preprocessor.category_index_[col]
+                # Stored code -> preprocessor code; the trailing entry catches missing (-1)
+                lut = np.array([index.get(c, UNKNOWN_CODE) for c in CATEGORIES[col]] + [UNKNOWN_CODE],
+                               dtype=code_dtype(len(index)))
+                values = lut[values]
+            elif preprocessor is not None and col in preprocessor.caps_:
+                values = np.minimum(values, preprocessor.caps_[col])
+            result[col] = values
+        return pd.DataFrame(result, copy=False)
+
+    def split(self, test_size=0.2, random_state=42, stratify=True):
+        """Train and test row positions, as ``train_test_split`` would draw them."""
+        from sklearn.model_selection import train_test_split
+
+        # Stratify on the status codes (Certified = 0) so the draw matches
+        # splitting the frame on its Certified/Denied labels
+        status = 1 - self.target
+        return train_test_split(np.arange(self.n_rows), test_size=test_size, random_state=random_state,
+                                stratify=status if stratify else None)
+
+    def folds(self, rows=None, n_splits=5, random_state=42):
+        """Stratified ``(train, validation)`` row positions within ``rows``."""
+        from sklearn.model_selection import StratifiedKFold
+
+        rows = np.arange(self.n_rows) if rows is None else np.asarray(rows)
+        y = self.y(rows)
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        return [(rows[train], rows[val]) for train, val in splitter.split(np.zeros((len(rows), 1)), y)]
+
+    def save(self, path):
+        arrays = {"target": self.target}
+        arrays.update({f"code.{col}": values for col, values in self.codes.items()})
+        arrays.update({f"flag.{col}": values for col, values in self.flags.items()})
+        arrays.update({f"flagna.{col}": values for col, values in self.flag_missing.items()})
+        arrays.update({f"num.{col}": values for col, values in self.numerics.items()})
+        if self.case_id is not None:
+            arrays["case_id"] = self.case_id
+        np.savez(path, n_rows=np.array(self.n_rows), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            def group(prefix):
+                return {key[len(prefix):]: arrays[key] for key in arrays.files if key.startswith(prefix)}
+
+            return cls(group("code."), group("flag."), group("num."), arrays["target"],
+                       arrays["case_id"] if "case_id" in arrays.files else None, int(arrays["n_rows"]),
+                       group("flagna."))
@@ -0,0 +1,223 @@
+"""Schema-preserving synthetic EasyVisa data for scaling tests.
+
+The real dataset is confidential, so performance work needs stand-in data
+with the same schema and roughly the same structure. ``SyntheticVisaGenerator``
+learns only aggregate statistics from a real file:
+
+- the joint frequencies of education, continent, unit of wage and job
+  experience (the breakdowns the notebook explores),
+- the certification rate in each of those cells, smoothed toward the
+  overall rate,
+- marginal frequencies of the remaining categoricals, flags and
+  establishment years,
+- quantile grids of ``prevailing_wage`` per unit of wage and case status,
+  and of ``no_of_employees``, dense in the upper tail so the long tails
+  survive.
+
+The fitted spec is a small JSON file that can be shared without the data.
+Rows are generated in vectorized chunks, each seeded from ``(seed, chunk
+index)``, so a given seed always yields the same file.
+
+Usage::
+
+    python -m easyvisa.synth fit EasyVisa.csv visa_spec.json
+    python -m easyvisa.synth generate visa_spec.json synthetic.parquet --rows 10000000
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.ingest import CATEGORIES, COLUMNS, DEFAULT_CHUNKSIZE, FLAG_COLUMNS, NUMERIC_DTYPES, flag_codes
+
+KEY_FEATURES = ["education_of_employee", "continent", "unit_of_wage", "has_job_experience"]
+OTHER_CATEGORICALS = ["region_of_employment"]
+OTHER_FLAGS = [col for col in FLAG_COLUMNS if col not in KEY_FEATURES]
+
+# Quantile levels for the numeric grids: even steps to 99%, then geometric into the tail
+QUANTILE_LEVELS = np.concatenate([np.linspace(0, 0.99, 199), 1 - np.geomspace(0.01, 1e-5, 30)[1:], [1.0]])
+
+
+def _levels(col):
+    return [False, True] if col in FLAG_COLUMNS else CATEGORIES[col]
+
+
+def _codes(frame, col):
+    """Integer codes of ``col``; -1 marks missing values."""
+    values = frame[col]
+    if col in FLAG_COLUMNS:
+        return flag_codes(values).astype(np.int64)
+    return values.astype(pd.CategoricalDtype(CATEGORIES[col])).cat.codes.to_numpy().astype(np.int64)
+
+
+def _marginal(codes, n_levels):
+    counts = np.bincount(codes[codes >= 0], minlength=n_levels)
+    return (counts / max(counts.sum(), 1)).tolist()
+
+
+def _quantile_grid(values):
+    values = values[~np.isnan(values)]
+    return np.quantile(values, QUANTILE_LEVELS).tolist() if len(values) else None
+
+
+class SyntheticVisaGenerator:
+    """Fits aggregate EasyVisa statistics and samples schema-identical rows from them."""
+
+    def __init__(self, smoothing=20.0):
+        self.smoothing = smoothing
+
+    def fit(self, frame):
+        shape = [len(_levels(col)) for col in KEY_FEATURES]
+        key_codes = np.array([_codes(frame, col) for col in KEY_FEATURES])
+        status = _codes(frame, "case_status")
+        # Cell statistics come from rows whose key features and status are all known
+        complete = (key_codes >= 0).all(axis=0) & (status >= 0)
+        key = np.ravel_multi_index(key_codes[:, complete], shape)
+        certified = status[complete] == 0
+        cell_rows = np.bincount(key, minlength=np.prod(shape))
+        cell_certified = np.bincount(key, weights=certified, minlength=np.prod(shape))
+        overall = certified.mean()
+
+        unit = key_codes[KEY_FEATURES.index("unit_of_wage"), complete]
+        wage = frame["prevailing_wage"].to_numpy(dtype=np.float64)[complete]
+        years, year_counts = np.unique(frame["yr_of_estab"].to_numpy(), return_counts=True)
+        self.spec_ = {
+            "n_rows": len(frame),
+            "key_features": KEY_FEATURES,
+            "key_probabilities": (cell_rows / cell_rows.sum()).tolist(),
+            "certified_rate": ((cell_certified + self.smoothing * overall) / (cell_rows + self.smoothing)).tolist(),
+            "marginals": {col: _marginal(_codes(frame, col), len(_levels(col)))
+                          for col in OTHER_CATEGORICALS + OTHER_FLAGS},
+            "yr_of_estab": {"values": years.tolist(), "probabilities": (year_counts / len(frame)).tolist()},
+            "no_of_employees": _quantile_grid(frame["no_of_employees"].to_numpy(dtype=np.float64)),
+            # wage_grids[unit][status]: status 0 = Certified, 1 = Denied
+            "wage_grids": [
+                [_quantile_grid(wage[(unit == u) & (certified == (s == 0))]) or _quantile_grid(wage[unit == u])
+                 for s in range(2)]
+                for u in range(len(CATEGORIES["unit_of_wage"]))
+            ],
+        }
+        return self
+
+    def _sample_grid(self, rng, grid, n):
+        return np.interp(rng.random(n), QUANTILE_LEVELS, grid) if grid is not None else np.full(n, np.nan)
+
+    def sample(self, n, rng):
+        """``n`` synthetic rows as a frame with the ingest schema (minus ``case_id``)."""
+        spec = self.spec_
+        shape = [len(_levels(col)) for col in KEY_FEATURES]
+        key = rng.choice(len(spec["key_probabilities"]), size=n, p=spec["key_probabilities"])
+        certified = rng.random(n) < np.asarray(spec["certified_rate"])[key]
+        key_codes = dict(zip(KEY_FEATURES, np.unravel_index(key, shape)))
+
+        columns = {}
+        for col in COLUMNS:
+            if col == "case_id":
+                continue
+            if col in key_codes or col in spec["marginals"]:
+                if col in key_codes:
+                    codes = key_codes[col]
+                else:
+                    codes = rng.choice(len(spec["marginals"][col]), size=n, p=spec["marginals"][col])
+                if col in FLAG_COLUMNS:
+                    columns[col] = codes.astype(bool)
+                else:
+                    columns[col] = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(CATEGORIES[col]))
+            elif col == "case_status":
+                columns[col] = pd.Categorical.from_codes((~certified).astype(np.int8),
+                                                         dtype=pd.CategoricalDtype(CATEGORIES[col]))
+            elif col == "prevailing_wage":
+                wage = np.empty(n)
+                unit = key_codes["unit_of_wage"]
+                for u, grids in enumerate(spec["wage_grids"]):
+                    for s, grid in enumerate(grids):
+                        rows = np.flatnonzero((unit == u) & (certified == (s == 0)))
+                        wage[rows] = self._sample_grid(rng, grid, len(rows))
+                columns[col] = np.round(wage, 2)
+            elif col == "no_of_employees":
+                columns[col] = np.round(self._sample_grid(rng, spec["no_of_employees"], n))
+            elif col == "yr_of_estab":
+                years = spec["yr_of_estab"]
+                columns[col] = rng.choice(years["values"], size=n, p=years["probabilities"])
+        frame = pd.DataFrame(columns)
+        for col, dtype in NUMERIC_DTYPES.items():
+            frame[col] = frame[col].astype(dtype)
+        return frame
+
+    def iter_chunks(self, n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=0):
+        """Yield ``n_rows`` rows in chunks; chunk ``i`` is drawn from ``default_rng([seed, i])``."""
+        for index, start in enumerate(range(0, n_rows, chunksize)):
+            n = min(chunksize, n_rows - start)
+            frame = self.sample(n, np.random.default_rng([seed, index]))
+            case_id = pd.Series(np.arange(start + 1, start + n + 1)).astype(str)
+            frame.insert(0, "case_id", ("EZYV" + case_id).astype("string"))
+            yield frame
+
+    def generate(self, n_rows, seed=0):
+        """``n_rows`` rows in one frame; use ``write`` for anything large."""
+        return pd.concat(self.iter_chunks(n_rows, seed=seed), ignore_index=True)
+
+    def write(self, path, n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=0):
+        """Stream ``n_rows`` rows to a ``.parquet`` (ingest cache schema) or ``.csv`` (raw Y/N) file."""
+        writer = None
+        try:
+            for i, chunk in enumerate(self.iter_chunks(n_rows, chunksize, seed)):
+                if path.endswith(".parquet"):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                else:
+                    for col in FLAG_COLUMNS:
+                        chunk[col] = np.where(chunk[col].to_numpy(), "Y", "N")
+                    chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        finally:
+            if writer is not None:
+                writer.close()
+        return path
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"smoothing": self.smoothing, "spec": self.spec_}, f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        generator = cls(state["smoothing"])
+        generator.spec_ = state["spec"]
+        return generator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit or sample synthetic EasyVisa data.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("fit", help="learn a shareable spec from a real EasyVisa CSV")
+    fit.add_argument("data")
+    fit.add_argument("spec")
+    generate = commands.add_parser("generate", help="write synthetic rows from a spec")
+    generate.add_argument("spec")
+    generate.add_argument("output", help=".parquet or .csv")
+    generate.add_argument("--rows", type=int, default=1_000_000)
+    generate.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    generate.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "fit":
+        from easyvisa.ingest import load_visa_data
+
+        SyntheticVisaGenerator().fit(load_visa_data(args.data)).save(args.spec)
+        print(f"Wrote spec to {args.spec}")
+    else:
+        SyntheticVisaGenerator.load(args.spec).write(args.output, args.rows, args.chunksize, args.seed)
+        print(f"Wrote {args.rows} synthetic rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
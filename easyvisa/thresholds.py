@@ -0,0 +1,133 @@
+"""Decision-threshold tuning over predicted probabilities.
+
+``threshold_sweep`` evaluates every distinct probability as a cut-off in one
+sort and cumulative sum (``evaluation.ranking_curve``), so the whole
+precision/recall trade-off costs ``O(n log n)`` rather than one metric call
+per candidate. ``optimize_threshold`` picks the cut-off that maximizes
+F-beta or minimizes a misclassification cost. ``ThresholdedClassifier``
+stores that cut-off with the fitted model, and ``easyvisa.score`` and
+``easyvisa.inference`` apply it when they score.
+
+A false negative here is a qualified (Certified) applicant predicted Denied.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+from easyvisa.evaluation import ranking_curve
+from easyvisa.inference import certified_labels
+from easyvisa.preprocess import encode_target
+from easyvisa.score import certified_proba
+
+
+def threshold_sweep(y_true, proba):
+    """Confusion counts for every candidate threshold, highest threshold first.
+
+    Row ``i`` describes predicting Certified whenever the probability is
+    above ``threshold[i]``. Cut-offs lie halfway between consecutive distinct
+    probabilities, so ``>`` and ``>=`` agree on ``proba``. The first row
+    (``threshold=inf``) predicts nobody Certified.
+    """
+    y_true = encode_target(y_true)
+    tps, fps, scores = ranking_curve(y_true, proba)
+    thresholds = (scores + np.r_[scores[1:], scores[-1]]) / 2
+    # Just below the lowest score: halving the gap to its float neighbour
+    # would round back onto 0 and leave 0-probability rows Denied
+    thresholds[-1] = np.nextafter(scores[-1], -np.inf)
+    tp = np.r_[0, tps]
+    fp = np.r_[0, fps]
+    positives, negatives = tp[-1], fp[-1]
+    return {
+        "threshold": np.r_[np.inf, thresholds],
+        "tp": tp,
+        "fp": fp,
+        "fn": positives - tp,
+        "tn": negatives - fp,
+    }
+
+
+@dataclass
+class ThresholdResult:
+    threshold: float
+    objective: str
+    score: float
+    precision: float
+    recall: float
+
+    def __str__(self):
+        return (f"threshold {self.threshold:.4f}: {self.objective} {self.score:.4f} "
+                f"(precision {self.precision:.4f}, recall {self.recall:.4f})")
+
+
+def optimize_threshold(y_true, proba, beta=1.0, fn_cost=None, fp_cost=1.0):
+    """Best Certified-probability cut-off for ``proba``.
+
+    By default the threshold maximizes F-beta (``beta > 1`` favours recall,
+    i.e. fewer qualified applicants wrongly denied). When ``fn_cost`` is
+    given it instead minimizes ``fn_cost * FN + fp_cost * FP`` per row.
+    Ties go to the threshold closest to 0.5.
+    """
+    sweep = threshold_sweep(y_true, proba)
+    tp, fp, fn = sweep["tp"], sweep["fp"], sweep["fn"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        if fn_cost is None:
+            b2 = beta ** 2
+            denominator = (1 + b2) * tp + b2 * fn + fp
+            score = np.where(denominator > 0, (1 + b2) * tp / denominator, 0.0)
+            objective = f"F{beta:g}"
+        else:
+            # Negated so that higher is better, like F-beta
+            score = -(fn_cost * fn + fp_cost * fp) / len(proba)
+            objective = "cost"
+    best = np.flatnonzero(score == score.max())
+    best = best[np.argmin(np.abs(sweep["threshold"][best] - 0.5))]
+    return ThresholdResult(
+        threshold=float(sweep["threshold"][best]),
+        objective=objective,
+        score=float(score[best] if fn_cost is None else -score[best]),
+        precision=float(precision[best]),
+        recall=float(recall[best]),
+    )
+
+
+class ThresholdedClassifier(ClassifierMixin, BaseEstimator):
+    """A fitted classifier plus the Certified-probability cut-off its labels use.
+
+    ``predict`` returns 1 (Certified) when the probability is ``>= threshold``;
+    ``predict_proba`` is the wrapped model's. Save it in place of the model
+    (``joblib.dump``) and batch or flat scoring picks the threshold up.
+    """
+
+    def __init__(self, estimator, threshold=0.5):
+        self.estimator = estimator
+        self.threshold = threshold
+
+    @classmethod
+    def tuned(cls, estimator, X, y, **objective):
+        """Wrap a fitted ``estimator`` with the threshold that is best on ``(X, y)``.
+
+        ``(X, y)`` should be held out from the estimator's training data, or
+        ``X`` replaced by out-of-fold probabilities via ``optimize_threshold``.
+        """
+        result = optimize_threshold(y, certified_proba(estimator, X), **objective)
+        wrapped = cls(estimator, result.threshold)
+        wrapped.result_ = result
+        return wrapped
+
+    def fit(self, X, y, **fit_params):
+        self.estimator.fit(X, y, **fit_params)
+        return self
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def predict_proba(self, X):
+        return self.estimator.predict_proba(X)
+
+    def predict(self, X):
+        return certified_labels(certified_proba(self.estimator, X), self.threshold)
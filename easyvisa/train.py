@@ -0,0 +1,111 @@
+"""Parallel training of the model zoo compared in the notebook.
+
+``train_models`` fits a list of ``(name, estimator)`` specs concurrently in a
+process pool. The encoded training matrix is written once to a ``.npy`` file
+that every worker memory-maps copy-on-write, so the data is neither pickled per
+task nor copied per process; the OS page cache shares one physical copy.
+Each worker gets an equal share of the CPUs for its native threads (OpenMP,
+BLAS, estimators' ``n_jobs``), so XGBoost or a forest in one worker does not
+oversubscribe the machine. The result is a ``{name: fitted model}`` dict,
+ready for ``evaluation.Evaluator.compare``.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from easyvisa.preprocess import encode_target
+from easyvisa.profiling import profiler, stage
+
+
+def default_model_specs(random_state=42):
+    """The models the notebook compares, with its hyperparameters."""
+    from sklearn.ensemble import AdaBoostClassifier, GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+    from xgboost import XGBClassifier
+
+    return [
+        ("Decision Tree", DecisionTreeClassifier(criterion="entropy", random_state=random_state)),
+        ("Pruned Decision Tree", DecisionTreeClassifier(criterion="entropy", random_state=random_state,
+                                                        max_depth=3, min_samples_leaf=5)),
+        ("Random Forest", RandomForestClassifier(n_estimators=100, random_state=random_state)),
+        ("AdaBoost", AdaBoostClassifier(n_estimators=100, random_state=random_state)),
+        ("Gradient Boosting", GradientBoostingClassifier(n_estimators=100, random_state=random_state)),
+        ("XGBoost", XGBClassifier(eval_metric="logloss", random_state=random_state)),
+    ]
+
+
+def share_matrix(X, directory):
+    """Write ``X`` as float32 ``.npy`` under ``directory`` and return its path."""
+    path = os.path.join(directory, "X.npy")
+    np.save(path, np.ascontiguousarray(X, dtype=np.float32))
+    return path
+
+
+def open_shared_matrix(path, columns=None):
+    """Copy-on-write memory map of a matrix written by ``share_matrix``.
+
+    sklearn insists on writeable inputs; pages are still shared until written.
+    """
+    X = np.load(path, mmap_mode="c")
+    if columns is None:
+        return X
+    return pd.DataFrame(X, columns=columns, copy=False)
+
+
+def _fit_one(name, estimator, X_path, y_path, columns, threads):
+    from threadpoolctl import threadpool_limits
+
+    X = open_shared_matrix(X_path, columns)
+    y = np.load(y_path, mmap_mode="c")
+    params = estimator.get_params(deep=False)
+    # n_jobs left at "all cores" (None or negative) is capped for the fit and restored afterwards
+    all_cores = "n_jobs" in params and (params["n_jobs"] is None or params["n_jobs"] < 0)
+    if all_cores:
+        estimator.set_params(n_jobs=threads)
+    start = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        estimator.fit(X, y)
+    seconds = time.perf_counter() - start
+    if all_cores:
+        estimator.set_params(n_jobs=params["n_jobs"])
+    return name, estimator, seconds
+
+
+def train_models(specs, X_train, y_train, n_jobs=None, verbose=True):
+    """Fit every ``(name, estimator)`` in ``specs`` concurrently.
+
+    ``y_train`` is converted to the canonical 0/1 target once so string- and
+    number-label models (XGBoost) train on the same array. Returns
+    ``{name: fitted estimator}`` in ``specs`` order. With enough workers the
+    wall time approaches that of the slowest single model.
+    """
+    specs = list(specs)
+    n_jobs = n_jobs or min(len(specs), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    columns = list(X_train.columns) if hasattr(X_train, "columns") else None
+    workdir = tempfile.mkdtemp(prefix="easyvisa-train-")
+    try:
+        X_path = share_matrix(X_train, workdir)
+        y_path = os.path.join(workdir, "y.npy")
+        np.save(y_path, encode_target(y_train))
+
+        fitted = {}
+        with stage("train_models", rows=len(X_train), models=len(specs)), ProcessPoolExecutor(n_jobs) as pool:
+            futures = [pool.submit(_fit_one, name, estimator, X_path, y_path, columns, threads)
+                       for name, estimator in specs]
+            for future in futures:
+                name, estimator, seconds = future.result()
+                fitted[name] = estimator
+                # The fit ran in a worker, so only its duration comes back
+                profiler.add("fit", seconds, model=name, rows=len(X_train))
+                if verbose:
+                    print(f"Fitted {name} in {seconds:.1f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return fitted
@@ -0,0 +1,241 @@
+"""Budget-aware hyperparameter search.
+
+Two alternatives to the exhaustive ``GridSearchCV`` runs in the notebook:
+
+- ``halving_search`` runs successive halving: every candidate starts with a
+  small budget (a few trees, or a sample of rows) and only the best third
+  moves on to the next, larger round.
+- ``XGBEarlyStoppingSearch`` collapses the ``n_estimators`` axis of an
+  XGBoost grid: each remaining configuration is boosted once on a training
+  fold and stops when the validation fold stops improving.
+
+Both attach a ``TuningReport`` as ``report_`` with the wall-clock spent and
+an estimate of what the exhaustive grid would have cost. The estimate scales
+measured fit times linearly in the number of trees and training rows.
+"""
+
+import itertools
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from easyvisa.profiling import stage
+
+
+@dataclass
+class TuningReport:
+    method: str
+    best_params: dict
+    best_score: float
+    n_candidates: int
+    n_fits: int
+    exhaustive_fits: int
+    elapsed_seconds: float
+    estimated_exhaustive_seconds: float
+    rounds: list = field(default_factory=list)
+
+    @property
+    def saved_seconds(self):
+        return self.estimated_exhaustive_seconds - self.elapsed_seconds
+
+    def __str__(self):
+        return (
+            f"{self.method}: best {self.best_score:.4f} with {self.best_params}\n"
+            f"  {self.n_fits} fits in {self.elapsed_seconds:.1f}s vs {self.exhaustive_fits} exhaustive fits "
+            f"(~{self.estimated_exhaustive_seconds:.1f}s), saved ~{self.saved_seconds:.1f}s"
+        )
+
+
+def grid_size(param_grid):
+    return int(np.prod([len(values) for values in param_grid.values()]))
+
+
+def _iter_grid(param_grid):
+    keys = sorted(param_grid)
+    for values in itertools.product(*(param_grid[key] for key in keys)):
+        yield dict(zip(keys, values))
+
+
+def halving_search(estimator, param_grid, X, y, resource="n_estimators", factor=3, cv=3,
+                   scoring="accuracy", n_jobs=-1, random_state=42):
+    """Successive-halving version of ``GridSearchCV(estimator, param_grid, cv=cv)``.
+
+    With ``resource="n_estimators"`` the trees are the budget: the grid's own
+    ``n_estimators`` values are dropped, its largest value becomes the final
+    round's budget and the first round starts low enough that the final
+    round is down to a handful of candidates. ``resource="n_samples"`` grows the training rows
+    instead. ``cv`` may be a fold count or a shared ``cv.CVFolds``. Returns the
+    fitted ``HalvingGridSearchCV`` with ``report_`` set.
+    """
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+
+    grid = dict(param_grid)
+    kwargs = {}
+    if resource != "n_samples":
+        budgets = grid.pop(resource)
+        n_rounds = max(1, int(np.ceil(np.log(grid_size(grid)) / np.log(factor))))
+        kwargs = {"max_resources": max(budgets), "min_resources": max(1, max(budgets) // factor ** (n_rounds - 1))}
+
+    n_splits = cv if isinstance(cv, int) else cv.get_n_splits()
+    search = HalvingGridSearchCV(
+        estimator, grid, resource=resource, factor=factor, cv=cv, scoring=scoring,
+        n_jobs=n_jobs, random_state=random_state, **kwargs,
+    )
+    start = time.perf_counter()
+    with stage("search", method="halving", resource=resource, rows=len(X)):
+        search.fit(X, y)
+    elapsed = time.perf_counter() - start
+
+    results = search.cv_results_
+    # Fit seconds per unit of budget, taken from each candidate's first round
+    first_round = results["iter"] == 0
+    unit_seconds = np.mean(results["mean_fit_time"][first_round] / results["n_resources"][first_round])
+    if resource == "n_samples":
+        exhaustive_seconds = unit_seconds * search.max_resources_ * grid_size(grid) * n_splits
+    else:
+        exhaustive_seconds = unit_seconds * sum(budgets) * grid_size(grid) * n_splits
+
+    search.report_ = TuningReport(
+        method=f"successive halving on {resource}",
+        best_params=search.best_params_,
+        best_score=float(search.best_score_),
+        n_candidates=grid_size(grid) * (1 if resource == "n_samples" else len(budgets)),
+        n_fits=int(sum(search.n_candidates_)) * n_splits,
+        exhaustive_fits=grid_size(param_grid) * n_splits,
+        elapsed_seconds=elapsed,
+        estimated_exhaustive_seconds=float(exhaustive_seconds),
+        rounds=[
+            {"candidates": int(c), "resources": int(r)}
+            for c, r in zip(search.n_candidates_, search.n_resources_)
+        ],
+    )
+    return search
+
+
+class XGBEarlyStoppingSearch:
+    """Grid search over XGBoost parameters with early stopping on ``n_estimators``.
+
+    Every combination of the non-``n_estimators`` parameters is boosted once
+    for up to ``max(param_grid["n_estimators"])`` rounds on a stratified
+    training fold and stopped after ``early_stopping_rounds`` rounds without
+    improvement on the validation fold. The best configuration is refitted on
+    all rows with the number of rounds it actually needed, which
+    ``best_params_`` reports as ``n_estimators``. Exposes the
+    ``best_params_``, ``best_score_`` and ``best_estimator_`` attributes of
+    the sklearn searches it replaces.
+
+    With ``folds`` (a ``cv.CVFolds`` over the same ``X``) every configuration
+    is boosted on each fold's cached ``QuantileDMatrix`` instead of a single
+    split, scored by mean fold accuracy, and refitted with the mean number of
+    rounds the folds kept.
+    """
+
+    def __init__(self, param_grid, early_stopping_rounds=20, validation_size=0.2, random_state=42,
+                 exhaustive_cv=3, folds=None, **xgb_params):
+        self.param_grid = param_grid
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_size = validation_size
+        self.random_state = random_state
+        self.exhaustive_cv = exhaustive_cv
+        self.folds = folds
+        self.xgb_params = xgb_params
+
+    def fit(self, X, y):
+        if self.folds is not None:
+            return self._fit_folds(X, y)
+
+        from sklearn.model_selection import train_test_split
+        from xgboost import XGBClassifier
+
+        grid = dict(self.param_grid)
+        round_budgets = grid.pop("n_estimators", [100])
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X, y, test_size=self.validation_size, stratify=y, random_state=self.random_state
+        )
+
+        start = time.perf_counter()
+        self.cv_results_ = []
+        exhaustive_seconds = 0.0
+        # Exhaustive CV trains each fit on (cv - 1) / cv of the rows, this search on 1 - validation_size
+        row_scale = (1 - 1 / self.exhaustive_cv) / (1 - self.validation_size)
+        for params in _iter_grid(grid):
+            model = XGBClassifier(
+                n_estimators=max(round_budgets), early_stopping_rounds=self.early_stopping_rounds,
+                random_state=self.random_state, **self.xgb_params, **params,
+            )
+            fit_start = time.perf_counter()
+            with stage("fit", model="XGBClassifier", rows=len(X_fit), **params):
+                model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            fit_seconds = time.perf_counter() - fit_start
+            rounds_trained = model.get_booster().num_boosted_rounds()
+            n_estimators = model.best_iteration + 1
+            score = float(np.mean(model.predict(X_val) == np.asarray(y_val)))
+            self.cv_results_.append({**params, "n_estimators": n_estimators, "score": score,
+                                     "fit_seconds": fit_seconds})
+            exhaustive_seconds += fit_seconds / rounds_trained * sum(round_budgets) * row_scale * self.exhaustive_cv
+
+        self._refit_best(X, y)
+        elapsed = time.perf_counter() - start
+
+        self.report_ = TuningReport(
+            method="XGBoost early stopping",
+            best_params=self.best_params_,
+            best_score=self.best_score_,
+            n_candidates=len(self.cv_results_),
+            n_fits=len(self.cv_results_) + 1,
+            exhaustive_fits=grid_size(self.param_grid) * self.exhaustive_cv,
+            elapsed_seconds=elapsed,
+            estimated_exhaustive_seconds=exhaustive_seconds,
+        )
+        return self
+
+    def _fit_folds(self, X, y):
+        folds = self.folds
+        grid = dict(self.param_grid)
+        round_budgets = grid.pop("n_estimators", [100])
+
+        start = time.perf_counter()
+        self.cv_results_ = []
+        exhaustive_seconds = 0.0
+        for params in _iter_grid(grid):
+            fit_start = time.perf_counter()
+            with stage("fit", model="XGBClassifier", folds=folds.n_splits, **params):
+                score, rounds = folds.cross_val_xgb(
+                    {**self.xgb_params, **params}, num_boost_round=max(round_budgets),
+                    early_stopping_rounds=self.early_stopping_rounds,
+                )
+            fit_seconds = time.perf_counter() - fit_start
+            self.cv_results_.append({**params, "n_estimators": int(round(np.mean(rounds))), "score": score,
+                                     "fit_seconds": fit_seconds})
+            # Early stopping runs up to early_stopping_rounds past the rounds kept
+            rounds_trained = sum(min(r + self.early_stopping_rounds, max(round_budgets)) for r in rounds)
+            exhaustive_seconds += fit_seconds / rounds_trained * sum(round_budgets) * folds.n_splits
+
+        self._refit_best(X, y)
+        elapsed = time.perf_counter() - start
+
+        self.report_ = TuningReport(
+            method=f"XGBoost early stopping over {folds.n_splits} cached folds",
+            best_params=self.best_params_,
+            best_score=self.best_score_,
+            n_candidates=len(self.cv_results_),
+            n_fits=len(self.cv_results_) * folds.n_splits + 1,
+            exhaustive_fits=grid_size(self.param_grid) * folds.n_splits,
+            elapsed_seconds=elapsed,
+            estimated_exhaustive_seconds=exhaustive_seconds,
+        )
+        return self
+
+    def _refit_best(self, X, y):
+        from xgboost import XGBClassifier
+
+        best = max(self.cv_results_, key=lambda result: result["score"])
+        # n_estimators is the early-stopped round count, whether or not the grid listed it
+        self.best_params_ = {key: best[key] for key in dict.fromkeys([*self.param_grid, "n_estimators"])}
+        self.best_score_ = best["score"]
+        self.best_estimator_ = XGBClassifier(**{"random_state": self.random_state, **self.xgb_params,
+                                                **self.best_params_})
+        with stage("fit", model="XGBClassifier", rows=len(X), **self.best_params_):
+            self.best_estimator_.fit(X, y)
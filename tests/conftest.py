@@ -0,0 +1,47 @@
+"""Shared fixtures: a small, typed table of made-up applications."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from easyvisa.ingest import CATEGORIES, COLUMNS, FLAG_COLUMNS, coerce_frame
+
+
+def make_applications(n, seed=0):
+    """``n`` applications with the EasyVisa schema whose status depends on education, experience and wage."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({"case_id": [f"EZYV{i:06d}" for i in range(n)]})
+    for col, levels in CATEGORIES.items():
+        if col != "case_status":
+            frame[col] = rng.choice(levels, n)
+    for col in FLAG_COLUMNS:
+        frame[col] = rng.choice(["Y", "N"], n, p=[0.6, 0.4])
+    frame["no_of_employees"] = rng.lognormal(7, 1.5, n).astype(np.int32) + 1
+    frame["yr_of_estab"] = rng.integers(1800, 2017, n).astype(np.int16)
+    frame["prevailing_wage"] = rng.lognormal(11, 0.8, n).round(2)
+    education = frame["education_of_employee"].map({"High School": -1.0, "Bachelor's": 0.0,
+                                                    "Master's": 0.8, "Doctorate": 1.2})
+    logit = (education + 0.8 * (frame["has_job_experience"] == "Y") + 0.4 * np.log(frame["prevailing_wage"] / 6e4)
+             + rng.normal(0, 1, n))
+    frame["case_status"] = np.where(logit > 0, "Certified", "Denied")
+    return coerce_frame(frame[COLUMNS])
+
+
+@pytest.fixture(scope="session")
+def applications():
+    return make_applications(3_000)
+
+
+@pytest.fixture(scope="session")
+def resampled():
+    """Another draw of as many applications from the same distribution."""
+    return make_applications(3_000, seed=1)
+
+
+@pytest.fixture(scope="session")
+def encoded(applications):
+    """``(preprocessor, X, y)``: the applications encoded by a fitted ``VisaPreprocessor``."""
+    from easyvisa.preprocess import VisaPreprocessor, encode_target
+
+    preprocessor = VisaPreprocessor().fit(applications)
+    return preprocessor, preprocessor.transform(applications), encode_target(applications["case_status"])
@@ -0,0 +1,116 @@
+"""Compressed tree ensembles: selection, quantization and compact storage parity."""
+
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from xgboost import XGBClassifier
+
+from easyvisa.compress import (compact_nbytes, compress, compression_report, greedy_tree_order, load_compact,
+                               save_compact, threshold_codebook, tree_predictions)
+from easyvisa.inference import flatten_model
+
+MODELS = {
+    "rf": lambda: RandomForestClassifier(n_estimators=10, max_depth=8, random_state=0),
+    "gb": lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0),
+    "xgb": lambda: XGBClassifier(n_estimators=20, max_depth=4, n_jobs=1, random_state=0),
+}
+
+
+@pytest.fixture(scope="module")
+def split(encoded):
+    """``(X_train, y_train, X_val, y_val)`` as float32 matrices."""
+    _, X, y = encoded
+    X = np.asarray(X, dtype=np.float32)
+    return X[:2_000], y[:2_000], X[2_000:], y[2_000:]
+
+
+@pytest.fixture(scope="module")
+def forest(split):
+    X_train, y_train, _, _ = split
+    return RandomForestClassifier(n_estimators=30, random_state=0).fit(X_train, y_train)
+
+
+def _log_loss(y, proba):
+    proba = np.clip(proba, 1e-6, 1 - 1e-6)
+    return -np.mean(y * np.log(proba) + (1 - y) * np.log(1 - proba))
+
+
+def test_greedy_order_is_a_forward_selection(split, forest):
+    _, _, X_val, y_val = split
+    flat = flatten_model(forest)
+    order, losses = greedy_tree_order(flat, X_val, y_val)
+    leaves = tree_predictions(flat, X_val)
+
+    assert sorted(order) == list(range(flat.n_trees))
+    for i in range(len(order)):
+        assert losses[i] == pytest.approx(_log_loss(y_val, leaves[:, order[:i + 1]].mean(axis=1)))
+    # Every step adds the best remaining tree
+    for i in (0, 5, 20):
+        candidates = [t for t in range(flat.n_trees) if t not in order[:i]]
+        best = min(_log_loss(y_val, leaves[:, list(order[:i]) + [t]].mean(axis=1)) for t in candidates)
+        assert losses[i] == pytest.approx(best)
+
+
+def test_boosted_order_truncates_rounds(split):
+    X_train, y_train, X_val, y_val = split
+    flat = flatten_model(GradientBoostingClassifier(n_estimators=20, random_state=0).fit(X_train, y_train))
+    order, losses = greedy_tree_order(flat, X_val, y_val, max_trees=10)
+    np.testing.assert_array_equal(order, np.arange(10))
+    truncated = compress(flat, order)
+    assert losses[-1] == pytest.approx(_log_loss(y_val, truncated.predict_certified_proba(X_val)))
+
+
+def test_unquantized_compression_is_exact(split, forest):
+    _, _, X_val, _ = split
+    flat = flatten_model(forest)
+    compressed = compress(flat)
+    assert compressed.n_nodes <= flat.n_nodes
+    np.testing.assert_array_equal(compressed.predict_certified_proba(X_val), flat.predict_certified_proba(X_val))
+
+
+def test_snapped_thresholds_route_reference_rows_unchanged(split, forest):
+    X_train, _, X_val, _ = split
+    flat = flatten_model(forest)
+    # A codebook holding every reference value: splits only move between values, and
+    # splits that send all of them one way are dropped
+    reference = X_train[:300]
+    full = compress(flat, codebook=threshold_codebook(reference, max_levels=len(reference)))
+    np.testing.assert_allclose(full.predict_certified_proba(reference), flat.predict_certified_proba(reference),
+                               atol=1e-12)
+    assert full.n_nodes < flat.n_nodes
+
+    # The default codebook snaps wage splits to quantiles: close, not exact
+    snapped = compress(flat, codebook=threshold_codebook(X_train))
+    labels = snapped.predict(X_val) == flat.predict(X_val)
+    assert labels.mean() > 0.95
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_compact_roundtrip(split, name, tmp_path):
+    X_train, y_train, X_val, _ = split
+    model = MODELS[name]().fit(X_train, y_train)
+    flat = flatten_model(model)
+    flat.decision_threshold = 0.4
+    loaded = load_compact(save_compact(flat, tmp_path / "model.npz"))
+
+    assert (loaded.n_trees, loaded.n_nodes, loaded.aggregation) == (flat.n_trees, flat.n_nodes, flat.aggregation)
+    assert loaded.decision_threshold == 0.4
+    # float32 leaf values; float32 inputs route exactly as before
+    np.testing.assert_allclose(loaded.predict_certified_proba(X_val), flat.predict_certified_proba(X_val),
+                               atol=1e-6)
+    np.testing.assert_array_equal(loaded.apply(X_val), flat.apply(X_val))
+    assert compact_nbytes(flat) < len(pickle.dumps(model))
+
+
+def test_compression_report(split, forest):
+    X_train, _, X_val, y_val = split
+    report, ensembles = compression_report(forest, X_train, X_val[:500], y_val[:500], X_val[500:], y_val[500:],
+                                           tree_counts=(None, 10))
+    assert list(report.index) == ["original", "flat", "compressed_30", "compressed_10"]
+    assert set(ensembles) == {"flat", "compressed_30", "compressed_10"}
+    assert report.loc["flat", "accuracy_delta"] == 0
+    assert report.loc["compressed_10", "trees"] == 10
+    assert report.loc["compressed_10", "bytes"] < report.loc["compressed_30", "bytes"]
+    assert (report.loc[["flat", "compressed_30", "compressed_10"], "size_ratio"] < 1).all()
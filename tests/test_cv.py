@@ -0,0 +1,71 @@
+"""Fixed cross-validation folds against the sklearn and XGBoost calls they stand in for."""
+
+import numpy as np
+import pytest
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from easyvisa.cv import CVFolds, make_folds
+
+
+@pytest.fixture(scope="module")
+def folds(encoded):
+    _, X, y = encoded
+    return CVFolds(X, y, n_splits=3)
+
+
+def test_folds_match_stratified_kfold(encoded, folds):
+    _, X, y = encoded
+    expected = StratifiedKFold(n_splits=3, shuffle=True, random_state=42).split(X, y)
+    for (train, val), (expected_train, expected_val) in zip(folds.split(), expected, strict=True):
+        np.testing.assert_array_equal(train, expected_train)
+        np.testing.assert_array_equal(val, expected_val)
+    assert folds.get_n_splits() == 3
+    assert make_folds(y, folds) is folds.folds
+    for (train, val), (same_train, same_val) in zip(folds.folds, make_folds(y, 3)):
+        np.testing.assert_array_equal(train, same_train)
+        np.testing.assert_array_equal(val, same_val)
+
+
+def test_fold_arrays_are_built_once(encoded, folds):
+    _, X, y = encoded
+    train, val = folds.folds[1]
+    X_train, y_train, X_val, y_val = folds.fold(1)
+    np.testing.assert_array_equal(X_train, X.iloc[train].to_numpy(np.float32))
+    np.testing.assert_array_equal(X_val, X.iloc[val].to_numpy(np.float32))
+    np.testing.assert_array_equal(y_train, y[train])
+    np.testing.assert_array_equal(y_val, y[val])
+    assert X_train.flags.c_contiguous and X_train.dtype == np.float32
+    assert folds.fold(1)[0] is X_train
+    assert folds.dmatrices(1) is folds.dmatrices(1)
+    assert folds.dmatrices(1) is not folds.dmatrices(1, max_bin=64)
+    assert list(folds.frame().columns) == list(X.columns)
+
+
+def test_sklearn_search_cv(encoded, folds):
+    _, X, y = encoded
+    tree = DecisionTreeClassifier(max_depth=4, random_state=0)
+    expected = cross_val_score(tree, X, y, cv=StratifiedKFold(n_splits=3, shuffle=True, random_state=42))
+    np.testing.assert_allclose(cross_val_score(tree, folds.frame(), y, cv=folds), expected)
+
+
+def test_cross_val_xgb_matches_xgb_classifier(folds):
+    params = {"max_depth": 3, "eta": 0.1}
+    score, rounds = folds.cross_val_xgb(params, num_boost_round=40)
+    assert rounds == [40] * folds.n_splits
+
+    accuracies = []
+    for i in range(folds.n_splits):
+        X_train, y_train, X_val, y_val = folds.fold(i)
+        model = XGBClassifier(n_estimators=40, max_depth=3, learning_rate=0.1, tree_method="hist", max_bin=256,
+                              random_state=42, n_jobs=1).fit(X_train, y_train)
+        accuracies.append(np.mean(model.predict(X_val) == y_val))
+    assert score == pytest.approx(np.mean(accuracies), abs=1e-3)
+
+
+def test_cross_val_xgb_early_stopping(folds):
+    score, rounds = folds.cross_val_xgb({"max_depth": 6, "eta": 0.5}, num_boost_round=200, early_stopping_rounds=5)
+    assert len(rounds) == folds.n_splits
+    assert all(1 <= n < 200 for n in rounds)
+    assert 0.5 < score < 1
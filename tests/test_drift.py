@@ -0,0 +1,102 @@
+"""Drift profiles on identical, resampled and shifted applications."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+
+from easyvisa.drift import SCORE, DriftMonitor, DriftProfile, psi, quantile_edges
+from easyvisa.sketch import normalized_rank_error
+
+
+@pytest.fixture(scope="module")
+def baseline(applications):
+    return DriftProfile.fit(applications)
+
+
+def test_identical_data_has_no_drift(applications, baseline):
+    report = baseline.compare(baseline.empty_like().update(applications))
+    np.testing.assert_array_equal(report["psi"], 0)
+    # Both sketches compact at random, so only within twice their rank error
+    assert (report["ks"].dropna() <= 2 * normalized_rank_error(baseline.k)).all()
+    assert (report["status"] == "stable").all()
+
+
+def test_same_distribution_is_stable(baseline, resampled):
+    report = baseline.compare(baseline.empty_like().update(resampled))
+    assert (report["psi"] < 0.1).all()
+    assert (report["ks"].dropna() < 0.05).all()
+
+
+def test_shifted_columns_are_flagged(baseline, resampled):
+    shifted = resampled.copy()
+    shifted["prevailing_wage"] *= 1.5
+    shifted["continent"] = shifted["continent"].where(shifted.index % 4 != 0, "Asia")
+    report = baseline.compare(baseline.empty_like().update(shifted))
+
+    assert set(report.index[report["status"] == "major"]) == {"prevailing_wage"}
+    assert report.loc["continent", "status"] == "moderate"
+    assert report.loc["prevailing_wage", "ks"] > 0.2
+    unshifted = report.drop(index=["prevailing_wage", "continent"])
+    assert (unshifted["status"] == "stable").all()
+
+
+def test_psi_and_ks_match_direct_computations(applications, baseline, resampled):
+    shifted = resampled.assign(prevailing_wage=resampled["prevailing_wage"] * 1.2)
+    report = baseline.compare(baseline.empty_like().update(shifted))
+
+    edges = quantile_edges(applications["prevailing_wage"])
+    bins = np.r_[-np.inf, edges, np.inf]
+    # Closed on the left like the profile's bins; the last one ends at inf
+    expected = np.histogram(applications["prevailing_wage"], bins)[0]
+    actual = np.histogram(shifted["prevailing_wage"], bins)[0]
+    assert report.loc["prevailing_wage", "psi"] == pytest.approx(psi(expected, actual))
+    p, q = expected / expected.sum(), actual / actual.sum()
+    assert psi(expected, actual) == pytest.approx(np.sum((q - p) * np.log(q / p)))
+
+    exact = ks_2samp(applications["prevailing_wage"], shifted["prevailing_wage"]).statistic
+    assert report.loc["prevailing_wage", "ks"] == pytest.approx(exact, abs=0.03)
+
+
+def test_unknown_share_counts_missing_values(baseline, resampled):
+    window = resampled.copy()
+    window["prevailing_wage"] = window["prevailing_wage"].mask(window.index < 300)
+    window["has_job_experience"] = pd.array(window["has_job_experience"], dtype="boolean")
+    window.loc[window.index < 150, "has_job_experience"] = pd.NA
+    report = baseline.compare(baseline.empty_like().update(window))
+    assert report.loc["prevailing_wage", "unknown_share"] == pytest.approx(0.1)
+    assert report.loc["has_job_experience", "unknown_share"] == pytest.approx(0.05)
+    assert report.loc["continent", "unknown_share"] == 0
+
+
+def test_merged_windows_equal_one_pass(applications, tmp_path):
+    proba = np.random.default_rng(0).uniform(size=len(applications))
+    whole = DriftProfile.fit(applications, proba)
+    merged = whole.empty_like()
+    for rows in np.array_split(np.arange(len(applications)), 3):
+        merged.merge(whole.empty_like().update(applications.iloc[rows], proba[rows]))
+    loaded = DriftProfile.load(merged.save(tmp_path / "drift.json"))
+
+    for profile in (merged, loaded):
+        assert profile.n_rows == whole.n_rows
+        for col in whole.categorical:
+            np.testing.assert_array_equal(profile.counts[col], whole.counts[col])
+        for col in whole.edges:
+            np.testing.assert_array_equal(profile.histograms[col], whole.histograms[col])
+            assert profile.sketches[col].n == whole.sketches[col].n
+        assert whole.compare(profile).loc[SCORE, "psi"] == 0
+
+
+def test_incompatible_profiles_raise(applications, baseline):
+    with pytest.raises(ValueError):
+        baseline.merge(DriftProfile.fit(applications, n_bins=5))
+
+
+def test_monitor_rotates_windows(baseline, resampled):
+    monitor = DriftMonitor(baseline)
+    monitor.update(resampled.assign(prevailing_wage=resampled["prevailing_wage"] * 2))
+    assert monitor.drifted() == ["prevailing_wage"]
+    report, window = monitor.rotate()
+    assert window.n_rows == len(resampled)
+    assert report.loc["prevailing_wage", "status"] == "major"
+    assert monitor.current.n_rows == 0
@@ -0,0 +1,57 @@
+"""Single-pass certification-rate counts against the pandas groupbys they replace."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from easyvisa.eda import COMPANY_SIZE_BINS, DEFAULT_FEATURES, CertificationStats, feature_levels
+from easyvisa.ingest import FLAG_COLUMNS
+
+
+def _labelled(frame, feature):
+    """``feature`` as the level labels ``CertificationStats`` uses."""
+    if feature in FLAG_COLUMNS:
+        return frame[feature].map({True: "Y", False: "N"})
+    if feature == "company_size":
+        return pd.cut(frame["no_of_employees"], COMPANY_SIZE_BINS, right=False, labels=feature_levels(feature))
+    return frame[feature]
+
+
+@pytest.mark.parametrize("feature", DEFAULT_FEATURES)
+def test_rates_match_groupby(applications, feature):
+    stats = CertificationStats().update(applications)
+    expected = (applications["case_status"].groupby(_labelled(applications, feature), observed=True)
+                .value_counts(normalize=True).unstack(fill_value=0) * 100)
+    rates = stats.rates(feature)
+    assert list(rates.index) == [level for level in feature_levels(feature) if level in expected.index]
+    np.testing.assert_allclose(rates.to_numpy(), expected.loc[rates.index, rates.columns].to_numpy(), atol=1e-9)
+
+
+def test_pair_rates_match_groupby(applications):
+    stats = CertificationStats().update(applications)
+    certified = (applications["case_status"] == "Certified") * 100.0
+    expected = certified.groupby([applications["continent"], applications["education_of_employee"]],
+                                 observed=True).mean().unstack()
+    rates = stats.pair_rates("continent", "education_of_employee")
+    np.testing.assert_allclose(rates.loc[expected.index, expected.columns].to_numpy(), expected.to_numpy(),
+                               atol=1e-9)
+
+
+def test_merged_chunks_equal_one_pass(applications, tmp_path):
+    whole = CertificationStats().update(applications)
+    merged = CertificationStats()
+    for chunk in np.array_split(np.arange(len(applications)), 4):
+        merged.merge(CertificationStats().update(applications.iloc[chunk]))
+    loaded = CertificationStats.load(merged.save(tmp_path / "stats.json"))
+
+    for stats in (merged, loaded):
+        assert stats.n_rows == whole.n_rows
+        for feature in whole.features:
+            np.testing.assert_array_equal(stats.feature_counts[feature], whole.feature_counts[feature])
+        for pair in whole.pairs:
+            np.testing.assert_array_equal(stats.pair_counts[pair], whole.pair_counts[pair])
+
+
+def test_merge_rejects_other_features():
+    with pytest.raises(ValueError):
+        CertificationStats().merge(CertificationStats(features=["continent"]))
@@ -0,0 +1,96 @@
+"""EDA summaries against the full-data statistics they stand in for, and the rendered report."""
+
+import numpy as np
+import pytest
+
+from easyvisa.eda import STATUS
+from easyvisa.edareport import CORRELATION_COLUMNS, EDASummary, main
+from easyvisa.ingest import FLAG_COLUMNS
+from easyvisa.sketch import normalized_rank_error
+
+
+def _numeric(frame):
+    """The correlation columns as numbers: flags 0/1 and Certified 1."""
+    return frame.assign(case_status=(frame["case_status"] == "Certified"))[CORRELATION_COLUMNS].astype(float)
+
+
+def _partials(applications, n=3, sample_size=20_000):
+    parent = EDASummary(sample_size, seed=0)
+    parts = parent.spawn(n)
+    for part, rows in zip(parts, np.array_split(np.arange(len(applications)), n)):
+        part.update(applications.iloc[rows])
+    return parts
+
+
+def test_correlation_matches_pandas(applications):
+    expected = _numeric(applications).corr()
+    merged = _partials(applications)
+    merged = merged[0].merge(merged[1]).merge(merged[2])
+    for summary in (EDASummary(seed=0).update(applications), merged):
+        assert summary.n_complete == len(applications)
+        np.testing.assert_allclose(summary.correlation(), expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("by", [(), ("case_status",), ("education_of_employee", "case_status")])
+def test_box_stats_within_sketch_error(applications, by):
+    summary = EDASummary(seed=0).update(applications)
+    wages = applications["prevailing_wage"]
+    groups = wages.groupby([applications[col] for col in by], observed=True) if by else [(None, wages)]
+    values = {key: np.sort(group.to_numpy()) for key, group in groups}
+    boxes = summary.box_stats("prevailing_wage", by)
+    assert len(boxes) == len(values)
+
+    for box in boxes:
+        if not by:
+            key = None
+        elif len(by) == 1:
+            key = (box["label"],)
+        else:
+            key = (box["label"], box["hue"])
+        ordered = values[key]
+        for q, name in ((0.25, "q1"), (0.5, "med"), (0.75, "q3")):
+            rank = np.searchsorted(ordered, box[name], side="right") / len(ordered)
+            assert abs(rank - q) <= normalized_rank_error(summary.k)
+        assert ordered[0] <= box["whislo"] <= box["q1"] <= box["med"] <= box["q3"] <= box["whishi"] <= ordered[-1]
+        # The sample holds every row here, so the fliers are exactly the values beyond the whiskers
+        beyond = ordered[(ordered < box["whislo"]) | (ordered > box["whishi"])]
+        np.testing.assert_array_equal(np.sort(box["fliers"]), beyond)
+
+
+def test_sample_is_the_smallest_keys_of_all_partials(applications):
+    parts = _partials(applications, sample_size=500)
+    keys = np.concatenate([part.sample_keys for part in parts])
+    # Spawned partials draw independent keys
+    assert len(np.unique(keys)) == len(keys)
+
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    assert merged.n_rows == len(applications)
+    np.testing.assert_array_equal(np.sort(merged.sample_keys), np.sort(keys)[:500])
+    wages = set(applications["prevailing_wage"])
+    assert set(merged.sample_values("prevailing_wage")) <= wages
+    certified = merged.sample_values("prevailing_wage", status=STATUS.index("Certified"))
+    assert 0 < len(certified) < 500
+
+
+def test_same_seed_reproduces(applications):
+    first, second = (EDASummary(500, seed=7).update(applications) for _ in range(2))
+    np.testing.assert_array_equal(first.sample_keys, second.sample_keys)
+    assert first.box_stats("no_of_employees")[0]["med"] == second.box_stats("no_of_employees")[0]["med"]
+
+
+def test_merge_rejects_other_sample_sizes():
+    with pytest.raises(ValueError):
+        EDASummary(100).merge(EDASummary(200))
+
+
+def test_cli_renders_every_figure(applications, tmp_path):
+    source = tmp_path / "visa.csv"
+    applications.replace({col: {True: "Y", False: "N"} for col in FLAG_COLUMNS}).to_csv(source, index=False)
+    out = tmp_path / "eda.html"
+    main([str(source), "--out", str(out), "--format", "svg", "--jobs", "1", "--chunksize", "1000"])
+
+    page = out.read_text(encoding="utf-8")
+    figures = sorted((tmp_path / "eda_figures").iterdir())
+    assert len(figures) == page.count("<section") == 18
+    assert all(figure.suffix == ".svg" for figure in figures)
+    assert "3,000" in page and page.count("<svg") == 18
@@ -0,0 +1,90 @@
+"""Tree attributions: additivity, a per-row reference walk and the batch helpers."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from easyvisa.explain import TreeExplainer, global_importance, top_factors
+from easyvisa.score import certified_proba
+
+MODELS = {
+    "dt": lambda: DecisionTreeClassifier(max_depth=6, random_state=0),
+    "rf": lambda: RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0),
+    "gb": lambda: GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0),
+    "xgb": lambda: XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.3, n_jobs=1, random_state=0),
+}
+
+
+@pytest.fixture(scope="module")
+def fitted(encoded):
+    _, X, y = encoded
+    return {name: make().fit(X, y) for name, make in MODELS.items()}
+
+
+def _logit(p):
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return np.log(p / (1 - p))
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_contributions_add_up_to_the_output(encoded, fitted, name, approximate):
+    _, X, _ = encoded
+    model = fitted[name]
+    explainer = TreeExplainer(model, approximate=approximate)
+    contributions = explainer.explain(X[:500])
+
+    assert list(contributions.columns) == list(X.columns) + ["bias"]
+    expected = certified_proba(model, X[:500])
+    if explainer.units == "log-odds":
+        expected = _logit(expected)
+    np.testing.assert_allclose(contributions.sum(axis=1), expected, atol=1e-4)
+    assert explainer.units == ("probability" if name in ("dt", "rf") else "log-odds")
+
+
+def test_string_labels_credit_certified(encoded):
+    _, X, y = encoded
+    labels = np.where(y == 1, "Certified", "Denied")
+    model = MODELS["rf"]().fit(X, labels)
+    contributions = TreeExplainer(model).contributions(X[:300])
+    np.testing.assert_allclose(contributions.sum(axis=1), certified_proba(model, X[:300]), atol=1e-9)
+
+
+def test_decision_tree_matches_a_per_row_walk(encoded, fitted):
+    _, X, _ = encoded
+    model = fitted["dt"]
+    tree = model.tree_
+    value = tree.value[:, 0, list(model.classes_).index(1)] / tree.value[:, 0, :].sum(axis=1)
+    paths = model.decision_path(X[:200])
+    expected = np.zeros((200, X.shape[1]))
+    for row in range(200):
+        nodes = paths.indices[paths.indptr[row]:paths.indptr[row + 1]]
+        for parent, child in zip(nodes[:-1], nodes[1:]):
+            expected[row, tree.feature[parent]] += value[child] - value[parent]
+    contributions = TreeExplainer(model).contributions(X[:200])
+    np.testing.assert_allclose(contributions[:, :-1], expected, atol=1e-6)
+    np.testing.assert_allclose(contributions[:, -1], value[0], atol=1e-6)
+
+
+def test_parallel_chunks_match_one_pass(encoded, fitted):
+    _, X, _ = encoded
+    explainer = TreeExplainer(fitted["rf"])
+    pd.testing.assert_frame_equal(explainer.explain(X, chunksize=700, n_jobs=2),
+                                  explainer.explain(X, chunksize=len(X), n_jobs=1))
+
+
+def test_importance_and_top_factors():
+    contributions = pd.DataFrame({"a": [0.1, -0.5, 0.0], "b": [-0.3, 0.2, 0.05], "c": [0.2, 0.0, -0.01],
+                                  "bias": [0.5, 0.5, 0.5]}, index=[10, 11, 12])
+    importance = global_importance(contributions)
+    assert list(importance.index) == ["a", "b", "c"]
+    np.testing.assert_allclose(importance, [0.6 / 3, 0.55 / 3, 0.21 / 3])
+
+    factors = top_factors(contributions, k=2)
+    assert list(factors.index) == [10, 11, 12]
+    assert factors["factor_1"].tolist() == ["b", "a", "b"]
+    assert factors["factor_2"].tolist() == ["c", "b", "c"]
+    np.testing.assert_allclose(factors["factor_1_value"], [-0.3, -0.5, 0.05])
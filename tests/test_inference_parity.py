@@ -0,0 +1,94 @@
+"""Parity of flattened tree ensembles with the models they were exported from."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from easyvisa.inference import FlatTreeEnsemble, check_parity, flatten_model
+from easyvisa.preprocess import encode_target
+from easyvisa.score import certified_proba
+from easyvisa.thresholds import ThresholdedClassifier
+
+MODELS = {
+    "dt": lambda: DecisionTreeClassifier(max_depth=6, random_state=0),
+    "rf": lambda: RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0),
+    "gb": lambda: GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+    "xgb": lambda: XGBClassifier(n_estimators=30, max_depth=4, learning_rate=0.3, n_jobs=1, random_state=0),
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Encoded-looking features: small integer codes, 0/1 flags and long-tailed numerics."""
+    rng = np.random.default_rng(0)
+    n = 2_000
+    X = np.column_stack([
+        rng.integers(0, 6, n),
+        rng.integers(0, 4, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 2, n),
+        rng.lognormal(7, 1.5, n).round(),
+        rng.integers(1800, 2016, n),
+        rng.lognormal(11, 0.8, n).round(2),
+    ]).astype(np.float32)
+    logit = 0.8 * X[:, 2] - 0.5 * (X[:, 1] == 2) + 0.3 * np.log(X[:, 6]) - 3.2 + rng.normal(0, 1, n)
+    y = (logit > 0).astype(np.int8)
+    return X, y
+
+
+def _labels(y, string_labels):
+    return np.where(y == 1, "Certified", "Denied") if string_labels else y
+
+
+def _fit(name, data, string_labels):
+    X, y = data
+    return MODELS[name]().fit(X, _labels(y, string_labels))
+
+
+@pytest.mark.parametrize("string_labels", [False, True])
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_probabilities_and_labels_match(name, string_labels, data):
+    if name == "xgb" and string_labels:
+        pytest.skip("XGBClassifier only takes integer labels")
+    X, _ = data
+    model = _fit(name, data, string_labels)
+    ensemble = flatten_model(model)
+
+    expected = certified_proba(model, X)
+    np.testing.assert_allclose(ensemble.predict_certified_proba(X), expected, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(ensemble.predict_proba(X)[:, 1], expected, rtol=0, atol=1e-6)
+    # sklearn breaks exact 0.5 ties toward the first class, predict toward Certified
+    untied = np.abs(expected - 0.5) > 1e-9
+    np.testing.assert_array_equal(ensemble.predict(X)[untied], encode_target(model.predict(X))[untied])
+    assert check_parity(model, ensemble, X)["max_abs_diff"] <= 1e-6
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_predict_one_matches_batch(name, data):
+    X, _ = data
+    ensemble = flatten_model(_fit(name, data, False))
+    batch = ensemble.predict_certified_proba(X[:50])
+    np.testing.assert_allclose([ensemble.predict_one(row) for row in X[:50]], batch, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("string_labels", [False, True])
+@pytest.mark.parametrize("name", ["rf", "gb"])
+def test_thresholded_classifier(name, string_labels, data):
+    X, _ = data
+    model = ThresholdedClassifier(_fit(name, data, string_labels), threshold=0.37)
+    ensemble = flatten_model(model)
+
+    assert ensemble.decision_threshold == pytest.approx(0.37)
+    np.testing.assert_allclose(ensemble.predict_certified_proba(X), certified_proba(model, X), rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(ensemble.predict(X), model.predict(X))
+
+
+def test_save_load_roundtrip(tmp_path, data):
+    X, _ = data
+    ensemble = flatten_model(ThresholdedClassifier(_fit("rf", data, True), threshold=0.42))
+    loaded = FlatTreeEnsemble.load(ensemble.save(tmp_path / "rf.npz"))
+
+    assert loaded.decision_threshold == pytest.approx(0.42)
+    np.testing.assert_array_equal(loaded.predict_certified_proba(X), ensemble.predict_certified_proba(X))
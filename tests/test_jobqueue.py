@@ -0,0 +1,94 @@
+"""Resubmitting and resuming searches in the SQLite job queue."""
+
+import socket
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from easyvisa import jobqueue
+from easyvisa.jobqueue import JobQueueSearch, claim_job, connect, queue_status
+
+GRID = {"max_depth": [1, 2]}
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=["a", "b", "c"])
+    y = (X["a"] + rng.normal(0, 0.5, len(X)) > 0).astype(int)
+    return X, y
+
+
+def _search(db_path, estimator=None, grid=GRID):
+    return JobQueueSearch(estimator or DecisionTreeClassifier(random_state=0), grid, db_path, name="grid", cv=3)
+
+
+def test_resubmit_reuses_finished_jobs(tmp_path, data):
+    X, y = data
+    db_path = tmp_path / "search.db"
+    first = _search(db_path).fit(X, y, n_workers=1)
+    second = _search(db_path).fit(X, y, n_workers=1)
+
+    assert queue_status(db_path)["grid"] == {"done": 6}
+    assert second.best_params_ == first.best_params_
+    assert second.best_score_ == first.best_score_
+
+
+@pytest.mark.parametrize("change", ["data", "estimator", "grid"])
+def test_resubmit_with_changes_raises(tmp_path, data, change):
+    X, y = data
+    db_path = tmp_path / "search.db"
+    _search(db_path).submit(X, y)
+
+    if change == "data":
+        search, X = _search(db_path), X * 2
+    elif change == "estimator":
+        search = _search(db_path, DecisionTreeClassifier(random_state=1))
+    else:
+        search = _search(db_path, grid={"max_depth": [1, 3]})
+    with pytest.raises(ValueError, match="use a new name"):
+        search.submit(X, y)
+
+
+def _lease(db_path, host, pid):
+    conn = connect(db_path)
+    try:
+        job = claim_job(conn, "grid", "crashed")
+        conn.execute("UPDATE jobs SET host = ?, pid = ? WHERE id = ?", (host, pid, job["id"]))
+    finally:
+        conn.close()
+
+
+def test_dead_local_lease_is_reclaimed_at_once(tmp_path, data):
+    X, y = data
+    db_path = tmp_path / "search.db"
+    search = _search(db_path).submit(X, y)
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    _lease(db_path, socket.gethostname(), exited.pid)
+
+    search.fit(X, y, n_workers=1)
+    assert queue_status(db_path)["grid"] == {"done": 6}
+
+
+def test_fit_waits_for_live_leases(tmp_path, data, monkeypatch):
+    X, y = data
+    db_path = tmp_path / "search.db"
+    search = _search(db_path).submit(X, y)
+    _lease(db_path, "elsewhere", 1)
+    waits = []
+
+    def remote_worker_gives_up(seconds):
+        waits.append(seconds)
+        conn = connect(db_path)
+        conn.execute("UPDATE jobs SET status = 'pending' WHERE host = 'elsewhere'")
+        conn.close()
+
+    monkeypatch.setattr(jobqueue.time, "sleep", remote_worker_gives_up)
+    search.fit(X, y, n_workers=1)
+    assert waits == [jobqueue.POLL_SECONDS]
+    assert queue_status(db_path)["grid"] == {"done": 6}
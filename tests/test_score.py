@@ -0,0 +1,56 @@
+"""Chunked batch scoring against scoring the whole frame at once."""
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from easyvisa.ingest import FLAG_COLUMNS
+from easyvisa.preprocess import VisaPreprocessor, encode_target
+from easyvisa.score import score_file, score_frame
+from easyvisa.thresholds import ThresholdedClassifier
+
+
+@pytest.fixture(scope="module")
+def artifacts(applications, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("artifacts")
+    preprocessor = VisaPreprocessor().fit(applications)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0)
+    model.fit(preprocessor.transform(applications), encode_target(applications["case_status"]))
+    model = ThresholdedClassifier(model, threshold=0.6)
+    model_path = directory / "models.joblib"
+    joblib.dump({"Random Forest": model}, model_path)
+    return preprocessor, model, str(model_path), preprocessor.save(str(directory / "preprocessor.joblib"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_score_file_matches_score_frame(applications, artifacts, tmp_path, workers, suffix):
+    preprocessor, model, model_path, preprocessor_path = artifacts
+    source = tmp_path / f"applications{suffix}"
+    if suffix == ".csv":
+        # The raw file spells flags Y/N
+        applications.replace({col: {True: "Y", False: "N"} for col in FLAG_COLUMNS}).to_csv(source, index=False)
+    else:
+        applications.to_parquet(source, index=False)
+    output = str(tmp_path / "scores.parquet")
+
+    rows = score_file(str(source), output, model_path, preprocessor_path, model_name="Random Forest",
+                      chunksize=700, workers=workers)
+
+    expected = score_frame(applications, preprocessor, model)
+    assert rows == len(applications)
+    scores = pd.read_parquet(output)
+    assert scores["case_id"].tolist() == applications["case_id"].tolist()
+    np.testing.assert_allclose(scores["certified_proba"], expected["certified_proba"], rtol=0, atol=1e-12)
+    assert scores["case_status_pred"].tolist() == expected["case_status_pred"].tolist()
+
+
+def test_saved_threshold_is_applied(applications, artifacts):
+    preprocessor, model, _, _ = artifacts
+    scores = score_frame(applications, preprocessor, model)
+    certified = scores["certified_proba"] >= 0.6
+    assert (scores["case_status_pred"] == np.where(certified, "Certified", "Denied")).all()
+    assert (score_frame(applications, preprocessor, model, threshold=0.5)["certified_proba"]
+            == scores["certified_proba"]).all()
@@ -0,0 +1,69 @@
+"""HTTP status codes of the scoring server."""
+
+import asyncio
+import json
+import socket
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from easyvisa.preprocess import VisaPreprocessor
+from easyvisa.server import ScoringService
+
+RECORD = {"continent": "Asia", "has_job_experience": "Y", "prevailing_wage": 5000.0}
+
+
+class BrokenModel:
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        raise ValueError("model is broken")
+
+
+@pytest.fixture
+def service():
+    frame = pd.DataFrame({"continent": ["Asia", "Europe"], "has_job_experience": ["Y", "N"],
+                          "prevailing_wage": [1000.0, 2000.0]})
+    return ScoringService(BrokenModel(), VisaPreprocessor().fit(frame))
+
+
+async def _request(reader, writer, body):
+    writer.write(f"POST /score HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, json.loads(await reader.readexactly(length))
+
+
+def _exchange(service, bodies):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    async def run():
+        ready = asyncio.Event()
+        server = asyncio.create_task(service.serve("127.0.0.1", port, ready))
+        await ready.wait()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return [await _request(reader, writer, body) for body in bodies]
+        finally:
+            writer.close()
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_model_failure_is_a_500_on_a_live_connection(service):
+    good = json.dumps(RECORD).encode()
+    bad = json.dumps({**RECORD, "has_job_experience": "maybe"}).encode()
+    responses = _exchange(service, [good, json.dumps([RECORD, RECORD]).encode(), bad])
+
+    assert [status for status, _ in responses] == [500, 500, 400]
+    assert "model is broken" in responses[0][1]["error"]
+    assert "maybe" in responses[2][1]["error"]
@@ -0,0 +1,72 @@
+"""KLL quantile sketches: rank error, merging and serialization."""
+
+import numpy as np
+import pytest
+
+from easyvisa.sketch import KLLSketch, merge_sketches, normalized_rank_error
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+@pytest.fixture(scope="module")
+def stream():
+    return np.random.default_rng(0).lognormal(11, 0.8, 200_000)
+
+
+def _rank_error(values, sketch):
+    """Largest gap between each requested quantile and the true rank of the value returned for it."""
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, sketch.quantile(QUANTILES), side="right") / len(ordered)
+    return np.abs(ranks - QUANTILES).max()
+
+
+def _sketch(values, k, seed, chunk=10_000):
+    sketch = KLLSketch(k, seed=seed)
+    for start in range(0, len(values), chunk):
+        sketch.update(values[start:start + chunk])
+    return sketch
+
+
+@pytest.mark.parametrize("k", [100, 200, 1000])
+def test_rank_error_within_bound(stream, k):
+    sketch = _sketch(stream, k, seed=1)
+    assert sketch.n == len(stream)
+    assert sketch.num_retained < 4 * k
+    assert _rank_error(stream, sketch) <= normalized_rank_error(k)
+    assert (sketch.min, sketch.max) == (stream.min(), stream.max())
+    assert sketch.quantile(0) == stream.min() and sketch.quantile(1) == stream.max()
+
+
+def test_merge_matches_a_single_sketch(stream):
+    single = _sketch(stream, 200, seed=1)
+    partials = [{"wage": _sketch(part, 200, seed=10 + i)} for i, part in enumerate(np.array_split(stream, 4))]
+    merged = merge_sketches(partials)["wage"]
+
+    assert merged.n == single.n
+    assert (merged.min, merged.max) == (single.min, single.max)
+    assert _rank_error(stream, merged) <= normalized_rank_error(200)
+    # Both answers lie within the bound of the true rank, so of each other too
+    ordered = np.sort(stream)
+    gap = np.abs(np.searchsorted(ordered, merged.quantile(QUANTILES), side="right")
+                 - np.searchsorted(ordered, single.quantile(QUANTILES), side="right")) / len(stream)
+    assert gap.max() <= 2 * normalized_rank_error(200)
+
+
+def test_exact_below_capacity():
+    values = np.random.default_rng(2).normal(size=150)
+    sketch = KLLSketch(200).update(np.r_[values, np.nan])
+    assert sketch.n == len(values)
+    np.testing.assert_array_equal(sketch.quantile(QUANTILES), np.quantile(values, QUANTILES, method="inverted_cdf"))
+    np.testing.assert_allclose(sketch.cdf(values), (np.argsort(np.argsort(values)) + 1) / len(values))
+
+
+def test_roundtrip(stream):
+    sketch = _sketch(stream, 200, seed=3)
+    loaded = KLLSketch.from_dict(sketch.to_dict())
+    np.testing.assert_array_equal(loaded.quantile(QUANTILES), sketch.quantile(QUANTILES))
+    assert (loaded.n, loaded.min, loaded.max) == (sketch.n, sketch.min, sketch.max)
+
+
+def test_empty_sketch_raises():
+    with pytest.raises(ValueError):
+        KLLSketch().quantile(0.5)
@@ -0,0 +1,77 @@
+"""Stacking over cached out-of-fold predictions: cache hits, keys and labels."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.tree import DecisionTreeClassifier
+
+from easyvisa.stacking import CachedStackingClassifier, cached_oof_proba, model_key
+
+
+def _learners():
+    return [
+        ("tree", DecisionTreeClassifier(max_depth=4, random_state=0)),
+        ("forest", RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0)),
+    ]
+
+
+def test_second_fit_hits_the_cache(encoded, tmp_path):
+    _, X, y = encoded
+    first = CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path).fit(X, y)
+    assert (first.cache_hits_, first.cache_misses_) == (0, 2)
+
+    second = CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path).fit(X, y)
+    assert (second.cache_hits_, second.cache_misses_) == (2, 0)
+    np.testing.assert_array_equal(second.predict_proba(X), first.predict_proba(X))
+
+    # A new learner costs only its own folds
+    extended = _learners() + [("stump", DecisionTreeClassifier(max_depth=1))]
+    third = CachedStackingClassifier(extended, cv=3, cache_dir=tmp_path).fit(X, y)
+    assert (third.cache_hits_, third.cache_misses_) == (2, 1)
+
+
+def test_other_data_or_folds_miss(encoded, tmp_path):
+    _, X, y = encoded
+    CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path).fit(X, y)
+    for stacking, rows in [(CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path, random_state=0), None),
+                           (CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path), slice(0, 2_000))]:
+        stacking.fit(X if rows is None else X.iloc[rows], y if rows is None else y[rows])
+        assert (stacking.cache_hits_, stacking.cache_misses_) == (0, 2)
+
+
+def test_oof_matches_cross_val_predict(encoded, tmp_path):
+    _, X, y = encoded
+    tree = DecisionTreeClassifier(max_depth=4, random_state=0)
+    folds = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    expected = cross_val_predict(tree, X, y, cv=folds, method="predict_proba")[:, 1]
+    np.testing.assert_allclose(cached_oof_proba(tree, X, y, cv=3, cache_dir=tmp_path), expected)
+    # Served from the cache the second time, unchanged
+    np.testing.assert_array_equal(cached_oof_proba(tree, X, y, cv=3, cache_dir=tmp_path), expected)
+
+
+def test_model_key():
+    forest = RandomForestClassifier(n_estimators=10, random_state=0)
+    assert model_key(forest) == model_key(RandomForestClassifier(n_estimators=10, random_state=0))
+    assert model_key(forest) != model_key(RandomForestClassifier(n_estimators=11, random_state=0))
+    assert model_key(forest) != model_key(DecisionTreeClassifier(random_state=0))
+    stacked = CachedStackingClassifier(_learners())
+    assert model_key(stacked) == model_key(CachedStackingClassifier(_learners()))
+    assert model_key(stacked) != model_key(CachedStackingClassifier(_learners()[:1]))
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.7])
+def test_predict_uses_the_threshold(encoded, tmp_path, threshold):
+    _, X, y = encoded
+    stacking = CachedStackingClassifier(_learners(), cv=3, cache_dir=tmp_path).fit(X, y)
+    proba = stacking.predict_proba(X)[:, 1]
+    np.testing.assert_array_equal(stacking.predict(X, threshold), (proba >= threshold).astype(int))
+
+
+def test_fitted_learners_are_reused(encoded, tmp_path):
+    _, X, y = encoded
+    fitted = DecisionTreeClassifier(max_depth=4, random_state=0).fit(X, y)
+    unfitted = RandomForestClassifier(n_estimators=10, random_state=0)
+    stacking = CachedStackingClassifier([("tree", fitted), ("forest", unfitted)], cv=3, cache_dir=tmp_path).fit(X, y)
+    assert stacking.estimators_[0][1] is fitted
+    assert stacking.estimators_[1][1] is not unfitted
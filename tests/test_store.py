@@ -0,0 +1,68 @@
+"""The compact FeatureStore against the DataFrame operations it replaces."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from easyvisa.ingest import FLAG_COLUMNS, memory_usage_mb
+from easyvisa.preprocess import UNKNOWN_CODE, encode_target
+from easyvisa.store import FeatureStore
+
+
+@pytest.fixture(scope="module")
+def store(applications):
+    return FeatureStore.from_frame(applications)
+
+
+def test_split_matches_train_test_split(applications, store):
+    train_rows, test_rows = store.split(test_size=0.2, random_state=42)
+    train, test = train_test_split(applications, test_size=0.2, random_state=42,
+                                   stratify=applications["case_status"])
+    np.testing.assert_array_equal(train_rows, train.index.to_numpy())
+    np.testing.assert_array_equal(test_rows, test.index.to_numpy())
+    np.testing.assert_array_equal(store.y(test_rows), encode_target(test["case_status"]))
+
+
+def test_folds_match_stratified_kfold(applications, store):
+    rows, _ = store.split()
+    y = encode_target(applications["case_status"].iloc[rows])
+    splitter = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    for (train, val), (expected_train, expected_val) in zip(store.folds(rows), splitter.split(np.zeros(len(y)), y)):
+        np.testing.assert_array_equal(train, rows[expected_train])
+        np.testing.assert_array_equal(val, rows[expected_val])
+
+
+@pytest.mark.parametrize("rows", [None, slice(100, 400), np.array([5, 3, 2_999, 0, 1_024])])
+def test_frame_and_features_match_the_dataframe(applications, encoded, store, rows):
+    preprocessor, _, _ = encoded
+    expected = applications if rows is None else applications.iloc[rows]
+    frame = store.frame(rows)
+    pd.testing.assert_frame_equal(frame.drop(columns="prevailing_wage"),
+                                  expected.drop(columns="prevailing_wage").reset_index(drop=True))
+    np.testing.assert_allclose(frame["prevailing_wage"], expected["prevailing_wage"], rtol=1e-6)
+
+    features = store.features(rows, preprocessor)
+    transformed = preprocessor.transform(expected)
+    assert list(features.columns) == list(transformed.columns)
+    np.testing.assert_allclose(features.to_numpy(np.float64), transformed.to_numpy(np.float64), rtol=1e-6)
+
+
+def test_smaller_than_the_frame(applications, store):
+    assert store.memory_usage_mb() < memory_usage_mb(applications) / 3
+
+
+def test_chunks_and_roundtrip_keep_missing_flags(applications, tmp_path):
+    frame = applications.copy()
+    frame["has_job_experience"] = pd.array(frame["has_job_experience"], dtype="boolean")
+    frame.loc[[7, 1_500], "has_job_experience"] = pd.NA
+    chunked = FeatureStore.from_chunks(frame.iloc[start:start + 1_000] for start in range(0, len(frame), 1_000))
+    loaded = FeatureStore.load(chunked.save(tmp_path / "store.npz"))
+
+    for store in (chunked, loaded):
+        pd.testing.assert_frame_equal(store.frame(), FeatureStore.from_frame(frame).frame())
+        codes = store.flag_codes("has_job_experience")
+        assert (codes[[7, 1_500]] == UNKNOWN_CODE).all()
+        assert (codes >= 0).sum() == len(frame) - 2
+        for col in FLAG_COLUMNS[1:]:
+            assert store.flag_missing_mask(col) is None
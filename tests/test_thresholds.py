@@ -0,0 +1,73 @@
+"""Threshold sweeps and tuning against a brute-force search over every cut-off."""
+
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix, fbeta_score
+from sklearn.tree import DecisionTreeClassifier
+
+from easyvisa.thresholds import ThresholdedClassifier, optimize_threshold, threshold_sweep
+
+
+@pytest.fixture(scope="module")
+def scored():
+    """Labels and probabilities with plenty of ties, as tree models produce."""
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 1_500)
+    proba = np.clip(0.35 * y + rng.normal(0.35, 0.2, len(y)), 0, 1).round(2)
+    return y, proba
+
+
+def _brute_force(y, proba, score):
+    """Best ``score(y, labels)`` over every distinct probability used as a ``>=`` cut-off."""
+    candidates = np.r_[np.unique(proba), np.inf]
+    scores = [score(y, (proba >= t).astype(int)) for t in candidates]
+    return max(scores), candidates[np.flatnonzero(np.isclose(scores, max(scores)))]
+
+
+def test_sweep_matches_confusion_matrix(scored):
+    y, proba = scored
+    sweep = threshold_sweep(y, proba)
+    assert len(sweep["threshold"]) == len(np.unique(proba)) + 1
+    assert np.all(np.diff(sweep["threshold"]) < 0)
+    for i, t in enumerate(sweep["threshold"]):
+        for labels in ((proba > t).astype(int), (proba >= t).astype(int)):
+            tn, fp, fn, tp = confusion_matrix(y, labels, labels=[0, 1]).ravel()
+            assert (sweep["tp"][i], sweep["fp"][i], sweep["fn"][i], sweep["tn"][i]) == (tp, fp, fn, tn)
+
+
+@pytest.mark.parametrize("beta", [0.5, 1.0, 2.0])
+def test_f_beta_matches_brute_force(scored, beta):
+    y, proba = scored
+    result = optimize_threshold(y, proba, beta=beta)
+    best, _ = _brute_force(y, proba, lambda y, labels: fbeta_score(y, labels, beta=beta, zero_division=0))
+    assert result.score == pytest.approx(best)
+    assert fbeta_score(y, (proba >= result.threshold).astype(int), beta=beta) == pytest.approx(best)
+
+
+@pytest.mark.parametrize("fn_cost", [1.0, 3.0])
+def test_cost_matches_brute_force(scored, fn_cost):
+    y, proba = scored
+
+    def negated_cost(y, labels):
+        tn, fp, fn, tp = confusion_matrix(y, labels, labels=[0, 1]).ravel()
+        return -(fn_cost * fn + fp) / len(y)
+
+    result = optimize_threshold(y, proba, fn_cost=fn_cost)
+    best, cut_offs = _brute_force(y, proba, negated_cost)
+    assert result.score == pytest.approx(-best)
+    assert negated_cost(y, (proba >= result.threshold).astype(int)) == pytest.approx(best)
+    # Of the tied cut-offs, the one nearest 0.5
+    nearest = cut_offs[np.argmin(np.abs(cut_offs - 0.5))]
+    assert np.array_equal(proba >= result.threshold, proba >= nearest)
+
+
+def test_thresholded_classifier_labels(encoded):
+    _, X, y = encoded
+    model = DecisionTreeClassifier(max_depth=5, random_state=0).fit(X[:2_000], y[:2_000])
+    wrapped = ThresholdedClassifier.tuned(model, X[2_000:], y[2_000:], beta=2.0)
+    proba = model.predict_proba(X)[:, 1]
+
+    assert wrapped.threshold == wrapped.result_.threshold
+    np.testing.assert_array_equal(wrapped.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(wrapped.predict(X), (proba >= wrapped.threshold).astype(int))
+    np.testing.assert_array_equal(wrapped.classes_, model.classes_)
@@ -0,0 +1,42 @@
+"""Budget-aware searches: what they select, refit and report."""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from easyvisa.cv import CVFolds
+from easyvisa.tuning import XGBEarlyStoppingSearch, grid_size, halving_search
+
+XGB_GRID = {"n_estimators": [20, 60], "max_depth": [2, 4], "learning_rate": [0.1, 0.3]}
+
+
+@pytest.mark.parametrize("use_folds", [False, True])
+def test_xgb_early_stopping_refits_the_best_configuration(encoded, use_folds):
+    _, X, y = encoded
+    folds = CVFolds(X, y, n_splits=3) if use_folds else None
+    search = XGBEarlyStoppingSearch(XGB_GRID, early_stopping_rounds=5, folds=folds, n_jobs=1).fit(X, y)
+
+    assert len(search.cv_results_) == grid_size(XGB_GRID) // len(XGB_GRID["n_estimators"])
+    best = max(search.cv_results_, key=lambda result: result["score"])
+    assert search.best_score_ == best["score"]
+    assert search.best_params_ == {key: best[key] for key in XGB_GRID}
+    # Refitted with the early-stopped round count, not the estimator's default
+    assert 1 <= search.best_params_["n_estimators"] <= max(XGB_GRID["n_estimators"])
+    assert search.best_estimator_.get_booster().num_boosted_rounds() == search.best_params_["n_estimators"]
+    assert search.best_estimator_.get_params()["max_depth"] == best["max_depth"]
+    assert search.report_.n_candidates == len(search.cv_results_)
+    assert search.report_.exhaustive_fits == grid_size(XGB_GRID) * (3 if use_folds else search.exhaustive_cv)
+
+
+def test_halving_search_on_trees(encoded):
+    _, X, y = encoded
+    grid = {"n_estimators": [10, 30], "max_depth": [2, 4, 8], "min_samples_leaf": [1, 5, 20]}
+    search = halving_search(RandomForestClassifier(random_state=0), grid, X, y, cv=3, n_jobs=1)
+
+    rounds = search.report_.rounds
+    assert [r["candidates"] for r in rounds] == sorted((r["candidates"] for r in rounds), reverse=True)
+    assert rounds[-1]["resources"] <= max(grid["n_estimators"])
+    assert search.report_.n_fits < search.report_.exhaustive_fits
+    assert search.best_params_["max_depth"] in grid["max_depth"]
+    assert search.best_estimator_.n_estimators == search.best_params_["n_estimators"]
+    np.testing.assert_array_equal(search.best_estimator_.predict(X[:5]), search.predict(X[:5]))